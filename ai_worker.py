@@ -0,0 +1,83 @@
+# ai_worker.py
+import threading
+from concurrent.futures import Future
+from typing import Optional, Tuple
+from board import Board
+from fast_board import FastBoard
+from mcts import MCTSPlayer, Move
+from transposition import position_key
+
+
+class AIWorker:
+    # runs MCTSPlayer searches on a background thread so the pygame loop keeps drawing.
+    # The main loop starts a job and calls poll() once per frame; jobs work on a snapshot
+    # of the board, so the main thread can keep using the real one. Threads are daemons,
+    # so a search that is still pondering never keeps the process alive.
+    def __init__(self, player: MCTSPlayer, ponder: bool = False):
+        self.player = player
+        self.ponder_enabled = ponder
+        self._thread: Optional[threading.Thread] = None
+        self._future: Optional[Future] = None
+        self._stop = threading.Event()
+        self._pondering = False
+        self._position: Optional[int] = None  # position key the running move search is for
+
+    @property
+    def thinking(self) -> bool:
+        return self._future is not None and not self._pondering
+
+    @property
+    def pondering(self) -> bool:
+        return self._future is not None and self._pondering
+
+    def _submit(self, function, board: Board, pondering: bool) -> None:
+        self.cancel()
+        snapshot = FastBoard.from_state(board.to_state())
+        self._stop = stop = threading.Event()
+        self._pondering = pondering
+        self._position = position_key(board.hash, board.current_player)
+        self._future = future = Future()
+        previous = self._thread
+
+        def work() -> None:
+            # one search at a time: let a cancelled one finish its current playout first
+            if previous is not None:
+                previous.join()
+            try:
+                future.set_result(function(snapshot, stop))
+            except BaseException as error:
+                future.set_exception(error)
+
+        self._thread = threading.Thread(target=work, name="ai-search", daemon=True)
+        self._thread.start()
+
+    def start_move(self, board: Board) -> None:
+        self._submit(self.player.select_move, board, False)
+
+    def start_ponder(self, board: Board) -> None:
+        if self.ponder_enabled and not board.game_over:
+            self._submit(self.player.ponder, board, True)
+
+    def poll(self, board: Board) -> Tuple[bool, Move]:
+        # (True, move) once a move search has finished for the position still on the board
+        if self._future is None or self._pondering or not self._future.done():
+            return False, None
+        future, self._future = self._future, None
+        move = future.result()
+        if self._position != position_key(board.hash, board.current_player):
+            return False, None
+        return True, move
+
+    def cancel(self) -> None:
+        # the search notices the event after its current playout; a result that still
+        # arrives is dropped because the future is forgotten here
+        self._stop.set()
+        self._future = None
+        self._pondering = False
+
+    def close(self) -> None:
+        self.cancel()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.player.close()
@@ -0,0 +1,234 @@
+# archive.py
+import argparse
+import mmap
+import os
+import struct
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Type, Union
+from board import Board
+from packed import decode_records, record_dtype, record_size
+
+# Append-only archive of packed positions (see packed.py). PATH holds the records back to
+# back; PATH.idx holds one little-endian uint64 offset per record. A record is written
+# before its index entry, so an interrupted append leaves at most an unindexed tail, which
+# the next writer cuts off. Readers mmap both files: position k is one index lookup and
+# one slice, and a run of same-size records is a NumPy view of the file with no parsing.
+
+INDEX_SUFFIX = ".idx"
+OFFSET = struct.Struct("<Q")
+
+
+def pack_boards(boards: Iterable[Board]) -> bytes:
+    return b"".join(board.to_packed() for board in boards)
+
+
+def unpack_boards(data: bytes, backend: Type[Board] = Board, ko_rule: Optional[str] = None,
+                  dead_stones: Optional[str] = None) -> List[Board]:
+    # records back to back, as written by pack_boards; each one carries its own board size
+    view = memoryview(data)
+    boards = []
+    offset = 0
+    while offset < len(view):
+        end = offset + record_size(view[offset])
+        boards.append(backend.from_packed(view[offset:end], ko_rule, dead_stones))
+        offset = end
+    return boards
+
+
+class PositionArchive:
+    # mode "r" reads, "a" also appends (creating the files if needed)
+    def __init__(self, path: str, mode: str = "r"):
+        if mode not in ("r", "a"):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self._data_file = self._index_file = None
+        if mode == "a":
+            self._data_file = open(path, "ab")
+            self._index_file = open(self.index_path, "ab")
+            self._repair()
+        self._count = 0
+        self._data_map: Optional[mmap.mmap] = None
+        self._index_map: Optional[mmap.mmap] = None
+        self.refresh()
+
+    def _repair(self) -> None:
+        # drop a partial index entry and any record bytes past the last indexed record
+        index_size = self._index_file.tell()
+        count = index_size // OFFSET.size
+        if count * OFFSET.size != index_size:
+            self._index_file.truncate(count * OFFSET.size)
+        end = 0
+        if count:
+            with open(self.index_path, "rb") as index, open(self.path, "rb") as data:
+                index.seek((count - 1) * OFFSET.size)
+                offset = OFFSET.unpack(index.read(OFFSET.size))[0]
+                data.seek(offset)
+                end = offset + record_size(data.read(1)[0])
+        if self._data_file.tell() != end:
+            self._data_file.truncate(end)
+            self._data_file.seek(end)
+
+    def refresh(self) -> None:
+        # (re)map the files, e.g. to see what another process appended since
+        self._unmap()
+        if not os.path.exists(self.index_path):
+            raise FileNotFoundError(f"No archive index at {self.index_path}")
+        self._count = os.path.getsize(self.index_path) // OFFSET.size
+        if self._count:
+            with open(self.path, "rb") as data, open(self.index_path, "rb") as index:
+                self._data_map = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+                self._index_map = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _unmap(self) -> None:
+        for mapped in (self._data_map, self._index_map):
+            if mapped is not None:
+                try:
+                    mapped.close()
+                except BufferError:  # views handed out earlier keep it open until they go
+                    pass
+        self._data_map = self._index_map = None
+
+    def _mapped(self) -> mmap.mmap:
+        # appends since the last mapping are not visible until the files are mapped again
+        if self._index_map is None or len(self._index_map) < self._count * OFFSET.size:
+            self.refresh()
+        return self._data_map
+
+    def append(self, position: Union[Board, bytes]) -> int:
+        # a Board or a record from Board.to_packed; returns the new position's number
+        self.extend([position])
+        return self._count - 1
+
+    def extend(self, positions: Iterable[Union[Board, bytes]]) -> None:
+        # all the records, then all their index entries, one flush each: selfplay writes a
+        # whole game at a time this way instead of two flushes per position
+        if self._data_file is None:
+            raise ValueError("Archive is open read-only")
+        records = []
+        for position in positions:
+            record = position.to_packed() if isinstance(position, Board) else bytes(position)
+            if not record or len(record) != record_size(record[0]):
+                raise ValueError("Not a packed position record")
+            records.append(record)
+        if not records:
+            return
+        offset = self._data_file.tell()
+        offsets = []
+        for record in records:
+            offsets.append(OFFSET.pack(offset))
+            offset += len(record)
+        self._data_file.write(b"".join(records))
+        self._data_file.flush()
+        self._index_file.write(b"".join(offsets))
+        self._index_file.flush()
+        self._count += len(records)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def offset(self, number: int) -> int:
+        if number < 0:
+            number += self._count
+        if not 0 <= number < self._count:
+            raise IndexError("position number out of range")
+        self._mapped()
+        return OFFSET.unpack_from(self._index_map, number * OFFSET.size)[0]
+
+    def __getitem__(self, number: int) -> memoryview:
+        # the raw record, a view into the mapped file
+        offset = self.offset(number)
+        data = self._mapped()
+        return memoryview(data)[offset:offset + record_size(data[offset])]
+
+    def board(self, number: int, backend: Type[Board] = Board, ko_rule: Optional[str] = None,
+              dead_stones: Optional[str] = None) -> Board:
+        return backend.from_packed(self[number], ko_rule, dead_stones)
+
+    def records(self, start: int = 0, stop: Optional[int] = None):
+        # positions start..stop as a structured NumPy array over the mapped file (no copy);
+        # they must all have the same board size
+        import numpy as np
+        stop = self._count if stop is None else min(stop, self._count)
+        if not 0 <= start < stop:
+            raise IndexError("empty or invalid position range")
+        first = self.offset(start)
+        size = self._mapped()[first]
+        dtype = record_dtype(size)
+        offsets = np.frombuffer(self._index_map, dtype="<u8", count=stop - start,
+                                offset=start * OFFSET.size)
+        mixed = ValueError(f"Positions {start}..{stop} are not all {size}x{size}")
+        # the offsets only pin down the records before the last one; its size byte, and
+        # whether the file holds a whole record of this size there, are checked separately
+        if (not np.array_equal(offsets, first + np.arange(stop - start, dtype=np.uint64) * dtype.itemsize)
+                or first + (stop - start) * dtype.itemsize > len(self._data_map)):
+            raise mixed
+        records = np.frombuffer(self._data_map, dtype=dtype, count=stop - start, offset=first)
+        if not (records["size"] == size).all():
+            raise mixed
+        return records
+
+    def arrays(self, start: int = 0, stop: Optional[int] = None) -> Dict[str, object]:
+        # batch decode: cells as a (K, size, size) int8 array, header fields as columns
+        records = self.records(start, stop)
+        return decode_records(records, int(records["size"][0]))
+
+    def close(self) -> None:
+        self._unmap()
+        for file in (self._data_file, self._index_file):
+            if file is not None:
+                file.close()
+        self._data_file = self._index_file = None
+
+    def __enter__(self) -> "PositionArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def run_info(args: argparse.Namespace) -> None:
+    with PositionArchive(args.archive) as archive:
+        sizes = Counter(archive[number][0] for number in range(len(archive)))
+        data_bytes = os.path.getsize(archive.path)
+    print(f"{len(archive)} positions, {data_bytes} bytes "
+          f"({data_bytes / max(1, len(archive)):.1f} bytes/position)")
+    for size, count in sorted(sizes.items()):
+        print(f"  {size}x{size}: {count}")
+
+
+def run_show(args: argparse.Namespace) -> None:
+    with PositionArchive(args.archive) as archive:
+        board = archive.board(args.number)
+    for row in board.board:
+        print(" ".join(".XO"[value] for value in row))
+    ko = board.ko_point()
+    print(f"{'Black' if board.current_player == 1 else 'White'} to move, captures "
+          f"{board.black_captures}/{board.white_captures}, komi {board.komi:g}"
+          + (f", ko at {ko}" if ko is not None else "")
+          + (", game over" if board.game_over else ""))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Packed position archives")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    info = commands.add_parser("info", help="number of positions per board size")
+    info.add_argument("archive")
+    info.set_defaults(run=run_info)
+
+    show = commands.add_parser("show", help="print one position")
+    show.add_argument("archive")
+    show.add_argument("number", type=int)
+    show.set_defaults(run=run_show)
+
+    args = parser.parse_args(argv)
+    try:
+        args.run(args)
+    except (OSError, IndexError, ValueError) as error:
+        sys.exit(str(error))
+
+
+if __name__ == "__main__":
+    main()
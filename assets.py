@@ -0,0 +1,23 @@
+# assets.py
+import pygame
+from functools import lru_cache
+from typing import Tuple
+
+# Fonts and rendered text shared by every screen. A Font is a file load and a glyph cache,
+# so each size is opened once; labels that never change are rendered once and blitted.
+
+
+@lru_cache(maxsize=None)
+def font(size: int) -> pygame.font.Font:
+    return pygame.font.Font(None, size)
+
+
+@lru_cache(maxsize=256)
+def text(string: str, size: int, color: Tuple[int, int, int]) -> pygame.Surface:
+    return font(size).render(string, True, color)
+
+
+def clear() -> None:
+    # surfaces and fonts die with the display, so the caches go before pygame.quit()
+    text.cache_clear()
+    font.cache_clear()
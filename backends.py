@@ -0,0 +1,13 @@
+# backends.py
+from typing import Dict, Type
+from board import Board
+from fast_board import FastBoard
+from bit_board import BitBoard
+
+# Board implementations by name, for the --backend options of the command line tools.
+# All of them follow the rules and public API of Board.
+BACKENDS: Dict[str, Type[Board]] = {
+    "board": Board,
+    "fast": FastBoard,
+    "bit": BitBoard,
+}
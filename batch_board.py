@@ -0,0 +1,495 @@
+# batch_board.py
+from typing import List, Optional, Sequence, Tuple
+from config import Config
+from board import Board
+
+try:
+    import numpy as np
+except ImportError as error:  # optional dependency, only needed for the batched engine
+    raise ImportError("batch_board needs NumPy: pip install numpy") from error
+
+EMPTY, BLACK, WHITE, BORDER = 0, 1, 2, 3
+
+# (row, col) offsets into the padded arrays for the four neighbours and the four diagonals
+NEIGHBOR_SLICES = ((slice(0, -2), slice(1, -1)), (slice(2, None), slice(1, -1)),
+                   (slice(1, -1), slice(0, -2)), (slice(1, -1), slice(2, None)))
+DIAGONAL_SLICES = ((slice(0, -2), slice(0, -2)), (slice(0, -2), slice(2, None)),
+                   (slice(2, None), slice(0, -2)), (slice(2, None), slice(2, None)))
+RANDOM_TRIES = 3  # empty points random_actions() draws per board before checking all of them
+
+
+def shifted(padded: "np.ndarray", slices: Tuple[slice, slice]) -> "np.ndarray":
+    # view of a (B, N + 2, N + 2) array holding each board point's neighbour in one direction
+    return padded[:, slices[0], slices[1]]
+
+
+class BatchBoard:
+    # B games of the same size stepped together. Rules follow Board.place_stone with the
+    # simple ko rule: no suicide, captures of chains left without liberties, no immediate
+    # ko retake, two passes in a row end a game. Scores are area scores (Tromp-Taylor),
+    # so there is no dead stone removal at the end.
+    #
+    # Stones live in a (B, (N + 2) ** 2) int8 array with a BORDER frame, one flat row per
+    # board; `stones` is the (B, N, N) view of the board itself. Like PlayoutBoard, every
+    # chain keeps its pseudo-liberties (count, sum and sum of squares of the adjacent empty
+    # points) under its root stone and links its stones in a ring, so a move only touches
+    # the point, its neighbours and the chains it merges or captures; no step rescans whole
+    # boards. Empty points are kept in a list per board for drawing random moves.
+    # Actions are flat point indices row * size + col, and `pass_action` (size * size) to pass.
+    def __init__(self, batch: int, size: Optional[int] = None, komi: Optional[float] = None):
+        if size is None:
+            size = Config.GRID_SIZE
+        self.batch = batch
+        self.size = size
+        # per board, so boards taken from games with different komi keep their own
+        self.komi = np.full(batch, Config.KOMI if komi is None else komi, dtype=np.float64)
+        self.points = size * size
+        self.pass_action = self.points
+        width = size + 2
+        self._total = width * width
+        self._cells = np.full((batch, self._total), BORDER, dtype=np.int8)
+        self._padded = self._cells.reshape(batch, width, width)
+        self.stones = self._padded[:, 1:-1, 1:-1]
+        self.stones[:] = EMPTY
+        self.to_move = np.ones(batch, dtype=np.int8)
+        self.passes = np.zeros(batch, dtype=np.int8)
+        self.game_over = np.zeros(batch, dtype=bool)
+        self.captures = np.zeros((batch, 3), dtype=np.int32)  # [:, 1] black's, [:, 2] white's prisoners
+        self.ko = np.full(batch, -1, dtype=np.intp)  # point the side to move may not retake, -1 if none
+        self.moves = np.zeros(batch, dtype=np.int32)
+        self._point_ids = np.arange(self.points, dtype=np.int16).reshape(size, size)
+        # action -> padded index, and back (-1 on the frame)
+        rows, cols = np.divmod(np.arange(self.points), size)
+        self._index = (rows + 1) * width + cols + 1
+        self._action = np.full(self._total, -1, dtype=np.intp)
+        self._action[self._index] = np.arange(self.points)
+        self._sides = np.array([-width, width, -1, 1])
+        self._diagonals = np.array([-width - 1, -width + 1, width - 1, width + 1])
+        # padded index of the root stone of every stone's chain, 0 (a frame cell) elsewhere.
+        # The stones of a chain form a ring through _next; the stone count and the
+        # pseudo-liberty tables are only meaningful at roots.
+        self._head = np.zeros((batch, self._total), dtype=np.intp)
+        self._next = np.zeros((batch, self._total), dtype=np.intp)
+        self._stones = np.zeros((batch, self._total), dtype=np.int64)
+        # the empty points of every board in no particular order, as in PlayoutBoard: the
+        # first _empty_count entries of its _empty row, and where each one sits in that row
+        self._empty = np.broadcast_to(self._index, (batch, self.points)).copy()
+        self._empty_count = np.full(batch, self.points, dtype=np.intp)
+        self._fresh_at = np.zeros(self._total, dtype=np.intp)
+        self._fresh_at[self._index] = np.arange(self.points)
+        self._empty_at = np.broadcast_to(self._fresh_at, (batch, self._total)).copy()
+        self._libs = np.zeros((batch, self._total), dtype=np.int64)
+        self._lib_sum = np.zeros((batch, self._total), dtype=np.int64)
+        self._lib_square = np.zeros((batch, self._total), dtype=np.int64)
+
+    @classmethod
+    def from_boards(cls, boards: Sequence[Board]) -> "BatchBoard":
+        # positions of ordinary Board objects, all the same size; each keeps its komi
+        size = boards[0].size
+        if any(board.size != size for board in boards):
+            raise ValueError("BatchBoard needs boards of one size")
+        batch = cls(len(boards), size)
+        for slot, board in enumerate(boards):
+            batch.komi[slot] = board.komi
+            batch.stones[slot] = [list(row) for row in board.board]
+            batch.to_move[slot] = board.current_player
+            batch.passes[slot] = board.consecutive_passes
+            batch.game_over[slot] = board.game_over
+            batch.captures[slot, 1] = board.black_captures
+            batch.captures[slot, 2] = board.white_captures
+            if board.history and len(board.history[-1].captured) == 1:
+                row, col = board.history[-1].captured[0]
+                if board.is_ko_violation(row, col, board.current_player):
+                    batch.ko[slot] = row * size + col
+        batch.refresh()
+        return batch
+
+    def refresh(self) -> None:
+        # rebuild chains and pseudo-liberties from scratch; needed after writing to `stones` directly
+        stones = self.stones
+        both = self._label(np.concatenate([stones == BLACK, stones == WHITE]))
+        labels = np.where(stones == WHITE, both[self.batch:], both[:self.batch]).reshape(self.batch, -1)
+        head = self._head
+        head[:] = 0
+        head[:, self._index] = np.where(labels < self.points,
+                                        self._index[np.minimum(labels, self.points - 1)], 0)
+        # stone rings: every stone points to the next one of its chain, the last back to the first
+        count = self.batch * self._total
+        slots, points = np.nonzero(head)
+        chains = slots * self._total + head[slots, points]
+        order = np.lexsort((points, chains))
+        slots, points, chains = slots[order], points[order], chains[order]
+        first = np.r_[True, chains[1:] != chains[:-1]]
+        starts = points[np.maximum.accumulate(np.where(first, np.arange(points.size), 0))]
+        self._next[slots, points] = np.where(np.roll(first, -1), starts, np.roll(points, -1))
+        self._stones[:] = np.bincount(chains, minlength=count).reshape(self.batch, -1)
+        # empty point lists, the empty points first in every row
+        empty = self._cells[:, self._index] == EMPTY
+        self._empty[:] = self._index[np.argsort(~empty, axis=1, kind="stable")]
+        self._empty_count[:] = empty.sum(axis=1)
+        self._empty_at[np.arange(self.batch)[:, None], self._empty] = np.arange(self.points)
+        # one pseudo-liberty per (stone, empty neighbour) pair
+        libs = np.zeros(count, dtype=np.int64)
+        lib_sum = np.zeros(count, dtype=np.int64)
+        lib_square = np.zeros(count, dtype=np.int64)
+        roots = head[:, self._index]
+        for side in self._sides:
+            spots = self._index + side
+            slots, points = np.nonzero((roots != 0) & (self._cells[:, spots] == EMPTY))
+            keys = slots * self._total + roots[slots, points]
+            spot = spots[points]
+            libs += np.bincount(keys, minlength=count)
+            lib_sum += np.bincount(keys, weights=spot, minlength=count).astype(np.int64)
+            lib_square += np.bincount(keys, weights=spot * spot, minlength=count).astype(np.int64)
+        self._libs[:] = libs.reshape(self.batch, -1)
+        self._lib_sum[:] = lib_sum.reshape(self.batch, -1)
+        self._lib_square[:] = lib_square.reshape(self.batch, -1)
+
+    def reset(self, slots: Optional["np.ndarray"] = None) -> None:
+        # start new games on the given boards (all of them by default), e.g. the finished ones
+        if slots is None:
+            slots = slice(None)
+        self.stones[slots] = EMPTY
+        self.to_move[slots] = BLACK
+        self.passes[slots] = 0
+        self.game_over[slots] = False
+        self.captures[slots] = 0
+        self.ko[slots] = -1
+        self.moves[slots] = 0
+        self._head[slots] = 0
+        self._empty[slots] = self._index
+        self._empty_count[slots] = self.points
+        self._empty_at[slots] = self._fresh_at
+
+    def _label(self, mask: "np.ndarray") -> "np.ndarray":
+        # connected components of the masked points of each board in (C, N, N): every point
+        # gets the smallest point id of its component, `points` where the mask is off.
+        # Min-label propagation plus pointer jumping, so long snakes converge in few rounds.
+        count = mask.shape[0]
+        unset = self.points
+        labels = np.full((count, self.size + 2, self.size + 2), unset, dtype=np.int16)
+        inner = labels[:, 1:-1, 1:-1]
+        inner[:] = np.where(mask, self._point_ids, unset)
+        lookup = np.full((count, self.points + 1), unset, dtype=np.int16)
+        while True:
+            best = inner.copy()
+            for slices in NEIGHBOR_SLICES:
+                np.minimum(best, shifted(labels, slices), out=best)
+            best[~mask] = unset
+            flat = best.reshape(count, -1)
+            for _ in range(2):
+                lookup[:, :-1] = flat
+                flat = np.take_along_axis(lookup, flat.astype(np.intp), axis=1)
+            best = flat.reshape(mask.shape)
+            if np.array_equal(best, inner):
+                return best
+            inner[:] = best
+
+    def _legal(self, slots: "np.ndarray", actions: "np.ndarray") -> "np.ndarray":
+        # whether the side to move may play at one point per entry of `slots`: the point is
+        # empty, not the ko point, and one side is open: an empty point, an own chain with a
+        # spare liberty or an enemy chain in atari (the same test as PlayoutBoard.is_legal)
+        base = slots * self._total
+        keys = base + self._index[actions]
+        sides = keys[:, None] + self._sides
+        values = self._cells.reshape(-1).take(sides)
+        roots = self._head.reshape(-1).take(sides) + base[:, None]
+        total = self._lib_sum.reshape(-1).take(roots)
+        # all pseudo-liberties are one point exactly when count * sum of squares == sum ** 2
+        in_atari = (self._libs.reshape(-1).take(roots) * self._lib_square.reshape(-1).take(roots) ==
+                    total * total)
+        me = self.to_move[slots][:, None]
+        open_side = ((values == EMPTY) | ((values == me) & ~in_atari) |
+                     ((values == 3 - me) & in_atari)).any(axis=1)
+        return open_side & (self._cells.reshape(-1).take(keys) == EMPTY) & (actions != self.ko[slots])
+
+    def _eyes(self, slots: "np.ndarray", actions: "np.ndarray") -> "np.ndarray":
+        # whether the point is an empty eye of the side to move, as in PlayoutBoard.is_eye;
+        # needs no chain lookups, so it is the cheap first filter for random moves
+        cells = self._cells.reshape(-1)
+        keys = slots * self._total + self._index[actions]
+        me = self.to_move[slots][:, None]
+        values = cells.take(keys[:, None] + self._sides)
+        diagonals = cells.take(keys[:, None] + self._diagonals)
+        return ((cells.take(keys) == EMPTY) & ((values == me) | (values == BORDER)).all(axis=1) &
+                ((diagonals == 3 - me).sum(axis=1) < 2 - (diagonals == BORDER).any(axis=1)))
+
+    def _playable(self, slots: "np.ndarray", actions: "np.ndarray") -> "np.ndarray":
+        # legal and no own eye: what random_actions() chooses from
+        found = ~self._eyes(slots, actions)
+        checked = np.flatnonzero(found)
+        found[checked] = self._legal(slots[checked], actions[checked])
+        return found
+
+    def _classify_boards(self, slots: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        # the same tests for every point of the given boards at once: (K, M) legal and own eye
+        count = slots.size
+        padded = self._padded[slots]
+        heads = self._head[slots]
+        liberties = np.take_along_axis(self._libs[slots], heads, axis=1)
+        total = np.take_along_axis(self._lib_sum[slots], heads, axis=1)
+        in_atari = (liberties * np.take_along_axis(self._lib_square[slots], heads, axis=1) ==
+                    total * total).reshape(padded.shape)
+        me = self.to_move[slots][:, None, None]
+        open_cell = ((padded == EMPTY) | ((padded == me) & ~in_atari) |
+                     ((padded == 3 - me) & in_atari))
+        friendly = (padded == me) | (padded == BORDER)
+        enemy = (padded == 3 - me).view(np.int8)
+        border = (padded == BORDER).view(np.int8)
+        legal = padded[:, 1:-1, 1:-1] == EMPTY
+        open_side = np.zeros(legal.shape, dtype=bool)
+        surrounded = legal.copy()
+        for slices in NEIGHBOR_SLICES:
+            open_side |= shifted(open_cell, slices)
+            surrounded &= shifted(friendly, slices)
+        enemy_diagonals = np.zeros(legal.shape, dtype=np.int8)
+        off_board = np.zeros(legal.shape, dtype=np.int8)
+        for slices in DIAGONAL_SLICES:
+            enemy_diagonals += shifted(enemy, slices)
+            off_board |= shifted(border, slices)
+        legal = (legal & open_side).reshape(count, -1)
+        has_ko = np.flatnonzero(self.ko[slots] >= 0)
+        legal[has_ko, self.ko[slots][has_ko]] = False
+        return legal, (surrounded & (enemy_diagonals < 2 - off_board)).reshape(count, -1)
+
+    def legal_mask(self) -> "np.ndarray":
+        # (B, M + 1) bool, the last column is the pass; all False for finished games
+        legal = np.zeros((self.batch, self.points + 1), dtype=bool)
+        legal[:, :-1] = self._classify_boards(np.arange(self.batch))[0]
+        legal[:, -1] = True
+        legal[self.game_over] = False
+        return legal
+
+    def eye_mask(self) -> "np.ndarray":
+        # (B, M) points that are an eye of the side to move, same test as PlayoutBoard.is_eye
+        return self._classify_boards(np.arange(self.batch))[1]
+
+    def random_actions(self, rng: "np.random.Generator", tries: int = RANDOM_TRIES) -> "np.ndarray":
+        # uniformly random legal moves that fill no own eye; pass where nothing is left.
+        # Each board draws a few points from its empty list and keeps the first that
+        # qualifies; only boards where all of them failed check every empty point.
+        points = self.points
+        empty = self._empty.reshape(-1)
+        counts = self._empty_count
+        actions = np.full(self.batch, self.pass_action, dtype=np.intp)
+        pending = np.flatnonzero(~self.game_over & (counts > 0))
+        for _ in range(tries):
+            if not pending.size:
+                return actions
+            drawn = (rng.random(pending.size) * counts[pending]).astype(np.intp)
+            picks = self._action[empty.take(pending * points + drawn)]
+            found = self._playable(pending, picks)
+            actions[pending[found]] = picks[found]
+            pending = pending[~found]
+        if pending.size:
+            owners, drawn = np.nonzero(np.arange(points) < counts[pending][:, None])
+            picks = self._action[empty.take(pending[owners] * points + drawn)]
+            found = self._playable(pending[owners], picks)
+            owners, picks = owners[found], picks[found]
+            # the candidates are grouped by board, so each board picks an offset into its group
+            candidates = np.bincount(owners, minlength=pending.size)
+            some = np.flatnonzero(candidates)
+            starts = np.cumsum(candidates) - candidates
+            drawn = (rng.random(some.size) * candidates[some]).astype(np.intp)
+            actions[pending[some]] = picks[starts[some] + drawn]
+        return actions
+
+    def step(self, actions: "np.ndarray") -> "np.ndarray":
+        # plays one action per board and returns which boards played it. Like
+        # Board.place_stone an illegal move leaves its board untouched; finished games ignore theirs.
+        actions = np.asarray(actions, dtype=np.intp)
+        played = (actions >= 0) & (actions <= self.pass_action) & ~self.game_over
+        passing = played & (actions == self.pass_action)
+        placing = np.flatnonzero(played & ~passing)
+        if placing.size:
+            legal = self._legal(placing, actions[placing])
+            played[placing[~legal]] = False
+            placing = placing[legal]
+        if placing.size:
+            self._place(placing, actions[placing])
+        self.ko[passing] = -1
+        self.passes[passing] += 1
+        self.game_over |= self.passes >= 2
+        self.to_move[played] = 3 - self.to_move[played]
+        self.moves[played] += 1
+        return played
+
+    def _chain_stones(self, boards: "np.ndarray", roots: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        # every stone of the chains at `roots` on `boards` by walking their stone rings:
+        # (number of the chain in the arguments, padded point), in walking order
+        ring = self._next.reshape(-1)
+        chain = np.arange(roots.size)
+        base = boards * self._total
+        stone = roots
+        chains = [chain]
+        stones = [stone]
+        while True:
+            stone = ring.take(base + stone)
+            going = stone != roots
+            if not going.all():
+                chain, base, stone, roots = chain[going], base[going], stone[going], roots[going]
+                if not chain.size:
+                    return np.concatenate(chains), np.concatenate(stones)
+            chains.append(chain)
+            stones.append(stone)
+
+    def _place(self, slots: "np.ndarray", actions: "np.ndarray") -> None:
+        # the stones of legal moves, one per board in `slots`
+        total = self._total
+        cells = self._cells.reshape(-1)
+        head = self._head.reshape(-1)
+        ring = self._next.reshape(-1)
+        stones = self._stones.reshape(-1)
+        libs = self._libs.reshape(-1)
+        lib_sum = self._lib_sum.reshape(-1)
+        lib_square = self._lib_square.reshape(-1)
+        spots = self._index[actions]
+        me = self.to_move[slots]
+        base = slots * total
+        adj = spots[:, None] + self._sides
+        keys = base[:, None] + adj
+        values = cells.take(keys)
+        roots = head.take(keys)
+
+        # the new point is no longer a pseudo-liberty of any chain next to it
+        touching = (values == BLACK) | (values == WHITE)
+        chains = (base[:, None] + roots)[touching]
+        taken = np.broadcast_to(spots[:, None], adj.shape)[touching]
+        np.subtract.at(libs, chains, 1)
+        np.subtract.at(lib_sum, chains, taken)
+        np.subtract.at(lib_square, chains, taken * taken)
+
+        # the stone joins the largest friendly chain next to it (or starts its own), and the
+        # other friendly chains are renamed into that one and spliced into its stone ring
+        empty_side = values == EMPTY
+        friends = np.where(values == me[:, None], roots, 0)
+        sizes = stones.take(base[:, None] + friends)
+        label = friends[np.arange(slots.size), sizes.argmax(axis=1)]
+        lone = label == 0
+        label[lone] = spots[lone]
+        own = base + spots
+        joined = base + label
+        cells[own] = me
+        head[own] = label
+        # the point leaves the empty list: the last entry takes its place
+        empty = self._empty.reshape(-1)
+        empty_at = self._empty_at.reshape(-1)
+        lists = slots * self.points
+        last = self._empty_count[slots] - 1
+        moved = empty.take(lists + last)
+        place = empty_at.take(own)
+        empty[lists + place] = moved
+        empty_at[base + moved] = place
+        self._empty_count[slots] = last
+        counts = empty_side.sum(axis=1)
+        sums = (adj * empty_side).sum(axis=1)
+        squares = (adj * adj * empty_side).sum(axis=1)
+        ring[own[lone]] = spots[lone]
+        stones[own[lone]] = 1
+        libs[own[lone]] = counts[lone]
+        lib_sum[own[lone]] = sums[lone]
+        lib_square[own[lone]] = squares[lone]
+        grown = ~lone
+        ring[own[grown]] = ring[joined[grown]]
+        ring[joined[grown]] = spots[grown]
+        stones[joined[grown]] += 1
+        libs[joined[grown]] += counts[grown]
+        lib_sum[joined[grown]] += sums[grown]
+        lib_square[joined[grown]] += squares[grown]
+        merged = (friends > 0) & (friends != label[:, None])
+        for later in range(1, 4):
+            for earlier in range(later):
+                merged[:, later] &= friends[:, later] != friends[:, earlier]
+        if merged.any():
+            rows, columns = np.nonzero(merged)
+            others = base[rows] + friends[rows, columns]
+            targets = joined[rows]
+            chain, points = self._chain_stones(slots[rows], friends[rows, columns])
+            head[base[rows[chain]] + points] = label[rows[chain]]
+            np.add.at(stones, targets, stones[others])
+            np.add.at(libs, targets, libs[others])
+            np.add.at(lib_sum, targets, lib_sum[others])
+            np.add.at(lib_square, targets, lib_square[others])
+            for column in range(4):
+                # one splice per board at a time: swap the successors of the two roots
+                rows = np.flatnonzero(merged[:, column])
+                if rows.size:
+                    first = joined[rows]
+                    second = base[rows] + friends[rows, column]
+                    ring[first], ring[second] = ring[second], ring[first]
+
+        # enemy chains left without a pseudo-liberty are lifted
+        enemies = np.where(values == (3 - me)[:, None], roots, 0)
+        dead = (enemies > 0) & (libs.take(base[:, None] + enemies) == 0)
+        for later in range(1, 4):
+            for earlier in range(later):
+                dead[:, later] &= enemies[:, later] != enemies[:, earlier]
+        captured = np.zeros(slots.size, dtype=np.int32)
+        ko = np.full(slots.size, -1, dtype=np.intp)
+        if dead.any():
+            rows, columns = np.nonzero(dead)
+            chain, points = self._chain_stones(slots[rows], enemies[rows, columns])
+            owners = rows[chain]
+            lifted = base[owners] + points
+            cells[lifted] = EMPTY
+            head[lifted] = 0
+            # each lifted stone is a new pseudo-liberty of every chain next to it
+            for side in self._sides:
+                around = lifted + side
+                value = cells.take(around)
+                touching = (value == BLACK) | (value == WHITE)
+                chains = base[owners[touching]] + head.take(around[touching])
+                freed = points[touching]
+                np.add.at(libs, chains, 1)
+                np.add.at(lib_sum, chains, freed)
+                np.add.at(lib_square, chains, freed * freed)
+            captured = np.bincount(owners, minlength=slots.size).astype(np.int32)
+            # the lifted points join the end of their board's empty list
+            order = np.argsort(owners, kind="stable")
+            owners, points = owners[order], points[order]
+            place = (self._empty_count[slots][owners] + np.arange(owners.size) -
+                     (np.cumsum(captured) - captured)[owners])
+            empty[lists[owners] + place] = points
+            empty_at[base[owners] + points] = place
+            self._empty_count[slots] += captured
+            single = captured == 1
+            ko[owners] = self._action[points]  # only read where the board took a single stone
+            ko[~single] = -1
+        np.add.at(self.captures, (slots, me), captured)
+
+        # a single stone that took a single stone and had no other open side makes a ko
+        alone = ~(values == me[:, None]).any(axis=1) & ~empty_side.any(axis=1)
+        self.ko[slots] = np.where((captured == 1) & alone, ko, -1)
+        self.passes[slots] = 0
+
+    def area_scores(self) -> "np.ndarray":
+        # (B, 2) black and white area: stones plus empty regions that reach only that colour
+        stones = self.stones
+        empty = stones == EMPTY
+        regions = self._label(empty).reshape(self.batch, -1).astype(np.intp)
+        reaches_black = np.zeros(stones.shape, dtype=bool)
+        reaches_white = np.zeros(stones.shape, dtype=bool)
+        for slices in NEIGHBOR_SLICES:
+            color = shifted(self._padded, slices)
+            reaches_black |= color == BLACK
+            reaches_white |= color == WHITE
+        unset = self.points
+        keys = (regions + (np.arange(self.batch) * (unset + 1))[:, None]).ravel()
+        length = self.batch * (unset + 1)
+        sizes = np.bincount(keys, minlength=length).reshape(self.batch, unset + 1)
+        black_border = np.bincount(keys, weights=reaches_black.ravel(), minlength=length).reshape(sizes.shape) > 0
+        white_border = np.bincount(keys, weights=reaches_white.ravel(), minlength=length).reshape(sizes.shape) > 0
+        sizes[:, unset] = 0
+        black = (stones == BLACK).sum(axis=(1, 2)) + (sizes * (black_border & ~white_border)).sum(axis=1)
+        white = (stones == WHITE).sum(axis=(1, 2)) + (sizes * (white_border & ~black_border)).sum(axis=1)
+        return np.stack([black, white], axis=1)
+
+    def winners(self, komi: Optional[float] = None) -> "np.ndarray":
+        # komi overrides the per-board komi for every board
+        if komi is None:
+            komi = self.komi
+        scores = self.area_scores()
+        return np.where(scores[:, 0] - scores[:, 1] > komi, BLACK, WHITE).astype(np.int8)
+
+    def board(self, slot: int) -> List[List[int]]:
+        return self.stones[slot].tolist()
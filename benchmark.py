@@ -0,0 +1,453 @@
+# benchmark.py
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Type
+from board import Board, KO_RULES
+from bit_board import BitBoard
+from backends import BACKENDS
+from mcts import MCTSPlayer
+from playout import PlayoutBoard
+from patterns import PatternTable, load_table
+
+
+def play_random_game(board: Board, rng: random.Random, max_moves: int) -> int:
+    # random legal moves until both sides pass; returns the number of stones played
+    size = board.size
+    moves = 0
+    while not board.game_over and moves < max_moves:
+        for _ in range(size * 2):
+            if board.place_stone(rng.randrange(size), rng.randrange(size)):
+                moves += 1
+                break
+        else:
+            board.pass_turn()
+    return moves
+
+
+def record_random_games(size: int, games: int, seed: int) -> List[List[Optional[Tuple[int, int]]]]:
+    # generate the move sequences once, so every backend replays exactly the same games
+    rng = random.Random(seed)
+    records = []
+    for _ in range(games):
+        board = Board(size=size)
+        play_random_game(board, rng, size * size * 3)
+        records.append([record.point for record in board.history])
+    return records
+
+
+def bench_moves(backend: Type[Board], size: int, records: List[List[Optional[Tuple[int, int]]]]) -> float:
+    board = backend(size=size)
+    moves = 0
+    start = time.perf_counter()
+    for game in records:
+        for point in game:
+            if point is None:
+                board.pass_turn()
+            else:
+                board.place_stone(*point)
+        moves += len(game)
+        board.reset()
+    return moves / (time.perf_counter() - start)
+
+
+def bench_parallel(size: int, workers: int, seconds: float) -> float:
+    # MCTS playouts/sec on the empty board with a fixed time budget
+    board = Board(size=size)
+    player = MCTSPlayer(playouts=10 ** 9, time_limit=seconds, seed=0, workers=workers)
+    try:
+        if workers > 1:
+            # start the pool processes before timing
+            player.time_limit = 0.1
+            player.select_move(board)
+            player.time_limit = seconds
+        start = time.perf_counter()
+        player.select_move(board)
+        return player.last_playouts / (time.perf_counter() - start)
+    finally:
+        player.close()
+
+
+def bench_playouts(size: int, seconds: float, seed: int, table: Optional[PatternTable] = None) -> float:
+    # random (or pattern-guided) rollouts from the empty board, each on a fresh copy, scored at the end
+    root = PlayoutBoard(size)
+    if table is not None:
+        root.track_patterns(table.diamond)
+    rng = random.Random(seed)
+    playouts = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        playout = root.copy()
+        playout.play_random(rng, table=table)
+        playout.winner()
+        playouts += 1
+    return playouts / (time.perf_counter() - start)
+
+
+def bench_batch(size: int, batch: int, steps: int, seed: int) -> float:
+    # random games on a BatchBoard, finished boards start over so the batch stays full; needs NumPy
+    import numpy as np
+    from batch_board import BatchBoard
+    board = BatchBoard(batch, size)
+    rng = np.random.default_rng(seed)
+    moves = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        finished = np.flatnonzero(board.game_over)
+        if finished.size:
+            moves += int(board.moves[finished].sum())
+            board.reset(finished)
+        board.step(board.random_actions(rng))
+    moves += int(board.moves.sum())
+    return moves / (time.perf_counter() - start)
+
+
+# --- rules engine suite ---
+
+Setup = Callable[[], Callable[[], object]]  # untimed preparation returning the operation to time
+PERCENTILES = (50, 90, 99)
+
+
+def measure(setup: Setup, samples: int, warmup: int = 5) -> Dict[str, float]:
+    # every sample times a single call; the setup between calls (undo, rebuilding) is not timed
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for sample in range(warmup + samples):
+            operation = setup()
+            start = time.perf_counter_ns()
+            operation()
+            elapsed = time.perf_counter_ns() - start
+            if sample >= warmup:
+                timings.append(elapsed / 1000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    timings.sort()
+    total = sum(timings)
+    result = {
+        "samples": samples,
+        "ops_per_sec": samples / total * 1e6 if total else 0.0,
+        "mean_us": total / samples,
+        "min_us": timings[0],
+    }
+    for percentile in PERCENTILES:
+        result[f"p{percentile}_us"] = timings[min(samples - 1, samples * percentile // 100)]
+    return result
+
+
+def midgame(backend: Type[Board], size: int, seed: int, ko_rule: str = "simple") -> Board:
+    # the first half of a recorded random game
+    record = record_random_games(size, 1, seed)[0]
+    board = backend(ko_rule, size=size)
+    for point in record[:len(record) // 2]:
+        if point is None:
+            board.pass_turn()
+        else:
+            board.place_stone(*point)
+    return board
+
+
+def classify_moves(board: Board) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    # legal moves of the side to move, split into (quiet, capturing)
+    quiet, capturing = [], []
+    for row in range(board.size):
+        for col in range(board.size):
+            if board.place_stone(row, col):
+                (capturing if board.history[-1].captured else quiet).append((row, col))
+                board.undo()
+    return quiet, capturing
+
+
+def large_capture(backend: Type[Board], size: int) -> Board:
+    # White fills every row but the first, Black the first row but the corner:
+    # Black to play the corner captures size * (size - 1) stones
+    board = backend(size=size)
+    board.setup_stones([(0, col) for col in range(1, size)],
+                       [(row, col) for row in range(1, size) for col in range(size)])
+    return board
+
+
+def spanning_chain(backend: Type[Board], size: int) -> Board:
+    # one black snake over the whole board: full even rows joined at alternating ends
+    black = [(row, col) for row in range(0, size, 2) for col in range(size)]
+    black += [(row, size - 1 if row // 2 % 2 == 0 else 0) for row in range(1, size - 1, 2)]
+    board = backend(size=size)
+    board.setup_stones(black, [])
+    return board
+
+
+def ko_position(backend: Type[Board], size: int, ko_rule: str) -> Board:
+    # Black has just taken a ko; White retaking at (1, 1) at once is the ko violation
+    board = backend(ko_rule, size=size)
+    board.setup_stones([(0, 1), (1, 0), (2, 1)], [(1, 1), (0, 2), (2, 2), (1, 3)])
+    board.place_stone(1, 2)
+    return board
+
+
+def cycle_calls(function: Callable[..., object], arguments: List[tuple]) -> Setup:
+    cycle = itertools.cycle(arguments)
+
+    def setup() -> Callable[[], object]:
+        current = next(cycle)
+        return lambda: function(*current)
+    return setup
+
+
+def place_and_undo(board: Board, moves: List[Tuple[int, int]]) -> Setup:
+    base = len(board.history)
+    cycle = itertools.cycle(moves)
+
+    def setup() -> Callable[[], object]:
+        while len(board.history) > base:
+            board.undo()
+        point = next(cycle)
+        return lambda: board.place_stone(*point)
+    return setup
+
+
+def undo_after(board: Board, moves: List[Tuple[int, int]]) -> Setup:
+    cycle = itertools.cycle(moves)
+
+    def setup() -> Callable[[], object]:
+        board.place_stone(*next(cycle))
+        return board.undo
+    return setup
+
+
+def territory_after_move(board: Board, moves: List[Tuple[int, int]], query: Callable[[], object]) -> Setup:
+    # one move and its undo before every query, so the region cache always has work to do
+    cycle = itertools.cycle(moves)
+
+    def setup() -> Callable[[], object]:
+        board.place_stone(*next(cycle))
+        board.undo()
+        return query
+    return setup
+
+
+def suite_cases(backend: Type[Board], size: int, seed: int) -> Dict[str, Setup]:
+    # every case gets its own board, since the timed operations leave their last move behind
+    cases: Dict[str, Setup] = {}
+
+    board = midgame(backend, size, seed)
+    quiet, capturing = classify_moves(board)
+    empty = [(row, col) for row in range(size) for col in range(size) if board.board[row][col] == 0]
+    cases["place_stone/quiet"] = place_and_undo(board, quiet)
+    if capturing:
+        cases["place_stone/capture"] = place_and_undo(midgame(backend, size, seed), capturing)
+    cases["undo/quiet"] = undo_after(midgame(backend, size, seed), quiet)
+    for ko_rule in KO_RULES:
+        position = midgame(backend, size, seed, ko_rule)
+        player = position.current_player
+        cases[f"is_ko_violation/{ko_rule}"] = cycle_calls(
+            position.is_ko_violation, [(row, col, player) for row, col in empty])
+        cases[f"is_ko_violation/{ko_rule}/retake"] = cycle_calls(
+            ko_position(backend, size, ko_rule).is_ko_violation, [(1, 1, 2)])
+
+    position = midgame(backend, size, seed)
+    cases["get_territory/after_move"] = territory_after_move(position, quiet, position.get_territory)
+    cases["calculate_score/unchanged"] = cycle_calls(position.calculate_score, [()])
+    groups = {frozenset(position.get_group(row, col))
+              for row in range(size) for col in range(size) if position.board[row][col]}
+    cases["is_group_alive"] = cycle_calls(position.is_group_alive, [(set(group),) for group in groups])
+    finished = position.to_state()._replace(game_over=True)
+    cases["remove_dead_groups"] = lambda: backend.from_state(finished).remove_dead_groups
+
+    cases["place_stone/large_capture"] = place_and_undo(large_capture(backend, size), [(0, 0)])
+    cases["undo/large_capture"] = undo_after(large_capture(backend, size), [(0, 0)])
+
+    bridges = [(row, size // 2) for row in range(1, size - 1, 2)]
+    cases["place_stone/spanning_chain"] = place_and_undo(spanning_chain(backend, size), bridges)
+    cases["undo/spanning_chain"] = undo_after(spanning_chain(backend, size), bridges)
+    snake = spanning_chain(backend, size)
+    cases["get_territory/spanning_chain"] = territory_after_move(snake, bridges, snake.get_territory)
+
+    records = itertools.cycle(record_random_games(size, 10, seed))
+
+    def replay_game() -> Callable[[], object]:
+        record = next(records)
+        game = backend(size=size)
+
+        def play() -> None:
+            for point in record:
+                if point is None:
+                    game.pass_turn()
+                else:
+                    game.place_stone(*point)
+        return play
+    cases["random_game"] = replay_game
+    return cases
+
+
+def run_suite(args: argparse.Namespace) -> None:
+    results = []
+    for size in args.sizes:
+        for name in args.backends:
+            for case, setup in suite_cases(BACKENDS[name], size, args.seed).items():
+                samples = max(1, args.samples // 10) if case in ("random_game", "remove_dead_groups") else args.samples
+                result = {"case": case, "size": size, "backend": name}
+                result.update(measure(setup, samples))
+                results.append(result)
+                print(f"{size}x{size} {name:5} {case:34} {result['ops_per_sec']:12.0f} ops/s  "
+                      f"p50 {result['p50_us']:9.1f}us  p99 {result['p99_us']:9.1f}us", file=sys.stderr)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+
+
+def run_compare(args: argparse.Namespace) -> None:
+    # compares medians; a case is a regression when it got slower by more than the threshold
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = {(r["case"], r["size"], r["backend"]): r for r in json.load(file)["results"]}
+    with open(args.current, encoding="utf-8") as file:
+        current = {(r["case"], r["size"], r["backend"]): r for r in json.load(file)["results"]}
+    regressions = 0
+    for key in sorted(baseline.keys() & current.keys(), key=lambda key: (key[1], key[2], key[0])):
+        case, size, backend = key
+        ratio = current[key]["p50_us"] / baseline[key]["p50_us"] if baseline[key]["p50_us"] else 1.0
+        if ratio > 1 + args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "faster"
+        else:
+            flag = ""
+        print(f"{size}x{size} {backend:5} {case:34} {baseline[key]['p50_us']:9.1f}us -> "
+              f"{current[key]['p50_us']:9.1f}us  {ratio:5.2f}x  {flag}")
+    for key in sorted(baseline.keys() ^ current.keys()):
+        print(f"{key[1]}x{key[1]} {key[2]:5} {key[0]:34} only in {'baseline' if key in baseline else 'current'}")
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    if regressions:
+        sys.exit(1)
+
+
+def run_moves(args: argparse.Namespace) -> None:
+    for size in args.sizes:
+        records = record_random_games(size, args.games, args.seed)
+        results = {name: bench_moves(backend, size, records)
+                   for name, backend in BACKENDS.items()}
+        base = results["board"]
+        line = "  ".join(f"{name}: {rate:9.0f} moves/s ({rate / base:.2f}x)" for name, rate in results.items())
+        print(f"{size}x{size}  {line}")
+
+
+def run_bitboard(args: argparse.Namespace) -> None:
+    # the suite cases on Board and BitBoard side by side; ratio > 1 means the bitboard is faster
+    for size in args.sizes:
+        board_cases = suite_cases(Board, size, args.seed)
+        bit_cases = suite_cases(BitBoard, size, args.seed)
+        for case, setup in board_cases.items():
+            if case not in bit_cases:
+                continue
+            board = measure(setup, args.samples)["p50_us"]
+            bit = measure(bit_cases[case], args.samples)["p50_us"]
+            print(f"{size}x{size} {case:34} board {board:9.1f}us  bit {bit:9.1f}us  "
+                  f"{board / bit if bit else 1.0:5.2f}x")
+
+
+def run_parallel(args: argparse.Namespace) -> None:
+    base = None
+    for workers in range(1, args.workers + 1):
+        rate = bench_parallel(args.size, workers, args.seconds)
+        if base is None:
+            base = rate
+        print(f"{workers} worker(s): {rate:9.0f} playouts/s ({rate / base:.2f}x)")
+
+
+def run_playouts(args: argparse.Namespace) -> None:
+    table = load_table(args.patterns) if args.patterns else None
+    for size in args.sizes:
+        print(f"{size}x{size}  {bench_playouts(size, args.seconds, args.seed, table):9.0f} playouts/s")
+
+
+def run_batch(args: argparse.Namespace) -> None:
+    try:
+        rate = bench_batch(args.size, args.batch, args.steps, args.seed)
+    except ImportError as error:
+        sys.exit(str(error))
+    records = record_random_games(args.size, args.games, args.seed)
+    print(f"{args.size}x{args.size}  batch of {args.batch}: {rate:9.0f} moves/s")
+    for name, backend in BACKENDS.items():
+        loop = bench_moves(backend, args.size, records)
+        print(f"{args.size}x{args.size}  {name} loop:{' ' * max(0, 9 - len(name))} {loop:9.0f} moves/s "
+              f"(batch is {rate / loop:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks for the Go engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    moves = commands.add_parser("moves", help="moves/sec of the Board backends")
+    moves.add_argument("--sizes", type=int, nargs="+", default=[9, 13, 19])
+    moves.add_argument("--games", type=int, default=20)
+    moves.add_argument("--seed", type=int, default=0)
+    moves.set_defaults(run=run_moves)
+
+    bitboard = commands.add_parser("bitboard", help="Board against the BitBoard backend, per operation")
+    bitboard.add_argument("--sizes", type=int, nargs="+", default=[9, 13, 19])
+    bitboard.add_argument("--samples", type=int, default=300)
+    bitboard.add_argument("--seed", type=int, default=0)
+    bitboard.set_defaults(run=run_bitboard)
+
+    parallel = commands.add_parser("parallel", help="MCTS playouts/sec from 1 to N worker processes")
+    parallel.add_argument("--size", type=int, default=9)
+    parallel.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parallel.add_argument("--seconds", type=float, default=3.0)
+    parallel.set_defaults(run=run_parallel)
+
+    playouts = commands.add_parser("playouts", help="random rollouts/sec of PlayoutBoard")
+    playouts.add_argument("--sizes", type=int, nargs="+", default=[9, 13, 19])
+    playouts.add_argument("--seconds", type=float, default=3.0)
+    playouts.add_argument("--seed", type=int, default=0)
+    playouts.add_argument("--patterns", metavar="TABLE", help="compiled pattern table to guide the rollouts")
+    playouts.set_defaults(run=run_playouts)
+
+    batch = commands.add_parser("batch", help="moves/sec of the NumPy BatchBoard against Board loops")
+    batch.add_argument("--size", type=int, default=9)
+    batch.add_argument("--batch", type=int, default=1024)
+    batch.add_argument("--steps", type=int, default=500)
+    batch.add_argument("--games", type=int, default=20, help="games for the Board loop comparison")
+    batch.add_argument("--seed", type=int, default=0)
+    batch.set_defaults(run=run_batch)
+
+    suite = commands.add_parser("suite", help="rules engine hot paths, JSON with ops/sec and percentiles")
+    suite.add_argument("--sizes", type=int, nargs="+", default=[9, 13, 19])
+    suite.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    suite.add_argument("--samples", type=int, default=300)
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--output", default="-", help="JSON file, - for stdout")
+    suite.set_defaults(run=run_suite)
+
+    compare = commands.add_parser("compare", help="flag regressions between two suite results")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.20, help="allowed slowdown of the median")
+    compare.set_defaults(run=run_compare)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# bit_board.py
+from functools import lru_cache
+from typing import Tuple, Set, List, Optional, Dict, NamedTuple
+from board import Board, MoveRecord, Point, zobrist_table
+from life import RegionGraph
+from patterns import PatternCodes
+
+# Bit i of a bitboard is the point (i // width, i % width), width = size + 1: the extra
+# column of every row is a guard that is never on the board, so a shift by one cannot
+# carry a stone from the end of one row to the start of the next once the result is
+# masked. Python ints have arbitrary precision, so 19x19 needs no special casing.
+
+
+class BitGeometry(NamedTuple):
+    size: int
+    width: int
+    on_board: int  # mask of the playable points
+    coords: Tuple[Optional[Tuple[int, int]], ...]
+    zobrist: Tuple[Tuple[int, int, int], ...]
+
+
+@lru_cache(maxsize=None)
+def bit_geometry(size: int) -> BitGeometry:
+    width = size + 1
+    on_board = 0
+    coords: List[Optional[Tuple[int, int]]] = [None] * (size * width)
+    zobrist: List[Tuple[int, int, int]] = [(0, 0, 0)] * (size * width)
+    keys = zobrist_table(size)
+    for row in range(size):
+        for col in range(size):
+            index = row * width + col
+            on_board |= 1 << index
+            coords[index] = (row, col)
+            zobrist[index] = keys[(row, col)]
+    return BitGeometry(size, width, on_board, tuple(coords), tuple(zobrist))
+
+
+def neighbors_of(mask: int, width: int) -> int:
+    # every point next to the mask, guard bits included: callers and it with a board mask
+    return mask << 1 | mask >> 1 | mask << width | mask >> width
+
+
+def flood(seed: int, within: int, width: int) -> int:
+    # bit-parallel flood fill: grow one step in every direction at once until nothing changes
+    region = seed
+    while True:
+        grown = (region | region << 1 | region >> 1 | region << width | region >> width) & within
+        if grown == region:
+            return region
+        region = grown
+
+
+def bit_indices(mask: int) -> List[int]:
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+    return indices
+
+
+class BitBoard(Board):
+    # same rules and public API as Board, with the stones of each colour held in one integer.
+    # Chains are never stored: a chain is a flood fill of its colour from one stone, its
+    # liberties are the neighbours of that fill that are empty, and a capture is a mask.
+    # board.board is still kept as a list of rows for Renderer and the other callers.
+    def __init__(self, ko_rule: Optional[str] = None, dead_stones: Optional[str] = None,
+                 size: Optional[int] = None, komi: Optional[float] = None):
+        self._configure(ko_rule, dead_stones, size, komi)
+        self._geometry = bit_geometry(self.size)
+        self._masks = [0, 0, 0]  # indexed by colour; _masks[0] is unused
+        self.board: List[List[int]] = [[0] * self.size for _ in range(self.size)]
+        self.history: List[MoveRecord] = []
+        self.current_player: int = 1
+        self.consecutive_passes: int = 0
+        self.game_over: bool = False
+        self.black_captures: int = 0
+        self.white_captures: int = 0
+        self.setup: Tuple[Tuple[Point, ...], Tuple[Point, ...], int] = ((), (), 1)
+        self.hash: int = 0
+        self._seen: Dict[int, int] = {self._position_key(0, 1): 1}
+        self._life: Optional[Tuple[Tuple[int, str], RegionGraph, Set[int]]] = None  # is_group_alive cache
+        self.patterns: Optional[PatternCodes] = None
+        self._clear_regions()
+
+    def _index(self, row: int, col: int) -> int:
+        return row * self._geometry.width + col
+
+    def _put(self, index: int, color: int) -> None:
+        width = self._geometry.width
+        self._masks[color] |= 1 << index
+        self.board[index // width][index % width] = color
+        self.hash ^= self._geometry.zobrist[index][color]
+        if self.patterns is not None:
+            self.patterns.place(index + width + 1, color)
+
+    def _lift(self, mask: int, color: int) -> List[int]:
+        # take every stone of the mask off the board; returns their indices
+        width = self._geometry.width
+        zobrist = self._geometry.zobrist
+        board = self.board
+        self._masks[color] &= ~mask
+        indices = bit_indices(mask)
+        for index in indices:
+            board[index // width][index % width] = 0
+            self.hash ^= zobrist[index][color]
+        if self.patterns is not None:
+            for index in indices:
+                self.patterns.lift(index + width + 1, color)
+        return indices
+
+    def _add_stone(self, row: int, col: int, color: int) -> None:
+        self._put(self._index(row, col), color)
+
+    def _captures(self, index: int, player: int) -> int:
+        # mask of the enemy chains the move would leave without liberties
+        width = self._geometry.width
+        masks = self._masks
+        bit = 1 << index
+        enemy = masks[3 - player]
+        near = neighbors_of(bit, width) & enemy
+        if not near:
+            return 0
+        empty = self._geometry.on_board & ~(masks[1] | masks[2] | bit)
+        captured = 0
+        while near:
+            chain = flood(near & -near, enemy, width)
+            near &= ~chain
+            if not neighbors_of(chain, width) & empty:
+                captured |= chain
+        return captured
+
+    def _suicide(self, index: int, player: int) -> bool:
+        # only asked when nothing is captured
+        width = self._geometry.width
+        masks = self._masks
+        bit = 1 << index
+        empty = self._geometry.on_board & ~(masks[1] | masks[2] | bit)
+        if neighbors_of(bit, width) & empty:
+            return False
+        chain = flood(bit, masks[player] | bit, width)
+        return not neighbors_of(chain, width) & empty
+
+    def _repeats_position(self, index: int, player: int, captured: int) -> bool:
+        if self.ko_rule == "simple" and not captured:
+            return False
+
+        zobrist = self._geometry.zobrist
+        new_hash = self.hash ^ zobrist[index][player]
+        enemy = 3 - player
+        for stone in bit_indices(captured):
+            new_hash ^= zobrist[stone][enemy]
+
+        if self.ko_rule == "simple":
+            return new_hash == self.history[-1].hash
+        return self._position_key(new_hash, 3 - player) in self._seen
+
+    def is_ko_violation(self, row: int, col: int, player: int) -> bool:
+        if not self.history:
+            return False
+
+        index = self._index(row, col)
+        return self._repeats_position(index, player, self._captures(index, player))
+
+    def place_stone(self, row: int, col: int) -> bool:
+        # the checks of can_place_stone, done on the bitboards directly
+        if self.game_over or not self.is_valid_position(row, col):
+            return False
+        player = self.current_player
+        index = self._index(row, col)
+        masks = self._masks
+        if (masks[1] | masks[2]) >> index & 1:
+            return False
+        captured = self._captures(index, player)
+        if not captured and self._suicide(index, player):
+            return False
+        if self.history and self._repeats_position(index, player, captured):
+            return False
+
+        coords = self._geometry.coords
+        captured_stones = tuple(coords[stone] for stone in bit_indices(captured))
+        self.history.append(MoveRecord((row, col), player, captured_stones,
+                                       self.consecutive_passes, self.black_captures,
+                                       self.white_captures, self.hash))
+        self._put(index, player)
+        self.consecutive_passes = 0
+
+        if captured:
+            self._lift(captured, 3 - player)
+        if player == 1:
+            self.black_captures += len(captured_stones)
+        else:
+            self.white_captures += len(captured_stones)
+
+        self.current_player = 3 - player
+        self._remember_position()
+        return True
+
+    def undo(self) -> None:
+        # no chains to rebuild: lifting the stone and putting the captures back is the whole undo
+        if self.history and not self.game_over:
+            self._forget_position()
+            record = self.history.pop()
+            if record.point is not None:
+                self._lift(1 << self._index(*record.point), record.player)
+                enemy = 3 - record.player
+                for row, col in record.captured:
+                    self._put(self._index(row, col), enemy)
+            self.current_player = record.player
+            self.consecutive_passes = record.consecutive_passes
+            self.black_captures = record.black_captures
+            self.white_captures = record.white_captures
+
+    def _chain_mask(self, index: int) -> int:
+        bit = 1 << index
+        for color in (1, 2):
+            if self._masks[color] & bit:
+                return flood(bit, self._masks[color], self._geometry.width)
+        return 0
+
+    def get_group(self, row: int, col: int, board: Optional[List[List[int]]] = None) -> Set[Tuple[int, int]]:
+        if board is not None and board is not self.board:
+            return super().get_group(row, col, board)
+        if not self.is_valid_position(row, col):
+            return set()
+        coords = self._geometry.coords
+        return {coords[stone] for stone in bit_indices(self._chain_mask(self._index(row, col)))}
+
+    def has_liberties(self, group: Set[Tuple[int, int]], board: Optional[List[List[int]]] = None) -> bool:
+        if board is not None and board is not self.board:
+            return super().has_liberties(group, board)
+        mask = 0
+        for row, col in group:
+            mask |= 1 << self._index(row, col)
+        masks = self._masks
+        empty = self._geometry.on_board & ~(masks[1] | masks[2])
+        return bool(neighbors_of(mask, self._geometry.width) & empty)
+
+    def _remove_dead_chain(self, point: Tuple[int, int]) -> None:
+        index = self._index(*point)
+        self._lift(self._chain_mask(index), self.board[point[0]][point[1]])
+
+    # Territory is recomputed from the bitboards rather than maintained: every empty region
+    # is one flood fill and its owner two ands against the stone masks. The result is
+    # cached against the masks themselves, so nothing has to invalidate it.
+    def _clear_regions(self) -> None:
+        self._territory: Optional[Tuple[Tuple[int, int], int, int]] = None
+
+    def _territory_masks(self) -> Tuple[int, int]:
+        black, white = self._masks[1], self._masks[2]
+        if self._territory is None or self._territory[0] != (black, white):
+            width = self._geometry.width
+            empty = self._geometry.on_board & ~(black | white)
+            owned = [0, 0, 0, 0]
+            remaining = empty
+            while remaining:
+                region = flood(remaining & -remaining, empty, width)
+                remaining &= ~region
+                border = neighbors_of(region, width)
+                owned[(1 if border & black else 0) | (2 if border & white else 0)] |= region
+            self._territory = ((black, white), owned[1], owned[2])
+        return self._territory[1], self._territory[2]
+
+    def territory_sizes(self) -> Tuple[int, int]:
+        black, white = self._territory_masks()
+        return black.bit_count(), white.bit_count()
+
+    def get_territory(self) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+        coords = self._geometry.coords
+        black, white = self._territory_masks()
+        return ({coords[index] for index in bit_indices(black)},
+                {coords[index] for index in bit_indices(white)})
+
+    def reset(self) -> None:
+        self._masks = [0, 0, 0]
+        self.board = [[0] * self.size for _ in range(self.size)]
+        self.hash = 0
+        self.history.clear()
+        self.current_player = 1
+        self.consecutive_passes = 0
+        self.game_over = False
+        self.black_captures = 0
+        self.white_captures = 0
+        self.setup = ((), (), 1)
+        self._seen = {self._position_key(0, 1): 1}
+        if self.patterns is not None:
+            self.patterns = PatternCodes(self.size, self.patterns.diamond)
+        self._clear_regions()
@@ -1,45 +1,346 @@
-
-import copy
-from typing import Tuple, Set, List, Optional
+import random
+from functools import lru_cache
+from typing import Tuple, Set, List, Optional, Dict, NamedTuple, Iterable
 from config import Config
+from life import DEAD_STONE_RULES, RegionGraph, dead_chains
+from packed import PackedPosition, pack_position, unpack_position
+from patterns import PatternCodes, padded_index
+
+Point = Tuple[int, int]
+
+
+@lru_cache(maxsize=None)
+def neighbor_table(size: int) -> Dict[Point, Tuple[Point, ...]]:
+    # on-board neighbours of every point, computed once per board size
+    table = {}
+    for row in range(size):
+        for col in range(size):
+            table[(row, col)] = tuple((row + dr, col + dc) for dr, dc in Config.DIRECTIONS
+                                      if 0 <= row + dr < size and 0 <= col + dc < size)
+    return table
+
+
+@lru_cache(maxsize=None)
+def zobrist_table(size: int) -> Dict[Point, Tuple[int, int, int]]:
+    # random 64-bit keys per point indexed by colour; seeded so hashes agree across processes
+    rng = random.Random(f"zobrist-{size}")
+    return {(row, col): (0, rng.getrandbits(64), rng.getrandbits(64))
+            for row in range(size) for col in range(size)}
+
+
+ZOBRIST_WHITE_TO_MOVE = random.Random("zobrist-side").getrandbits(64)
+KO_RULES = ("simple", "positional", "situational")
+
+
+class MoveRecord(NamedTuple):
+    # one entry of Board.history: enough to revert a move or pass without a board snapshot
+    point: Optional[Point]  # None for a pass
+    player: int
+    captured: Tuple[Point, ...]
+    consecutive_passes: int
+    black_captures: int
+    white_captures: int
+    hash: int
+
+
+class BoardState(NamedTuple):
+    # compact snapshot of a position for sending to other processes; no move history
+    size: int
+    ko_rule: str
+    dead_stones: str
+    komi: float
+    cells: bytes  # row-major, one byte per point
+    current_player: int
+    consecutive_passes: int
+    game_over: bool
+    black_captures: int
+    white_captures: int
+    seen: Tuple[Tuple[int, int], ...]  # superko position keys and their counts
+    last_move: Optional[MoveRecord]  # kept so simple ko still applies to the next move
+
+
+class _Chain:
+    # a connected group of same-coloured stones and its liberties
+    __slots__ = ("color", "stones", "liberties")
+
+    def __init__(self, color: int, stones: Set[Point], liberties: Set[Point]):
+        self.color = color
+        self.stones = stones
+        self.liberties = liberties
+
 
 class Board:
-    def __init__(self):
-        self.board: List[List[int]] = [[0] * Config.GRID_SIZE for _ in range(Config.GRID_SIZE)]
-        self.history: List[List[List[int]]] = []
+    # size, komi and rules belong to the instance, so boards of any size can live side by side;
+    # Config only supplies the defaults. Per-size tables are shared through lru_cache.
+    def __init__(self, ko_rule: Optional[str] = None, dead_stones: Optional[str] = None,
+                 size: Optional[int] = None, komi: Optional[float] = None):
+        self._configure(ko_rule, dead_stones, size, komi)
+        size = self.size
+        self.board: List[List[int]] = [[0] * size for _ in range(size)]
+        self.history: List[MoveRecord] = []
         self.current_player: int = 1
         self.consecutive_passes: int = 0
         self.game_over: bool = False
         self.black_captures: int = 0
         self.white_captures: int = 0
+        self.setup: Tuple[Tuple[Point, ...], Tuple[Point, ...], int] = ((), (), 1)  # see setup_stones()
+        self._neighbors = neighbor_table(size)
+        self._chains: Dict[Point, _Chain] = {}
+        self._zobrist = zobrist_table(size)
+        self.hash: int = 0
+        self._seen: Dict[int, int] = {self._position_key(0, 1): 1}
+        self._life: Optional[Tuple[Tuple[int, str], RegionGraph, Set[int]]] = None  # is_group_alive cache
+        self.patterns: Optional[PatternCodes] = None  # 3x3/diamond codes, see track_patterns()
+        self._clear_regions()
+
+    def _configure(self, ko_rule: Optional[str], dead_stones: Optional[str], size: Optional[int],
+                   komi: Optional[float]) -> None:
+        # checks the settings, fills in the Config defaults; shared by every backend's __init__
+        if size is None:
+            size = Config.GRID_SIZE
+        if size < 1:
+            raise ValueError(f"Invalid board size: {size}")
+        if ko_rule is None:
+            ko_rule = Config.KO_RULE
+        if ko_rule not in KO_RULES:
+            raise ValueError(f"Unknown ko rule: {ko_rule}")
+        if dead_stones is None:
+            dead_stones = Config.DEAD_STONES
+        if dead_stones not in DEAD_STONE_RULES:
+            raise ValueError(f"Unknown dead stone rule: {dead_stones}")
+        self.size: int = size
+        self.komi: float = Config.KOMI if komi is None else komi
+        self.ko_rule: str = ko_rule
+        self.dead_stones: str = dead_stones
+
+    def track_patterns(self, diamond: bool = False) -> PatternCodes:
+        # from now on every stone placed or lifted also updates the neighbourhood codes
+        self.patterns = PatternCodes.from_board(self.board, diamond)
+        return self.patterns
+
+    def _position_key(self, position_hash: int, to_move: int) -> int:
+        # situational superko tells the same stones apart by the side to move
+        if self.ko_rule == "situational" and to_move == 2:
+            return position_hash ^ ZOBRIST_WHITE_TO_MOVE
+        return position_hash
+
+    def _remember_position(self) -> None:
+        key = self._position_key(self.hash, self.current_player)
+        self._seen[key] = self._seen.get(key, 0) + 1
+
+    def _forget_position(self) -> None:
+        key = self._position_key(self.hash, self.current_player)
+        count = self._seen[key] - 1
+        if count:
+            self._seen[key] = count
+        else:
+            del self._seen[key]
+
+    def _add_stone(self, row: int, col: int, color: int) -> _Chain:
+        # put a stone on the board and merge it into the adjacent friendly chains
+        point = (row, col)
+        self.board[row][col] = color
+        self.hash ^= self._zobrist[point][color]
+        self._changed.add(point)
+        if self.patterns is not None:
+            self.patterns.place(padded_index(self.size, row, col), color)
+        chains = self._chains
+        chain = _Chain(color, {point}, set())
+        chains[point] = chain
+        for adj in self._neighbors[point]:
+            other = chains.get(adj)
+            if other is None:
+                chain.liberties.add(adj)
+                continue
+            other.liberties.discard(point)
+            if other.color != color or other is chain:
+                continue
+            if len(other.stones) > len(chain.stones):
+                chain, other = other, chain
+            chain.stones |= other.stones
+            chain.liberties |= other.liberties
+            for stone in other.stones:
+                chains[stone] = chain
+        return chain
+
+    def _remove_chain(self, chain: _Chain) -> None:
+        # lift a whole chain (capture) and give its points back as liberties
+        chains = self._chains
+        zobrist = self._zobrist
+        color = chain.color
+        self._changed.update(chain.stones)
+        for stone in chain.stones:
+            row, col = stone
+            self.board[row][col] = 0
+            self.hash ^= zobrist[stone][color]
+            del chains[stone]
+        if self.patterns is not None:
+            for row, col in chain.stones:
+                self.patterns.lift(padded_index(self.size, row, col), color)
+        for stone in chain.stones:
+            for adj in self._neighbors[stone]:
+                other = chains.get(adj)
+                if other is not None:
+                    other.liberties.add(stone)
+
+    def _remove_stone(self, row: int, col: int) -> None:
+        # lift a single stone (undo of a move)
+        point = (row, col)
+        chains = self._chains
+        neighbors = self._neighbors
+        chain = chains[point]
+        if sum(1 for adj in neighbors[point] if chains.get(adj) is chain) <= 1:
+            # a stone with at most one friendly neighbour cannot split its chain
+            self.board[row][col] = 0
+            self.hash ^= self._zobrist[point][chain.color]
+            self._changed.add(point)
+            if self.patterns is not None:
+                self.patterns.lift(padded_index(self.size, row, col), chain.color)
+            del chains[point]
+            chain.stones.discard(point)
+            for adj in neighbors[point]:
+                other = chains.get(adj)
+                if other is not None:
+                    other.liberties.add(point)
+                elif chain.stones and not any(chains.get(n) is chain for n in neighbors[adj]):
+                    chain.liberties.discard(adj)
+            return
+        # otherwise the rest of the chain may fall apart, so only that chain is rebuilt
+        self._remove_chain(chain)
+        chain.stones.discard(point)
+        for stone in chain.stones:
+            self._add_stone(stone[0], stone[1], chain.color)
+
+    def _captured_chains(self, row: int, col: int, player: int) -> List[_Chain]:
+        # enemy chains whose last liberty is (row, col)
+        point = (row, col)
+        captured = []
+        for adj in self._neighbors[point]:
+            chain = self._chains.get(adj)
+            if (chain is not None and chain.color != player and
+                    len(chain.liberties) == 1 and point in chain.liberties and
+                    chain not in captured):
+                captured.append(chain)
+        return captured
+
+    def _is_suicide(self, row: int, col: int, player: int) -> bool:
+        point = (row, col)
+        for adj in self._neighbors[point]:
+            chain = self._chains.get(adj)
+            if chain is None:
+                return False
+            if chain.color == player:
+                if len(chain.liberties) > 1:
+                    return False
+            elif len(chain.liberties) == 1:
+                return False
+        return True
+
+    # Empty regions and their owners are cached for scoring. The stone primitives above
+    # record every point they change in self._changed, and _update_regions relabels only
+    # the regions touching those points. Region ids are the point the region was labelled
+    # from; owner is the bitwise or of the bordering colours (1 black, 2 white, 3 or 0 nobody).
+    def _clear_regions(self) -> None:
+        self._regions: Dict[Point, Tuple[List[Point], int]] = {}
+        self._region_of: Dict[Point, Point] = {}
+        self._region_sizes = [0, 0, 0, 0]  # empty points per owner
+        self._changed: Set[Point] = set(self._neighbors)
+
+    def _adjacency(self) -> Dict[Point, Tuple[Point, ...]]:
+        return self._neighbors
+
+    def _label_region(self, start: Point) -> Optional[Tuple[List[Point], int]]:
+        board = self.board
+        if board[start[0]][start[1]] != 0:
+            return None
+        neighbors = self._neighbors
+        region = [start]
+        seen = {start}
+        owner = 0
+        to_check = [start]
+        while to_check:
+            point = to_check.pop()
+            for adj in neighbors[point]:
+                value = board[adj[0]][adj[1]]
+                if value == 0:
+                    if adj not in seen:
+                        seen.add(adj)
+                        region.append(adj)
+                        to_check.append(adj)
+                else:
+                    owner |= value
+        return region, owner
+
+    def _update_regions(self) -> None:
+        changed = self._changed
+        if not changed:
+            return
+        regions = self._regions
+        region_of = self._region_of
+        sizes = self._region_sizes
+        neighbors = self._adjacency()
+        starts = list(changed)
+        for point in changed:
+            for adj in (point, *neighbors[point]):
+                region_id = region_of.get(adj)
+                if region_id is None:
+                    continue
+                points, owner = regions.pop(region_id)
+                sizes[owner] -= len(points)
+                for member in points:
+                    del region_of[member]
+                starts.extend(points)
+        changed.clear()
+        for start in starts:
+            if start in region_of:
+                continue
+            labelled = self._label_region(start)
+            if labelled is None:
+                continue
+            regions[start] = labelled
+            points, owner = labelled
+            sizes[owner] += len(points)
+            for member in points:
+                region_of[member] = start
+
+    def territory_sizes(self) -> Tuple[int, int]:
+        # (black, white) territory point counts, from the region cache
+        self._update_regions()
+        return self._region_sizes[1], self._region_sizes[2]
 
     def is_valid_position(self, row: int, col: int) -> bool:
-        return 0 <= row < Config.GRID_SIZE and 0 <= col < Config.GRID_SIZE
+        return 0 <= row < self.size and 0 <= col < self.size
 
     def is_empty(self, row: int, col: int) -> bool:
         return self.board[row][col] == 0
 
     def get_group(self, row: int, col: int, board: Optional[List[List[int]]] = None) -> Set[Tuple[int, int]]:
-        if board is None:
-            board = self.board
+        if board is None or board is self.board:
+            chain = self._chains.get((row, col))
+            return set(chain.stones) if chain is not None else set()
         visited: Set[Tuple[int, int]] = set()
         if not self.is_valid_position(row, col) or board[row][col] == 0:
             return visited
 
-        def _recurse(r: int, c: int, player: int) -> None:
-            if (not self.is_valid_position(r, c) or
-                (r, c) in visited or
-                board[r][c] != player):
-                return
-            visited.add((r, c))
-            for dr, dc in Config.DIRECTIONS:
-                _recurse(r + dr, c + dc, player)
-
-        _recurse(row, col, board[row][col])
+        # iterative flood fill for foreign boards, so large chains cannot hit the recursion limit
+        player = board[row][col]
+        to_check = [(row, col)]
+        visited.add((row, col))
+        while to_check:
+            point = to_check.pop()
+            for adj in self._neighbors[point]:
+                if adj not in visited and board[adj[0]][adj[1]] == player:
+                    visited.add(adj)
+                    to_check.append(adj)
         return visited
 
     def has_liberties(self, group: Set[Tuple[int, int]], board: Optional[List[List[int]]] = None) -> bool:
-        if board is None:
+        if board is None or board is self.board:
+            if not group:
+                return False
+            chain = self._chains.get(next(iter(group)))
+            if chain is not None and len(chain.stones) == len(group) and group <= chain.stones:
+                return bool(chain.liberties)
             board = self.board
         for row, col in group:
             for dr, dc in Config.DIRECTIONS:
@@ -78,73 +379,39 @@ class Board:
         return eyes
 
     def is_group_alive(self, group: Set[Tuple[int, int]]) -> bool:
-
-        eyes = self.get_eyes(group)
-        if len(eyes) >= 2:
-            return True
-
-
-        empty_adjacent = set()
-        for row, col in group:
-            for dr, dc in Config.DIRECTIONS:
-                new_row, new_col = row + dr, col + dc
-                if (self.is_valid_position(new_row, new_col) and
-                    self.board[new_row][new_col] == 0 and
-                    (new_row, new_col) not in empty_adjacent):
-                    empty_adjacent.add((new_row, new_col))
-
-        visited = set(group)
-        empty_groups = []
-        for row, col in empty_adjacent:
-            if (row, col) not in visited:
-                empty_group = self.get_empty_group(row, col, visited)
-                empty_groups.append(empty_group)
-                visited.update(empty_group)
-
-
-        for empty_group in empty_groups:
-            if len(empty_group) >= 4:
-                surrounded_by = self.get_surrounding_players(empty_group)
-                first_row, first_col = next(iter(group))
-                if surrounded_by == {self.board[first_row][first_col]}:
-                    return True
-
-        return False
+        # verdict of the board's dead stone rule (see life.py) for the chain of these stones
+        if not group:
+            return False
+        key = (self.hash, self.dead_stones)
+        if self._life is None or self._life[0] != key:
+            graph = RegionGraph(self.board)
+            self._life = (key, graph, DEAD_STONE_RULES[self.dead_stones](graph))
+        _, graph, dead = self._life
+        return graph.block_at(*next(iter(group))) not in dead
 
     def remove_dead_groups(self) -> None:
         if not self.game_over:
             return
-        visited = set()
-        for row in range(Config.GRID_SIZE):
-            for col in range(Config.GRID_SIZE):
-                if (row, col) not in visited and self.board[row][col] != 0:
-                    group = self.get_group(row, col)
-                    if not self.is_group_alive(group):
-                        captured_count = len(group)
-                        if self.board[row][col] == 1:
-                            self.white_captures += captured_count
-                        elif self.board[row][col] == 2:
-                            self.black_captures += captured_count
-                        for gr, gc in group:
-                            self.board[gr][gc] = 0
-                    visited.update(group)
+        # one labelling pass of all chains and empty regions decides every chain at once
+        for color, stones in dead_chains(self.board, self.dead_stones):
+            if color == 1:
+                self.white_captures += len(stones)
+            else:
+                self.black_captures += len(stones)
+            self._remove_dead_chain(stones[0])
+
+    def _remove_dead_chain(self, point: Point) -> None:
+        self._remove_chain(self._chains[point])
 
     def get_territory(self) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
-        visited = set()
+        self._update_regions()
         black_territory = set()
         white_territory = set()
-
-        for row in range(Config.GRID_SIZE):
-            for col in range(Config.GRID_SIZE):
-                if (row, col) not in visited and self.board[row][col] == 0:
-                    empty_group = self.get_empty_group(row, col, visited)
-                    surrounded_by = self.get_surrounding_players(empty_group)
-                    if surrounded_by == {1}:
-                        black_territory.update(empty_group)
-                    elif surrounded_by == {2}:
-                        white_territory.update(empty_group)
-                    visited.update(empty_group)
-
+        for points, owner in self._regions.values():
+            if owner == 1:
+                black_territory.update(points)
+            elif owner == 2:
+                white_territory.update(points)
         return black_territory, white_territory
 
     def get_empty_group(self, row: int, col: int, visited: Set[Tuple[int, int]]) -> Set[Tuple[int, int]]:
@@ -181,22 +448,19 @@ class Board:
         if not self.history:
             return False
 
-        temp_board = copy.deepcopy(self.board)
-        temp_board[row][col] = player
-        enemy = 3 - player
+        captured = self._captured_chains(row, col, player)
+        if self.ko_rule == "simple" and not captured:
+            return False
 
-        captured = False
-        for dr, dc in Config.DIRECTIONS:
-            adj_row, adj_col = row + dr, col + dc
-            if (self.is_valid_position(adj_row, adj_col) and
-                temp_board[adj_row][adj_col] == enemy):
-                group = self.get_group(adj_row, adj_col, temp_board)
-                if not self.has_liberties(group, temp_board):
-                    captured = True
-                    for gr, gc in group:
-                        temp_board[gr][gc] = 0
+        # hash of the position the move would create, without touching the board
+        new_hash = self.hash ^ self._zobrist[(row, col)][player]
+        for chain in captured:
+            for stone in chain.stones:
+                new_hash ^= self._zobrist[stone][chain.color]
 
-        return captured and temp_board == self.history[-1]
+        if self.ko_rule == "simple":
+            return new_hash == self.history[-1].hash
+        return self._position_key(new_hash, 3 - player) in self._seen
 
     def can_place_stone(self, row: int, col: int) -> bool:
         return (self.is_valid_position(row, col) and
@@ -208,65 +472,169 @@ class Board:
         if not self.can_place_stone(row, col):
             return False
 
-        self.history.append(copy.deepcopy(self.board))
-        self.board[row][col] = self.current_player
-        self.consecutive_passes = 0
-        enemy = 3 - self.current_player
-
-        captured = False
-        for dr, dc in Config.DIRECTIONS:
-            adj_row, adj_col = row + dr, col + dc
-            if (self.is_valid_position(adj_row, adj_col) and
-                self.board[adj_row][adj_col] == enemy):
-                group = self.get_group(adj_row, adj_col)
-                if not self.has_liberties(group):
-                    captured = True
-                    captured_count = len(group)
-                    if self.current_player == 1:
-                        self.black_captures += captured_count
-                    else:
-                        self.white_captures += captured_count
-                    for gr, gc in group:
-                        self.board[gr][gc] = 0
-
-        group = self.get_group(row, col)
-        if not self.has_liberties(group):
-            self.board[row][col] = 0
-            self.history.pop()
+        if self._is_suicide(row, col, self.current_player):
             return False
 
+        captured = self._captured_chains(row, col, self.current_player)
+        captured_stones = tuple(stone for chain in captured for stone in chain.stones)
+        self.history.append(MoveRecord((row, col), self.current_player, captured_stones,
+                                       self.consecutive_passes, self.black_captures,
+                                       self.white_captures, self.hash))
+        self._add_stone(row, col, self.current_player)
+        self.consecutive_passes = 0
+
+        for chain in captured:
+            self._remove_chain(chain)
+        if self.current_player == 1:
+            self.black_captures += len(captured_stones)
+        else:
+            self.white_captures += len(captured_stones)
+
         self.current_player = 3 - self.current_player
+        self._remember_position()
         return True
 
     def pass_turn(self) -> None:
         if self.game_over:
             return
-        self.history.append(copy.deepcopy(self.board))
+        self.history.append(MoveRecord(None, self.current_player, (), self.consecutive_passes,
+                                       self.black_captures, self.white_captures, self.hash))
         self.consecutive_passes += 1
         if self.consecutive_passes >= 2:
             self.game_over = True
             self.remove_dead_groups()
         self.current_player = 3 - self.current_player
+        self._remember_position()
 
     def undo(self) -> None:
         if self.history and not self.game_over:
-            self.board = copy.deepcopy(self.history.pop())
-            self.current_player = 3 - self.current_player
-            self.consecutive_passes = max(0, self.consecutive_passes - 1)
+            self._forget_position()
+            record = self.history.pop()
+            if record.point is not None:
+                self._remove_stone(*record.point)
+                enemy = 3 - record.player
+                for row, col in record.captured:
+                    self._add_stone(row, col, enemy)
+            self.current_player = record.player
+            self.consecutive_passes = record.consecutive_passes
+            self.black_captures = record.black_captures
+            self.white_captures = record.white_captures
+
+    def setup_stones(self, black: Iterable[Point], white: Iterable[Point], to_move: int = 1) -> None:
+        # handicap or SGF setup (AB/AW/PL): stones placed without moves, before the first move
+        if self.history:
+            raise ValueError("Setup stones can only be placed before the first move")
+        stones = [(point, 1) for point in black] + [(point, 2) for point in white]
+        for (row, col), _ in stones:
+            if not self.is_valid_position(row, col):
+                raise ValueError(f"Setup stone ({row}, {col}) is off the board")
+        self._forget_position()
+        placed: Tuple[List[Point], List[Point]] = (list(self.setup[0]), list(self.setup[1]))
+        for (row, col), color in stones:
+            if self.board[row][col] == 0:
+                self._add_stone(row, col, color)
+                placed[color - 1].append((row, col))
+        self.current_player = to_move
+        # kept so an export (sgf.board_to_sgf) can write the same AB/AW/PL back
+        self.setup = (tuple(placed[0]), tuple(placed[1]), to_move)
+        self._remember_position()
+
+    def to_state(self) -> BoardState:
+        return BoardState(self.size, self.ko_rule, self.dead_stones, self.komi,
+                          bytes(value for row in self.board for value in row),
+                          self.current_player, self.consecutive_passes, self.game_over,
+                          self.black_captures, self.white_captures, tuple(self._seen.items()),
+                          self.history[-1] if self.history else None)
+
+    @classmethod
+    def from_state(cls, state: BoardState) -> "Board":
+        board = cls(state.ko_rule, state.dead_stones, state.size, state.komi)
+        for index, value in enumerate(state.cells):
+            if value:
+                board._add_stone(*divmod(index, state.size), value)
+        board.current_player = state.current_player
+        board.consecutive_passes = state.consecutive_passes
+        board.game_over = state.game_over
+        board.black_captures = state.black_captures
+        board.white_captures = state.white_captures
+        board._seen = dict(state.seen)
+        if state.last_move is not None:
+            board.history.append(state.last_move)
+        return board
+
+    def ko_point(self) -> Optional[Point]:
+        # the point the side to move may not retake at once, None when the last move took no ko
+        if not self.history or len(self.history[-1].captured) != 1 or self.game_over:
+            return None
+        row, col = self.history[-1].captured[0]
+        return (row, col) if self.is_ko_violation(row, col, self.current_player) else None
+
+    def to_packed(self) -> bytes:
+        # compact record of the position (see packed.py); no move history
+        return pack_position(PackedPosition(
+            self.size, bytes(value for row in self.board for value in row), self.current_player,
+            self.ko_point(), self.black_captures, self.white_captures, self.komi,
+            self.consecutive_passes, self.game_over))
+
+    @classmethod
+    def from_packed(cls, data: bytes, ko_rule: Optional[str] = None,
+                    dead_stones: Optional[str] = None) -> "Board":
+        position = unpack_position(data)
+        board = cls(ko_rule, dead_stones, position.size, position.komi)
+        for index, value in enumerate(position.cells):
+            if value:
+                board._add_stone(*divmod(index, position.size), value)
+        board.current_player = position.to_move
+        board.consecutive_passes = position.consecutive_passes
+        board.game_over = position.game_over
+        board.black_captures = position.black_captures
+        board.white_captures = position.white_captures
+        board._seen = {board._position_key(board.hash, board.current_player): 1}
+        if position.ko is not None:
+            board._restore_ko(position.ko)
+        return board
+
+    def _restore_ko(self, ko: Point) -> None:
+        # rebuild the capturing move as the last history entry, so every ko rule forbids the retake
+        player = 3 - self.current_player
+        neighbors = neighbor_table(self.size)
+        for point in neighbors[ko]:
+            if (self.board[point[0]][point[1]] == player and self.get_group(*point) == {point} and
+                    all(self.board[row][col] for row, col in neighbors[point] if (row, col) != ko)):
+                break
+        else:
+            return
+        black, white = self.black_captures, self.white_captures
+        if player == 1:
+            black -= 1
+        else:
+            white -= 1
+        zobrist = zobrist_table(self.size)
+        previous = self.hash ^ zobrist[point][player] ^ zobrist[ko][self.current_player]
+        self.history.append(MoveRecord(point, player, (ko,), 0, black, white, previous))
+        key = self._position_key(previous, player)
+        self._seen[key] = self._seen.get(key, 0) + 1
 
     def reset(self) -> None:
-        self.board = [[0] * Config.GRID_SIZE for _ in range(Config.GRID_SIZE)]
+        self.board = [[0] * self.size for _ in range(self.size)]
+        self._chains = {}
+        self.hash = 0
         self.history.clear()
         self.current_player = 1
         self.consecutive_passes = 0
         self.game_over = False
         self.black_captures = 0
         self.white_captures = 0
+        self.setup = ((), (), 1)
+        self._seen = {self._position_key(0, 1): 1}
+        if self.patterns is not None:
+            self.patterns = PatternCodes(self.size, self.patterns.diamond)
+        self._clear_regions()
 
     def calculate_score(self) -> Tuple[int, int]:
-        black_territory, white_territory = self.get_territory()
-        black_score = self.black_captures + len(black_territory)
-        white_score = self.white_captures + len(white_territory) + Config.KOMI
+        black_territory, white_territory = self.territory_sizes()
+        black_score = self.black_captures + black_territory
+        white_score = self.white_captures + white_territory + self.komi
         return black_score, white_score
 
     def get_winner(self) -> str:
@@ -0,0 +1,306 @@
+# book.py
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from board import Board, Point, ZOBRIST_WHITE_TO_MOVE, zobrist_table
+from patterns import SYMMETRIES
+from sgf import SGFGame, iter_games
+
+# Opening book: how often each move was played from a position, and how those games ended.
+# Positions are keyed by a canonical hash, the smallest of the Zobrist hashes of the 8
+# rotations and reflections of the board, so all of them share one entry; moves are stored
+# as seen from the symmetry that gives that hash. The table is a sorted array of fixed-size
+# records, mapped on first use and searched by bisection, so a lookup reads a few records.
+
+DEFAULT_BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+DEFAULT_DEPTH = 20  # moves of every game that go into the book
+SOURCES_SUFFIX = ".games"  # the games already merged, one SGF source per line
+MAGIC = b"GOBK"
+VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, version, entries
+ENTRY = struct.Struct("<QHII")  # canonical key, canonical move (row * size + col), games, wins in half points
+
+Stats = Dict[Tuple[int, int], List[int]]  # (key, move) -> [games, wins in half points]
+
+
+class Symmetries:
+    # for each of the 8 symmetries: where every point goes, where it comes from, and the
+    # Zobrist keys of the board seen through it
+    __slots__ = ("points", "inverse", "keys", "size_key")
+
+    def __init__(self, size: int):
+        last = size - 1
+        zobrist = zobrist_table(size)
+        points, inverse, keys = [], [], []
+        for symmetry in SYMMETRIES:
+            # the symmetries act on offsets from the centre, doubled to stay integral
+            forward = []
+            for index in range(size * size):
+                row, col = symmetry(2 * (index // size) - last, 2 * (index % size) - last)
+                forward.append((row + last) // 2 * size + (col + last) // 2)
+            backward = [0] * (size * size)
+            for index, target in enumerate(forward):
+                backward[target] = index
+            points.append(tuple(forward))
+            inverse.append(tuple(backward))
+            keys.append(tuple(zobrist[divmod(target, size)] for target in forward))
+        self.points = tuple(points)
+        self.inverse = tuple(inverse)
+        self.keys = tuple(keys)
+        # the empty board hashes to 0 on every size, so the size goes into the key as well
+        self.size_key = random.Random(f"book-size-{size}").getrandbits(64)
+
+
+@lru_cache(maxsize=None)
+def symmetries(size: int) -> Symmetries:
+    return Symmetries(size)
+
+
+def canonical(board: Board) -> Tuple[int, Tuple[int, ...]]:
+    # (canonical key, the symmetries that map the board onto the canonical position)
+    size = board.size
+    tables = symmetries(size)
+    stones = [(row * size + col, value) for row, line in enumerate(board.board)
+              for col, value in enumerate(line) if value]
+    hashes = []
+    for keys in tables.keys:
+        position_hash = 0
+        for index, value in stones:
+            position_hash ^= keys[index][value]
+        hashes.append(position_hash)
+    best = min(hashes)
+    key = best ^ tables.size_key
+    if board.current_player == 2:
+        key ^= ZOBRIST_WHITE_TO_MOVE
+    return key, tuple(number for number, position_hash in enumerate(hashes) if position_hash == best)
+
+
+def canonical_move(size: int, point: Point, found: Tuple[int, ...]) -> int:
+    # on a symmetric position equivalent moves collapse onto the smallest of their images
+    index = point[0] * size + point[1]
+    points = symmetries(size).points
+    return min(points[number][index] for number in found)
+
+
+def game_winner(game: SGFGame) -> Optional[int]:
+    # 1 or 2 from the RE property, 0 for a draw, None when unknown
+    result = game.properties.get("RE", "").strip().upper()
+    if result[:2] in ("B+", "W+"):
+        return 1 if result[0] == "B" else 2
+    if result in ("0", "DRAW", "JIGO"):
+        return 0
+    return None
+
+
+def add_game(stats: Stats, game: SGFGame, depth: int = DEFAULT_DEPTH) -> int:
+    # the first `depth` moves of the game's main line; returns the number of moves added.
+    # Stops at a pass, an out-of-turn move or an illegal one. Unknown results count as draws.
+    board = Board("simple", size=game.size, komi=game.komi)
+    if game.black or game.white or game.first_player != 1:
+        try:
+            board.setup_stones(game.black, game.white, game.first_player)
+        except ValueError:
+            return 0  # setup stones off the board
+    winner = game_winner(game)
+    added = 0
+    for color, point in game.moves[:depth]:
+        if point is None or color != board.current_player:
+            break
+        key, found = canonical(board)
+        move = canonical_move(game.size, point, found)
+        if not board.place_stone(*point):
+            break
+        entry = stats.setdefault((key, move), [0, 0])
+        entry[0] += 1
+        entry[1] += 2 if winner == color else 0 if winner else 1
+        added += 1
+    return added
+
+
+def save_book(stats: Stats, path: str) -> None:
+    # written beside the old book and renamed over it, so readers never see half a table
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, len(stats)))
+        for (key, move), (games, wins) in sorted(stats.items()):
+            output.write(ENTRY.pack(key, move, games, wins))
+    os.replace(temporary, path)
+
+
+class OpeningBook:
+    def __init__(self, path: str = DEFAULT_BOOK, min_games: int = 1):
+        self.path = path
+        self.min_games = min_games  # moves played fewer times than this are not suggested
+        self._map: Optional[mmap.mmap] = None
+        self._entries = 0
+
+    def _mapped(self) -> mmap.mmap:
+        if self._map is None:
+            with open(self.path, "rb") as source:
+                mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, entries = HEADER.unpack_from(mapped)
+            if magic != MAGIC:
+                mapped.close()
+                raise ValueError(f"{self.path} is not an opening book")
+            if version != VERSION:
+                mapped.close()
+                raise ValueError(f"{self.path} has book version {version}, expected {VERSION}")
+            self._map, self._entries = mapped, entries
+        return self._map
+
+    def __len__(self) -> int:
+        self._mapped()
+        return self._entries
+
+    def entries(self) -> Iterator[Tuple[int, int, int, int]]:
+        # every (key, move, games, wins) record, in key order
+        mapped = self._mapped()
+        for number in range(self._entries):
+            yield ENTRY.unpack_from(mapped, HEADER.size + number * ENTRY.size)
+
+    def _find(self, key: int) -> List[Tuple[int, int, int]]:
+        mapped = self._mapped()
+        low, high = 0, self._entries
+        while low < high:
+            middle = (low + high) // 2
+            if ENTRY.unpack_from(mapped, HEADER.size + middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        for number in range(low, self._entries):
+            entry_key, move, games, wins = ENTRY.unpack_from(mapped, HEADER.size + number * ENTRY.size)
+            if entry_key != key:
+                break
+            found.append((move, games, wins))
+        return found
+
+    def moves(self, board: Board) -> List[Tuple[Point, int, float]]:
+        # (point, games, win rate of the side to move) for the legal book moves, most played first
+        if board.game_over:
+            return []
+        key, found = canonical(board)
+        size = board.size
+        inverse = symmetries(size).inverse[found[0]]
+        moves = []
+        for move, games, wins in self._find(key):
+            if move >= size * size:
+                continue
+            point = divmod(inverse[move], size)
+            if games >= self.min_games and board.can_place_stone(*point):
+                moves.append((point, games, wins / (2 * games)))
+        moves.sort(key=lambda move: (-move[1], -move[2]))
+        return moves
+
+    def best_move(self, board: Board, rng: Optional[random.Random] = None) -> Optional[Point]:
+        # the most played move, or with rng one drawn in proportion to how often it was played;
+        # None when the position is not in the book
+        moves = self.moves(board)
+        if not moves:
+            return None
+        if rng is None:
+            return moves[0][0]
+        return rng.choices([point for point, _, _ in moves], [games for _, games, _ in moves])[0]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+@lru_cache(maxsize=None)
+def load_book(path: str = DEFAULT_BOOK) -> OpeningBook:
+    # cached per path, like the pattern tables; nothing is read until the first lookup
+    return OpeningBook(path)
+
+
+def read_sources(path: str) -> Set[str]:
+    if not os.path.exists(path + SOURCES_SUFFIX):
+        return set()
+    with open(path + SOURCES_SUFFIX, encoding="utf-8") as sources:
+        return {line.rstrip("\n") for line in sources if line.strip()}
+
+
+def source_id(game: SGFGame) -> str:
+    # the game's file as an absolute path and its index in the file
+    name, _, number = game.source.rpartition("#")
+    return f"{os.path.abspath(name)}#{number}"
+
+
+def merge_games(path: str, games: Iterable[SGFGame], depth: int = DEFAULT_DEPTH) -> Tuple[int, int]:
+    # adds the games not merged before to the book at path (created if missing);
+    # returns (games merged, moves added)
+    stats: Stats = {}
+    if os.path.exists(path):
+        book = OpeningBook(path)
+        for key, move, games_played, wins in book.entries():
+            stats[(key, move)] = [games_played, wins]
+        book.close()
+    merged = read_sources(path)
+    new_sources = []
+    moves = 0
+    for game in games:
+        source = source_id(game)
+        if source in merged:
+            continue
+        merged.add(source)
+        new_sources.append(source)
+        moves += add_game(stats, game, depth)
+    save_book(stats, path)
+    with open(path + SOURCES_SUFFIX, "a", encoding="utf-8") as sources:
+        sources.writelines(source + "\n" for source in new_sources)
+    return len(new_sources), moves
+
+
+def run_build(args: argparse.Namespace) -> None:
+    try:
+        games, moves = merge_games(args.book, iter_games(args.sgf), args.moves)
+        entries = len(OpeningBook(args.book))
+    except (OSError, ValueError) as error:
+        sys.exit(str(error))
+    print(f"{games} new games, {moves} moves merged into {args.book} ({entries} entries)")
+
+
+def run_show(args: argparse.Namespace) -> None:
+    board = Board(size=args.size)
+    for move in args.moves:
+        row, col = (int(value) for value in move.split(","))
+        if not board.place_stone(row, col):
+            sys.exit(f"Illegal move {move}")
+    try:
+        moves = OpeningBook(args.book).moves(board)
+    except (OSError, ValueError) as error:
+        sys.exit(str(error))
+    if not moves:
+        print("position not in the book")
+    for point, games, rate in moves:
+        print(f"{point}: {games} games, {rate:.1%} won")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Opening book built from SGF games")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="merge the games not yet in the book into it")
+    build.add_argument("sgf", nargs="+", help="SGF files or directories, e.g. from selfplay.py --sgf")
+    build.add_argument("--book", default=DEFAULT_BOOK)
+    build.add_argument("--moves", type=int, default=DEFAULT_DEPTH, help="moves per game to record")
+    build.set_defaults(run=run_build)
+
+    show = commands.add_parser("show", help="book moves after the given moves")
+    show.add_argument("moves", nargs="*", metavar="ROW,COL")
+    show.add_argument("--book", default=DEFAULT_BOOK)
+    show.add_argument("--size", type=int, default=19)
+    show.set_defaults(run=run_show)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,30 @@
 import pygame
+import assets
 from config import Config
 from typing import Optional
 
 
 class Button:
+    # built once per menu: the rect and the rendered label are kept, so drawing is two rects
+    # and a blit. Clicks come from the event queue, which sees every press exactly once.
     def __init__(self, screen: pygame.Surface, x, y, text):
-        self.button_rect = None
+        self.screen = screen
         self.x = x
         self.y = y
-        self.screen = screen
         self.text = text
-        self.clicked = False
-
-    def draw_button(self) -> None:
-        self.button_rect = pygame.draw.rect(self.screen, Config.WHITE,
-                                            (self.x, self.y, Config.BUTTON_WIDTH, Config.BUTTON_HEIGHT))
-        pygame.draw.rect(self.screen, Config.BLACK,
-                         (self.x, self.y, Config.BUTTON_WIDTH, Config.BUTTON_HEIGHT), 3)
-
-        font = pygame.font.Font(None, 30)
-        num = font.render(self.text, True, Config.BLACK)
-        num_surface = num.get_rect(center=(self.x + Config.BUTTON_WIDTH // 2, self.y + Config.BUTTON_HEIGHT // 2))
-        self.screen.blit(num, num_surface)
+        self.button_rect = pygame.Rect(x, y, Config.BUTTON_WIDTH, Config.BUTTON_HEIGHT)
+        self.label = assets.text(text, 30, Config.BLACK)
+        self.label_rect = self.label.get_rect(center=self.button_rect.center)
 
-    def get_difficulty(self) -> Optional[int]:
-        pos = pygame.mouse.get_pos()
-        if self.button_rect.collidepoint(pos):
-            if pygame.mouse.get_pressed()[0] is True and not self.clicked:
-                self.clicked = True
-                return int(self.text)
+    def draw_button(self, surface: Optional[pygame.Surface] = None) -> None:
+        surface = self.screen if surface is None else surface
+        pygame.draw.rect(surface, Config.WHITE, self.button_rect)
+        pygame.draw.rect(surface, Config.BLACK, self.button_rect, 3)
+        surface.blit(self.label, self.label_rect)
 
-        if not pygame.mouse.get_pressed()[0]:
-            self.clicked = False
+    def get_difficulty(self, event: pygame.event.Event) -> Optional[int]:
+        # the difficulty on this button if the event is a left click on it
+        if (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and
+                self.button_rect.collidepoint(event.pos)):
+            return int(self.text)
+        return None
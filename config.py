@@ -1,13 +1,12 @@
 
 class Config:
-    GRID_SIZE = 19
+    GRID_SIZE = 19  # default board size; every Board, Renderer and search takes its own
     CELL_SIZE = 30
     BOARD_SIZE = GRID_SIZE * CELL_SIZE
     SCORE_HEIGHT = 50
     WINDOW_WIDTH = BOARD_SIZE
     WINDOW_HEIGHT = BOARD_SIZE + SCORE_HEIGHT
 
-    STONE_RADIUS = CELL_SIZE // 2 - 2
     DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
 
     WHITE = (255, 255, 255)
@@ -15,7 +14,18 @@ class Config:
     BOARD_COLOR = (199, 164, 108)
     GRAY = (150, 150, 150)
     BACKGROUND_COLOR = (200, 200, 200)
-    KOMI = 6.5  # Traditional komi for White ( + KOMI score in white to cal who win game)
+    KOMI = 6.5  # Traditional komi for White ( + KOMI score in white to cal who win game), default for new boards
+    KO_RULE = "simple"  # "simple", "positional" or "situational" (superko)
+    DEAD_STONES = "estimate"  # end of game: "none", "benson" (certainly dead only) or "estimate"
+    AI_PLAYER = 2  # the computer plays White, the human plays Black
+    AI_WORKERS = 1  # > 1 runs the MCTS search in that many processes
+    AI_TABLE_ENTRIES = 200_000  # transposition table size for the single-process search
+    AI_PONDER = True  # keep searching on the human's time and reuse the tree afterwards
+    AI_PATTERNS = None  # compiled pattern table (e.g. "patterns.bin") to guide the rollouts
+    AI_BOOK = None  # opening book (e.g. "book.bin", see book.py) played before any search
+    PROFILE = False  # instrument the rules engine from the start (the I key toggles it in game)
+    PROFILE_DUMP = None  # path for periodic profiling snapshots, .csv or JSON lines
+    PROFILE_DUMP_INTERVAL = 5.0  # seconds
 
     BUTTON_WIDTH = 80
     BUTTON_HEIGHT = 50
@@ -0,0 +1,396 @@
+# fast_board.py
+from functools import lru_cache
+from typing import Tuple, Set, List, Optional, Dict, NamedTuple
+from board import Board, MoveRecord, Point, zobrist_table
+from life import RegionGraph
+from patterns import PatternCodes
+
+EMPTY, BLACK, WHITE, BORDER = 0, 1, 2, 3
+
+
+class Geometry(NamedTuple):
+    # flat padded layout: one sentinel column per row plus a sentinel row above and below
+    size: int
+    width: int
+    total: int
+    points: Tuple[int, ...]
+    neighbors: Tuple[Tuple[int, ...], ...]
+    coords: Tuple[Optional[Tuple[int, int]], ...]
+    zobrist: Tuple[Tuple[int, int, int], ...]
+
+
+@lru_cache(maxsize=None)
+def padded_geometry(size: int) -> Geometry:
+    width = size + 1
+    total = (size + 2) * width
+    points = tuple((row + 1) * width + col + 1 for row in range(size) for col in range(size))
+    neighbors: List[Tuple[int, ...]] = [()] * total
+    coords: List[Optional[Tuple[int, int]]] = [None] * total
+    zobrist: List[Tuple[int, int, int]] = [(0, 0, 0)] * total
+    keys = zobrist_table(size)
+    for index in points:
+        row, col = divmod(index, width)
+        coords[index] = (row - 1, col - 1)
+        neighbors[index] = (index - width, index - 1, index + 1, index + width)
+        zobrist[index] = keys[(row - 1, col - 1)]
+    return Geometry(size, width, total, points, tuple(neighbors), tuple(coords), tuple(zobrist))
+
+
+class FastBoard(Board):
+    # same rules and public API as Board, stored as a flat bytearray with a sentinel border.
+    # board.board is a list of live memoryview rows over that array, so Renderer and other
+    # callers that index board[row][col] keep working.
+    def __init__(self, ko_rule: Optional[str] = None, dead_stones: Optional[str] = None,
+                 size: Optional[int] = None, komi: Optional[float] = None):
+        self._configure(ko_rule, dead_stones, size, komi)
+        self._geometry = geometry = padded_geometry(self.size)
+        self._cells = bytearray([BORDER]) * geometry.total
+        for index in geometry.points:
+            self._cells[index] = EMPTY
+        view = memoryview(self._cells)
+        self.board = [view[(row + 1) * geometry.width + 1:(row + 1) * geometry.width + 1 + geometry.size]
+                      for row in range(geometry.size)]
+        self.history: List[MoveRecord] = []
+        self.current_player: int = 1
+        self.consecutive_passes: int = 0
+        self.game_over: bool = False
+        self.black_captures: int = 0
+        self.white_captures: int = 0
+        self.setup: Tuple[Tuple[Point, ...], Tuple[Point, ...], int] = ((), (), 1)
+        # chain id of every point is the index of its head stone; 0 (a border cell) means no chain
+        self._chain_of = [0] * geometry.total
+        self._stones: Dict[int, List[int]] = {}
+        self._libs: Dict[int, Set[int]] = {}
+        self.hash: int = 0
+        self._seen: Dict[int, int] = {self._position_key(0, 1): 1}
+        self._life: Optional[Tuple[Tuple[int, str], RegionGraph, Set[int]]] = None  # is_group_alive cache
+        self.patterns: Optional[PatternCodes] = None  # indexed like _cells
+        self._clear_regions()
+
+    def _index(self, row: int, col: int) -> int:
+        return (row + 1) * self._geometry.width + col + 1
+
+    def _put(self, index: int, color: int) -> int:
+        cells = self._cells
+        chain_of = self._chain_of
+        libs_of = self._libs
+        cells[index] = color
+        self.hash ^= self._geometry.zobrist[index][color]
+        self._changed.add(index)
+        if self.patterns is not None:
+            self.patterns.place(index, color)
+        chain_of[index] = index
+        self._stones[index] = [index]
+        libs = libs_of[index] = set()
+        head = index
+        for adj in self._geometry.neighbors[index]:
+            value = cells[adj]
+            if value == EMPTY:
+                libs.add(adj)
+            elif value != BORDER:
+                libs_of[chain_of[adj]].discard(index)
+        for adj in self._geometry.neighbors[index]:
+            if cells[adj] == color and chain_of[adj] != head:
+                head = self._merge(head, chain_of[adj])
+        return head
+
+    def _add_stone(self, row: int, col: int, color: int) -> int:
+        return self._put(self._index(row, col), color)
+
+    def _merge(self, first: int, second: int) -> int:
+        stones = self._stones
+        if len(stones[first]) < len(stones[second]):
+            first, second = second, first
+        chain_of = self._chain_of
+        for stone in stones[second]:
+            chain_of[stone] = first
+        stones[first].extend(stones.pop(second))
+        self._libs[first] |= self._libs.pop(second)
+        return first
+
+    def _lift_chain(self, head: int) -> List[int]:
+        cells = self._cells
+        chain_of = self._chain_of
+        libs_of = self._libs
+        zobrist = self._geometry.zobrist
+        neighbors = self._geometry.neighbors
+        stones = self._stones.pop(head)
+        del libs_of[head]
+        color = cells[head]
+        self._changed.update(stones)
+        for stone in stones:
+            cells[stone] = EMPTY
+            chain_of[stone] = 0
+            self.hash ^= zobrist[stone][color]
+        if self.patterns is not None:
+            for stone in stones:
+                self.patterns.lift(stone, color)
+        for stone in stones:
+            for adj in neighbors[stone]:
+                value = cells[adj]
+                if value == BLACK or value == WHITE:
+                    libs_of[chain_of[adj]].add(stone)
+        return stones
+
+    def _lift_stone(self, index: int) -> None:
+        # undo of a move: lift a single stone
+        cells = self._cells
+        chain_of = self._chain_of
+        libs_of = self._libs
+        neighbors = self._geometry.neighbors
+        head = chain_of[index]
+        color = cells[index]
+        if sum(1 for adj in neighbors[index] if chain_of[adj] == head) > 1:
+            # the rest of the chain may fall apart, so only that chain is rebuilt
+            for stone in self._lift_chain(head):
+                if stone != index:
+                    self._put(stone, color)
+            return
+        stones = self._stones[head]
+        if len(stones) == 1:
+            self._lift_chain(head)
+            return
+        # a stone with at most one friendly neighbour cannot split its chain
+        stones.remove(index)
+        cells[index] = EMPTY
+        chain_of[index] = 0
+        self.hash ^= self._geometry.zobrist[index][color]
+        self._changed.add(index)
+        if self.patterns is not None:
+            self.patterns.lift(index, color)
+        if head == index:
+            # the chain is keyed by its head, so it moves to another of its stones
+            head = stones[0]
+            for stone in stones:
+                chain_of[stone] = head
+            self._stones[head] = self._stones.pop(index)
+            libs_of[head] = libs_of.pop(index)
+        libs = libs_of[head]
+        for adj in neighbors[index]:
+            value = cells[adj]
+            if value == BLACK or value == WHITE:
+                libs_of[chain_of[adj]].add(index)
+            elif value == EMPTY and not any(chain_of[n] == head for n in neighbors[adj]):
+                libs.discard(adj)
+
+    def _captured_heads(self, index: int, player: int) -> List[int]:
+        cells = self._cells
+        enemy = 3 - player
+        heads = []
+        for adj in self._geometry.neighbors[index]:
+            if cells[adj] == enemy:
+                head = self._chain_of[adj]
+                libs = self._libs[head]
+                if len(libs) == 1 and head not in heads:
+                    heads.append(head)
+        return heads
+
+    def _suicide(self, index: int, player: int) -> bool:
+        cells = self._cells
+        for adj in self._geometry.neighbors[index]:
+            value = cells[adj]
+            if value == EMPTY:
+                return False
+            if value == BORDER:
+                continue
+            liberties = len(self._libs[self._chain_of[adj]])
+            if value == player:
+                if liberties > 1:
+                    return False
+            elif liberties == 1:
+                return False
+        return True
+
+    def get_group(self, row: int, col: int, board: Optional[List[List[int]]] = None) -> Set[Tuple[int, int]]:
+        if board is not None and board is not self.board:
+            return super().get_group(row, col, board)
+        if not self.is_valid_position(row, col):
+            return set()
+        head = self._chain_of[self._index(row, col)]
+        if not head:
+            return set()
+        coords = self._geometry.coords
+        return {coords[stone] for stone in self._stones[head]}
+
+    def has_liberties(self, group: Set[Tuple[int, int]], board: Optional[List[List[int]]] = None) -> bool:
+        if board is not None and board is not self.board:
+            return super().has_liberties(group, board)
+        if not group:
+            return False
+        cells = self._cells
+        neighbors = self._geometry.neighbors
+        first = next(iter(group))
+        head = self._chain_of[self._index(*first)]
+        if (head and len(self._stones[head]) == len(group) and
+                all(self._chain_of[self._index(row, col)] == head for row, col in group)):
+            return bool(self._libs[head])
+        for row, col in group:
+            for adj in neighbors[self._index(row, col)]:
+                if cells[adj] == EMPTY:
+                    return True
+        return False
+
+    def get_empty_group(self, row: int, col: int, visited: Set[Tuple[int, int]]) -> Set[Tuple[int, int]]:
+        group: Set[Tuple[int, int]] = set()
+        if not self.is_valid_position(row, col) or self.board[row][col] != 0 or (row, col) in visited:
+            return group
+        cells = self._cells
+        neighbors = self._geometry.neighbors
+        coords = self._geometry.coords
+        to_check = [self._index(row, col)]
+        while to_check:
+            index = to_check.pop()
+            point = coords[index]
+            if point in visited:
+                continue
+            group.add(point)
+            visited.add(point)
+            for adj in neighbors[index]:
+                if cells[adj] == EMPTY and coords[adj] not in visited:
+                    to_check.append(adj)
+        return group
+
+    def get_surrounding_players(self, group: Set[Tuple[int, int]]) -> Set[int]:
+        cells = self._cells
+        neighbors = self._geometry.neighbors
+        surrounding = set()
+        for row, col in group:
+            for adj in neighbors[self._index(row, col)]:
+                value = cells[adj]
+                if value == BLACK or value == WHITE:
+                    surrounding.add(value)
+        return surrounding
+
+    def _clear_regions(self) -> None:
+        # same region cache as Board, keyed by flat index
+        self._regions: Dict[int, Tuple[List[int], int]] = {}
+        self._region_of: Dict[int, int] = {}
+        self._region_sizes = [0, 0, 0, 0]
+        self._changed: Set[int] = set(self._geometry.points)
+
+    def _adjacency(self) -> Tuple[Tuple[int, ...], ...]:
+        return self._geometry.neighbors
+
+    def _label_region(self, start: int) -> Optional[Tuple[List[int], int]]:
+        cells = self._cells
+        if cells[start] != EMPTY:
+            return None
+        neighbors = self._geometry.neighbors
+        seen = {start}
+        region = [start]
+        owner = 0
+        to_check = [start]
+        while to_check:
+            index = to_check.pop()
+            for adj in neighbors[index]:
+                value = cells[adj]
+                if value == EMPTY:
+                    if adj not in seen:
+                        seen.add(adj)
+                        region.append(adj)
+                        to_check.append(adj)
+                elif value != BORDER:
+                    owner |= value
+        return region, owner
+
+    def get_territory(self) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+        self._update_regions()
+        coords = self._geometry.coords
+        black_territory: Set[Tuple[int, int]] = set()
+        white_territory: Set[Tuple[int, int]] = set()
+        for region, owner in self._regions.values():
+            if owner == BLACK:
+                black_territory.update(coords[index] for index in region)
+            elif owner == WHITE:
+                white_territory.update(coords[index] for index in region)
+        return black_territory, white_territory
+
+    def _remove_dead_chain(self, point: Tuple[int, int]) -> None:
+        self._lift_chain(self._chain_of[self._index(*point)])
+
+    def is_ko_violation(self, row: int, col: int, player: int) -> bool:
+        if not self.history:
+            return False
+
+        index = self._index(row, col)
+        return self._repeats_position(index, player, self._captured_heads(index, player))
+
+    def _repeats_position(self, index: int, player: int, captured: List[int]) -> bool:
+        if self.ko_rule == "simple" and not captured:
+            return False
+
+        zobrist = self._geometry.zobrist
+        new_hash = self.hash ^ zobrist[index][player]
+        enemy = 3 - player
+        for head in captured:
+            for stone in self._stones[head]:
+                new_hash ^= zobrist[stone][enemy]
+
+        if self.ko_rule == "simple":
+            return new_hash == self.history[-1].hash
+        return self._position_key(new_hash, 3 - player) in self._seen
+
+    def place_stone(self, row: int, col: int) -> bool:
+        # the checks of can_place_stone, done on the flat index directly
+        if self.game_over or not self.is_valid_position(row, col):
+            return False
+        player = self.current_player
+        index = self._index(row, col)
+        if self._cells[index] != EMPTY or self._suicide(index, player):
+            return False
+        captured = self._captured_heads(index, player)
+        if self.history and self._repeats_position(index, player, captured):
+            return False
+
+        coords = self._geometry.coords
+        captured_stones = tuple(coords[stone] for head in captured for stone in self._stones[head])
+        self.history.append(MoveRecord((row, col), player, captured_stones,
+                                       self.consecutive_passes, self.black_captures,
+                                       self.white_captures, self.hash))
+        self._put(index, player)
+        self.consecutive_passes = 0
+
+        for head in captured:
+            self._lift_chain(head)
+        if player == 1:
+            self.black_captures += len(captured_stones)
+        else:
+            self.white_captures += len(captured_stones)
+
+        self.current_player = 3 - player
+        self._remember_position()
+        return True
+
+    def undo(self) -> None:
+        if self.history and not self.game_over:
+            self._forget_position()
+            record = self.history.pop()
+            if record.point is not None:
+                self._lift_stone(self._index(*record.point))
+                enemy = 3 - record.player
+                for row, col in record.captured:
+                    self._put(self._index(row, col), enemy)
+            self.current_player = record.player
+            self.consecutive_passes = record.consecutive_passes
+            self.black_captures = record.black_captures
+            self.white_captures = record.white_captures
+
+    def reset(self) -> None:
+        # clear in place: the memoryview rows in self.board stay valid
+        for index in self._geometry.points:
+            self._cells[index] = EMPTY
+            self._chain_of[index] = 0
+        self._stones = {}
+        self._libs = {}
+        self.hash = 0
+        self.history.clear()
+        self.current_player = 1
+        self.consecutive_passes = 0
+        self.game_over = False
+        self.black_captures = 0
+        self.white_captures = 0
+        self.setup = ((), (), 1)
+        self._seen = {self._position_key(0, 1): 1}
+        if self.patterns is not None:
+            self.patterns = PatternCodes(self._geometry.size, self.patterns.diamond)
+        self._clear_regions()
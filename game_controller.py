@@ -1,11 +1,18 @@
 # game_controller.py
-from typing import Tuple
+import random
+from typing import Tuple, Optional
 from board import Board
+from book import OpeningBook
+from mcts import MCTSPlayer
+from sgf import iter_games, replay, save_sgf
 
 class GameController:
     # cái này để điều khiển game Go
-    def __init__(self, board: Board):
+    def __init__(self, board: Board, ai_player: Optional[MCTSPlayer] = None,
+                 book: Optional[OpeningBook] = None):
         self.board = board
+        self.ai_player = ai_player  # None thì cả 2 bên đều là người chơi
+        self.book = book  # sách khai cuộc, tra trước khi AI tìm kiếm; None là không dùng
 
     def make_move(self, row: int, col: int) -> bool:
         # đặt quân ở vị trí row, col
@@ -20,6 +27,32 @@ class GameController:
         if not self.board.game_over:  # chỉ pass nếu game chưa kết thúc
             self.board.pass_turn()
 
+    def request_ai_move(self) -> Optional[Tuple[int, int]]:
+        # cho AI đi 1 nước cho người chơi hiện tại
+        # trả về (row, col) AI đã đặt, None nếu AI pass hoặc không có AI
+        if self.ai_player is None or self.board.game_over:
+            return None
+        move = self.book_move()
+        if move is None:
+            move = self.ai_player.select_move(self.board)
+        return self.apply_ai_move(move)
+
+    def book_move(self, rng: Optional[random.Random] = None) -> Optional[Tuple[int, int]]:
+        # nước trong sách khai cuộc cho thế cờ hiện tại, None nếu không có sách hoặc thế cờ không có trong sách
+        # có rng thì chọn ngẫu nhiên theo số ván đã đi nước đó, không thì chọn nước đi nhiều nhất
+        if self.book is None or self.board.game_over:
+            return None
+        return self.book.best_move(self.board, rng)
+
+    def apply_ai_move(self, move: Optional[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+        # đặt nước AI đã tính xong (ví dụ từ luồng chạy nền), None là pass
+        if self.board.game_over:
+            return None
+        if move is None or not self.board.place_stone(*move):
+            self.board.pass_turn()
+            return None
+        return move
+
     def undo(self) -> None:
         # quay lại nước đi trước, không dùng được nếu game over
         self.board.undo()
@@ -28,6 +61,21 @@ class GameController:
         # reset bàn cờ, xóa hết quân
         self.board.reset()
 
+    def save_sgf(self, path: str) -> None:
+        # lưu các nước đã đi ra file SGF
+        save_sgf(self.board, path)
+
+    def load_sgf(self, path: str) -> bool:
+        # nạp ván đầu tiên trong file SGF, bàn cờ phải cùng kích thước với ván đó
+        # trả về False nếu ván có nước không hợp lệ (bàn cờ dừng ở nước trước đó)
+        game = next(iter_games([path]), None)
+        if game is None:
+            raise ValueError(f"No game found in {path}")
+        if game.size != self.board.size:
+            raise ValueError(f"{path} is a {game.size}x{game.size} game")
+        self.board.reset()
+        return replay(self.board, game) is None
+
     def get_score(self) -> Tuple[int, int]:
         # lấy điểm của Đen và Trắng
         return self.board.calculate_score()
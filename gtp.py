@@ -0,0 +1,348 @@
+# gtp.py
+import argparse
+import asyncio
+import random
+import signal
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+from config import Config
+from board import Board, BoardState, KO_RULES
+from fast_board import FastBoard
+from backends import BACKENDS
+from game_controller import GameController
+from mcts import MCTSPlayer, Move
+from patterns import load_table
+from book import OpeningBook, load_book
+
+# Go Text Protocol (version 2) front end, over stdin/stdout for GUIs and tournament managers,
+# or as an asyncio TCP server with one session per connection. Every session owns its board;
+# genmove searches run in a shared process pool so a long search never blocks other sessions.
+
+NAME = "go-game"
+VERSION = "1.0"
+COLUMNS = "ABCDEFGHJKLMNOPQRSTUVWXYZ"  # GTP skips I
+MAX_SIZE = len(COLUMNS)
+COLORS = {"b": 1, "black": 1, "w": 2, "white": 2}
+
+
+class GTPError(Exception):
+    pass
+
+
+def parse_color(text: str) -> int:
+    try:
+        return COLORS[text.lower()]
+    except KeyError:
+        raise GTPError("invalid color") from None
+
+
+def parse_vertex(text: str, size: int) -> Move:
+    text = text.upper()
+    if text == "PASS":
+        return None
+    column = COLUMNS.find(text[:1])
+    if column < 0 or column >= size or not text[1:].isdigit() or not 1 <= int(text[1:]) <= size:
+        raise GTPError("invalid coordinate")
+    return size - int(text[1:]), column
+
+
+def format_vertex(move: Move, size: int) -> str:
+    if move is None:
+        return "pass"
+    row, col = move
+    return f"{COLUMNS[col]}{size - row}"
+
+
+def format_score(black: float, white: float) -> str:
+    if black == white:
+        return "0"
+    return f"B+{black - white:g}" if black > white else f"W+{white - black:g}"
+
+
+def _genmove_worker(state: BoardState, playouts: int, time_limit: float,
+                    seed: int, patterns: Optional[str]) -> Move:
+    # runs in a pool process; size and komi travel with the state
+    player = MCTSPlayer(playouts, time_limit, seed=seed,
+                        patterns=None if patterns is None else load_table(patterns))
+    return player.select_move(FastBoard.from_state(state))
+
+
+class Engine:
+    # settings shared by all sessions, and the pool their genmove searches run in
+    def __init__(self, playouts: int = 1000, time_limit: float = 5.0, workers: int = 1,
+                 ko_rule: Optional[str] = None, backend: str = "fast", patterns: Optional[str] = None,
+                 seed: int = 0, book: Optional[str] = None):
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.ko_rule = Config.KO_RULE if ko_rule is None else ko_rule
+        self.backend = BACKENDS[backend]
+        self.patterns = patterns
+        self.seed = seed
+        self.sessions = 0
+        # answered in the session itself, so book moves never wait for the pool
+        self.book: Optional[OpeningBook] = load_book(book) if book else None
+        # workers == 0 searches inline on the event loop, which only suits a single stdio session
+        self._executor: Optional[Executor] = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+
+    async def genmove(self, state: BoardState, seed: int) -> Move:
+        job = (state, self.playouts, self.time_limit, seed, self.patterns)
+        if self._executor is None:
+            return _genmove_worker(*job)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, _genmove_worker, *job)
+
+    def start(self) -> None:
+        # fork the pool processes now, before a server socket exists for them to inherit
+        if self._executor is not None:
+            self._executor.submit(int).result()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+class Session:
+    # one GTP conversation: a board, its controller and the command table
+    def __init__(self, engine: Engine, size: int = 19, komi: float = 7.5):
+        self.engine = engine
+        self.size = size
+        self.komi = komi
+        self.closed = False
+        self.rng = random.Random(engine.seed + engine.sessions)
+        engine.sessions += 1
+        self.commands: Dict[str, Callable[[List[str]], Union[str, Awaitable[str]]]] = {
+            "protocol_version": lambda args: "2",
+            "name": lambda args: NAME,
+            "version": lambda args: VERSION,
+            "known_command": lambda args: "true" if args and args[0] in self.commands else "false",
+            "list_commands": lambda args: "\n".join(self.commands),
+            "quit": self.quit,
+            "boardsize": self.boardsize,
+            "clear_board": self.clear_board,
+            "komi": self.set_komi,
+            "play": self.play,
+            "genmove": self.genmove,
+            "undo": self.undo,
+            "final_score": self.final_score,
+            "showboard": self.showboard,
+        }
+        self.clear_board([])
+
+    async def handle(self, line: str) -> Optional[str]:
+        # one command line -> one full response, None for blank and comment lines
+        line = "".join(char for char in line.split("#", 1)[0] if char in "\t " or char.isprintable())
+        words = line.replace("\t", " ").split()
+        if not words:
+            return None
+        number = ""
+        if words[0].isdigit():
+            number = words.pop(0)
+        if not words:
+            return f"?{number} missing command\n\n"
+        name, args = words[0].lower(), words[1:]
+        command = self.commands.get(name)
+        try:
+            if command is None:
+                raise GTPError("unknown command")
+            result = command(args)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except GTPError as error:
+            return f"?{number} {error}\n\n"
+        return f"={number} {result}".rstrip(" ") + "\n\n"
+
+    def quit(self, args: List[str]) -> str:
+        self.closed = True
+        return ""
+
+    def boardsize(self, args: List[str]) -> str:
+        if len(args) != 1 or not args[0].isdigit():
+            raise GTPError("boardsize not an integer")
+        size = int(args[0])
+        if not 2 <= size <= MAX_SIZE:
+            raise GTPError("unacceptable size")
+        self.size = size
+        self.clear_board([])
+        return ""
+
+    def clear_board(self, args: List[str]) -> str:
+        self.board = self.engine.backend(self.engine.ko_rule, size=self.size, komi=self.komi)
+        self.controller = GameController(self.board, book=self.engine.book)
+        return ""
+
+    def set_komi(self, args: List[str]) -> str:
+        try:
+            self.komi = float(args[0])
+        except (IndexError, ValueError):
+            raise GTPError("komi not a float") from None
+        self.board.komi = self.komi
+        return ""
+
+    def _to_move(self, color: int) -> None:
+        # GTP lets either colour move; the other side is taken to have passed
+        if color != self.board.current_player:
+            if self.board.game_over:
+                raise GTPError("game is over")
+            self.controller.pass_turn()
+
+    def play(self, args: List[str]) -> str:
+        if len(args) != 2:
+            raise GTPError("invalid color or coordinate")
+        color = parse_color(args[0])
+        move = parse_vertex(args[1], self.size)
+        implied_pass = color != self.board.current_player
+        if self.board.game_over or (implied_pass and self.board.consecutive_passes):
+            raise GTPError("illegal move")  # a second pass would have ended the game
+        self._to_move(color)
+        if move is None:
+            self.controller.pass_turn()
+        elif not self.controller.make_move(*move):
+            if implied_pass:
+                self.controller.undo()
+            raise GTPError("illegal move")
+        return ""
+
+    async def genmove(self, args: List[str]) -> str:
+        if len(args) != 1:
+            raise GTPError("invalid color")
+        color = parse_color(args[0])
+        if self.board.game_over:
+            return "pass"
+        self._to_move(color)
+        if self.board.game_over:
+            return "pass"
+        move = self.controller.book_move()
+        if move is None:
+            move = await self.engine.genmove(self.board.to_state(), self.rng.getrandbits(32))
+        return format_vertex(self.controller.apply_ai_move(move), self.size)
+
+    def undo(self, args: List[str]) -> str:
+        if not self.board.history or self.board.game_over:
+            raise GTPError("cannot undo")
+        self.controller.undo()
+        return ""
+
+    def final_score(self, args: List[str]) -> str:
+        # scored on a copy with the dead stones removed, so an unfinished game can go on
+        board = Board.from_state(self.board.to_state())
+        board.game_over = True
+        if not self.board.game_over:
+            board.remove_dead_groups()
+        return format_score(*board.calculate_score())
+
+    def showboard(self, args: List[str]) -> str:
+        header = "   " + " ".join(COLUMNS[:self.size])
+        lines = [header]
+        for row in range(self.size):
+            cells = " ".join(".XO"[value] for value in self.board.board[row])
+            lines.append(f"{self.size - row:2} {cells} {self.size - row}")
+        lines.append(header)
+        return "\n" + "\n".join(lines)
+
+
+async def serve_stdio(engine: Engine, size: int, komi: float) -> None:
+    loop = asyncio.get_running_loop()
+    session = Session(engine, size, komi)
+    while not session.closed:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        response = await session.handle(line)
+        if response is not None:
+            sys.stdout.write(response)
+            sys.stdout.flush()
+
+
+async def serve_tcp(engine: Engine, host: str, port: int, size: int, komi: float,
+                    stop: Optional[asyncio.Event] = None,
+                    ready: Optional["asyncio.Future[int]"] = None) -> None:
+    # stop and ready let a caller (the loopback tests) shut the server down and learn the
+    # port it bound, for port 0; without them it runs until SIGINT or SIGTERM
+    async def connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = Session(engine, size, komi)
+        try:
+            while not session.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await session.handle(line.decode("utf-8", "replace"))
+                if response is not None:
+                    writer.write(response.encode("utf-8"))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    engine.start()
+    if stop is None:
+        stop = asyncio.Event()
+        for number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                asyncio.get_running_loop().add_signal_handler(number, stop.set)
+            except NotImplementedError:  # Windows: Ctrl+C still raises KeyboardInterrupt
+                pass
+    server = await asyncio.start_server(connection, host, port)
+    bound = [sock.getsockname() for sock in server.sockets]
+    addresses = ", ".join(f"{address[0]}:{address[1]}" for address in bound)
+    print(f"GTP server listening on {addresses}", file=sys.stderr)
+    if ready is not None:
+        ready.set_result(bound[0][1])
+    async with server:
+        await stop.wait()
+
+
+def engine_from_args(args: argparse.Namespace) -> Engine:
+    return Engine(args.playouts, args.seconds, args.workers, args.ko_rule, args.backend,
+                  args.patterns, args.seed, args.book)
+
+
+def run_stdio(args: argparse.Namespace) -> None:
+    engine = engine_from_args(args)
+    try:
+        asyncio.run(serve_stdio(engine, args.size, args.komi))
+    finally:
+        engine.close()
+
+
+def run_serve(args: argparse.Namespace) -> None:
+    engine = engine_from_args(args)
+    try:
+        asyncio.run(serve_tcp(engine, args.host, args.port, args.size, args.komi))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Go Text Protocol engine")
+    parser.add_argument("--size", type=int, default=19, help="board size until boardsize is sent")
+    parser.add_argument("--komi", type=float, default=7.5)
+    parser.add_argument("--playouts", type=int, default=1000, help="MCTS playouts per genmove")
+    parser.add_argument("--seconds", type=float, default=5.0, help="time limit per genmove")
+    parser.add_argument("--workers", type=int, default=1, help="search processes; 0 searches inline")
+    parser.add_argument("--ko-rule", choices=KO_RULES, default=Config.KO_RULE)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="fast")
+    parser.add_argument("--patterns", metavar="TABLE", help="compiled pattern table to guide the rollouts")
+    parser.add_argument("--book", metavar="BOOK", help="opening book to play from before searching")
+    parser.add_argument("--seed", type=int, default=0)
+    commands = parser.add_subparsers(dest="command")
+
+    stdio = commands.add_parser("stdio", help="one session over stdin/stdout (the default)")
+    stdio.set_defaults(run=run_stdio)
+
+    serve = commands.add_parser("serve", help="TCP server, one session per connection")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=6060)
+    serve.set_defaults(run=run_serve)
+
+    args = parser.parse_args(argv)
+    if not 2 <= args.size <= MAX_SIZE:
+        parser.error(f"--size must be between 2 and {MAX_SIZE}")
+    getattr(args, "run", run_stdio)(args)
+
+
+if __name__ == "__main__":
+    main()
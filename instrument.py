@@ -0,0 +1,263 @@
+# instrument.py
+import csv
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+from board import Board
+
+# Opt-in profiling of the rules engine. enable() swaps timing wrappers onto the hot
+# methods and disable() puts the originals back, so a disabled build runs the exact
+# same code as before. Timings are inclusive: a call counted under one name includes
+# the calls it makes under other names. Counts are approximate while the AI thread runs.
+
+Nodes = Callable[[tuple, dict, object], int]  # flood fill points visited, from (args, kwargs, result)
+
+
+def _foreign_group(args: tuple, kwargs: dict, result: object) -> int:
+    # get_group only floods when given a board other than its own
+    board = args[3] if len(args) > 3 else kwargs.get("board")
+    return len(result) if board is not None and board is not args[0].board else 0
+
+
+def _region_nodes(args: tuple, kwargs: dict, result: object) -> int:
+    return len(result[0]) if result is not None else 0
+
+
+def _group_nodes(args: tuple, kwargs: dict, result: object) -> int:
+    return len(result)
+
+
+# (module, class, method, counter, flood fill nodes); "move" also closes the per-move node count
+TARGETS: Tuple[Tuple[str, str, str, str, Optional[Nodes]], ...] = (
+    ("board", "Board", "get_group", "get_group", _foreign_group),
+    ("board", "Board", "has_liberties", "has_liberties", None),
+    ("board", "Board", "is_ko_violation", "is_ko_violation", None),
+    ("board", "Board", "to_state", "copy", None),
+    ("board", "Board", "from_state", "copy", None),
+    ("board", "Board", "_update_regions", "territory", None),
+    ("board", "Board", "remove_dead_groups", "dead_stones", None),
+    ("board", "Board", "_label_region", "flood_fill", _region_nodes),
+    ("board", "Board", "get_empty_group", "flood_fill", _group_nodes),
+    ("board", "Board", "place_stone", "move", None),
+    ("board", "Board", "pass_turn", "move", None),
+    ("fast_board", "FastBoard", "get_group", "get_group", _foreign_group),
+    ("fast_board", "FastBoard", "has_liberties", "has_liberties", None),
+    ("fast_board", "FastBoard", "is_ko_violation", "is_ko_violation", None),
+    ("fast_board", "FastBoard", "_label_region", "flood_fill", _region_nodes),
+    ("fast_board", "FastBoard", "get_empty_group", "flood_fill", _group_nodes),
+    ("fast_board", "FastBoard", "place_stone", "move", None),
+    ("bit_board", "BitBoard", "get_group", "get_group", _foreign_group),
+    ("bit_board", "BitBoard", "has_liberties", "has_liberties", None),
+    ("bit_board", "BitBoard", "is_ko_violation", "is_ko_violation", None),
+    ("bit_board", "BitBoard", "_territory_masks", "territory", None),
+    ("bit_board", "BitBoard", "place_stone", "move", None),
+    ("playout", "PlayoutBoard", "from_board", "copy", None),
+    ("playout", "PlayoutBoard", "copy", "copy", None),
+    ("playout", "PlayoutBoard", "play_random", "rollout", None),
+    ("playout", "PlayoutBoard", "random_move", "rollout_pick", None),
+    ("playout", "PlayoutBoard", "play", "rollout_move", None),
+    ("playout", "PlayoutBoard", "area_score", "rollout_score", None),
+    ("render", "Renderer", "render", "frame", None),  # only if the pygame UI is loaded
+)
+OPTIONAL_MODULES = ("render",)
+
+
+class Stat:
+    __slots__ = ("calls", "total", "max", "active")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0  # ns
+        self.max = 0
+        self.active = False  # set while inside, so FastBoard -> super() calls count once
+
+
+class FloodStats:
+    # flood fill points visited, split per move: a move is charged with everything since the last one
+    __slots__ = ("nodes", "moves", "mark", "max", "last")
+
+    def __init__(self):
+        self.nodes = 0
+        self.moves = 0
+        self.mark = 0
+        self.max = 0
+        self.last = 0
+
+    def end_move(self) -> None:
+        self.last = self.nodes - self.mark
+        self.mark = self.nodes
+        self.moves += 1
+        if self.last > self.max:
+            self.max = self.last
+
+
+_stats: Dict[str, Stat] = {name: Stat() for name in dict.fromkeys(target[3] for target in TARGETS)}
+_flood = FloodStats()
+_originals: List[Tuple[type, str, object]] = []
+
+
+def _wrap(function: Callable, stat: Stat, nodes: Optional[Nodes], ends_move: bool) -> Callable:
+    clock = time.perf_counter_ns
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if stat.active:
+            return function(*args, **kwargs)
+        stat.active = True
+        start = clock()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            elapsed = clock() - start
+            stat.active = False
+            stat.calls += 1
+            stat.total += elapsed
+            if elapsed > stat.max:
+                stat.max = elapsed
+        if nodes is not None:
+            _flood.nodes += nodes(args, kwargs, result)
+        if ends_move and result is not False:
+            _flood.end_move()
+        return result
+    return wrapper
+
+
+def enable() -> None:
+    if _originals:
+        return
+    for module_name, class_name, method, name, nodes in TARGETS:
+        if module_name in OPTIONAL_MODULES and module_name not in sys.modules:
+            continue
+        cls = getattr(importlib.import_module(module_name), class_name)
+        original = cls.__dict__[method]
+        if isinstance(original, classmethod):
+            wrapped = classmethod(_wrap(original.__func__, _stats[name], nodes, False))
+        else:
+            wrapped = _wrap(original, _stats[name], nodes, name == "move")
+        _originals.append((cls, method, original))
+        setattr(cls, method, wrapped)
+
+
+def disable() -> None:
+    while _originals:
+        cls, method, original = _originals.pop()
+        setattr(cls, method, original)
+
+
+def enabled() -> bool:
+    return bool(_originals)
+
+
+def reset() -> None:
+    global _flood
+    for stat in _stats.values():
+        stat.calls = stat.total = stat.max = 0
+    _flood = FloodStats()
+
+
+def history_size(board: Board) -> Dict[str, int]:
+    # approximate bytes held for undo and superko: the move records and the seen-position table
+    history = list(board.history)
+    size = sys.getsizeof(history) + sum(sys.getsizeof(record) + sys.getsizeof(record.captured)
+                                        for record in history)
+    return {"entries": len(history), "bytes": size + sys.getsizeof(board._seen)}
+
+
+def snapshot(board: Optional[Board] = None) -> Dict[str, object]:
+    counters = {}
+    for name, stat in _stats.items():
+        counters[name] = {
+            "calls": stat.calls,
+            "total_ms": round(stat.total / 1e6, 3),
+            "mean_us": round(stat.total / stat.calls / 1e3, 3) if stat.calls else 0.0,
+            "max_us": round(stat.max / 1e3, 3),
+        }
+    flood = _flood
+    result: Dict[str, object] = {
+        "time": round(time.time(), 3),
+        "enabled": enabled(),
+        "counters": counters,
+        "flood_nodes": {
+            "total": flood.nodes,
+            "moves": flood.moves,
+            "per_move": round(flood.mark / flood.moves, 1) if flood.moves else 0.0,
+            "last_move": flood.last,
+            "max_move": flood.max,
+        },
+    }
+    if board is not None:
+        result["history"] = history_size(board)
+    return result
+
+
+def flatten(data: Dict[str, object], prefix: str = "") -> Dict[str, object]:
+    # nested snapshot -> {"counters.get_group.calls": ...}, one CSV column per leaf
+    flat: Dict[str, object] = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def dump(path: str, board: Optional[Board] = None) -> None:
+    # appends one snapshot: a CSV row for .csv files, a JSON line otherwise
+    data = snapshot(board)
+    if path.endswith(".csv"):
+        # the header of an existing file wins, so columns stay put if a board is attached later
+        row = flatten(data)
+        fields = list(row)
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, newline="", encoding="utf-8") as existing:
+                fields = next(csv.reader(existing))
+        with open(path, "a", newline="", encoding="utf-8") as output:
+            writer = csv.DictWriter(output, fieldnames=fields, restval="", extrasaction="ignore")
+            if not output.tell():
+                writer.writeheader()
+            writer.writerow(row)
+    else:
+        with open(path, "a", encoding="utf-8") as output:
+            output.write(json.dumps(data) + "\n")
+
+
+class Dumper:
+    # writes a snapshot every `interval` seconds on a daemon thread, and a last one on stop()
+    def __init__(self, path: str, interval: float = 5.0, board: Optional[Board] = None):
+        self.path = path
+        self.interval = interval
+        self.board = board
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "Dumper":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            dump(self.path, self.board)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        dump(self.path, self.board)
+
+
+def summary_lines(data: Dict[str, object]) -> List[str]:
+    # short text for the on-screen overlay
+    lines = []
+    for name, counter in data["counters"].items():
+        if counter["calls"]:
+            lines.append(f"{name}: {counter['calls']} x {counter['mean_us']:.1f}us")
+    flood = data["flood_nodes"]
+    lines.append(f"flood fill: {flood['per_move']:.0f}/move, max {flood['max_move']}")
+    if "history" in data:
+        history = data["history"]
+        lines.append(f"history: {history['entries']} moves, {history['bytes'] / 1024:.1f} KiB")
+    return lines
@@ -0,0 +1,268 @@
+# life.py
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Set, Tuple
+
+Point = Tuple[int, int]
+
+
+@lru_cache(maxsize=None)
+def flat_neighbors(size: int) -> Tuple[Tuple[int, ...], ...]:
+    # on-board neighbours of every row-major index
+    table = []
+    for index in range(size * size):
+        row, col = divmod(index, size)
+        table.append(tuple(row_ * size + col_ for row_, col_ in
+                           ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                           if 0 <= row_ < size and 0 <= col_ < size))
+    return tuple(table)
+
+
+class RegionGraph:
+    # One labelling pass over the board: every chain and every empty region becomes a block
+    # with its colour (0 for empty), its points (row-major indices) and the blocks it touches.
+    # Everything below works on blocks, so no region is flood-filled twice.
+    def __init__(self, board: Sequence[Sequence[int]]):
+        size = len(board)
+        cells = [value for row in board for value in row]
+        neighbors = flat_neighbors(size)
+        block_of = [-1] * len(cells)
+        colors: List[int] = []
+        points: List[List[int]] = []
+        adjacent: List[Set[int]] = []
+        for start, color in enumerate(cells):
+            if block_of[start] >= 0:
+                continue
+            block = len(colors)
+            touching: Set[int] = set()
+            block_of[start] = block
+            members = [start]
+            for point in members:  # grows while we walk it
+                for adj in neighbors[point]:
+                    if cells[adj] == color:
+                        if block_of[adj] < 0:
+                            block_of[adj] = block
+                            members.append(adj)
+                    elif block_of[adj] >= 0:
+                        # blocks labelled later find this one from their own side
+                        touching.add(block_of[adj])
+                        adjacent[block_of[adj]].add(block)
+            colors.append(color)
+            points.append(members)
+            adjacent.append(touching)
+        self.size = size
+        self.cells = cells
+        self.block_of = block_of
+        self.colors = colors
+        self.points = points
+        self.adjacent = adjacent
+
+    def block_at(self, row: int, col: int) -> int:
+        return self.block_of[row * self.size + col]
+
+    def coords(self, block: int) -> List[Point]:
+        return [divmod(point, self.size) for point in self.points[block]]
+
+    def chains(self, color: int) -> List[int]:
+        return [block for block, value in enumerate(self.colors) if value == color]
+
+    def enclosed_regions(self, color: int) -> List[List[int]]:
+        # the areas `color` encloses: connected groups of empty and enemy blocks
+        colors = self.colors
+        seen = [False] * len(colors)
+        regions = []
+        for start, value in enumerate(colors):
+            if value == color or seen[start]:
+                continue
+            seen[start] = True
+            region = [start]
+            for block in region:
+                for adj in self.adjacent[block]:
+                    if colors[adj] != color and not seen[adj]:
+                        seen[adj] = True
+                        region.append(adj)
+            regions.append(region)
+        return regions
+
+
+def benson(graph: RegionGraph, color: int) -> Tuple[Set[int], List[List[int]]]:
+    # Benson's algorithm: the chains of `color` that stay alive even if the opponent always
+    # moves first, and the enclosed regions where the opponent cannot live. A region is vital
+    # to a bordering chain when all of its empty points are liberties of that chain.
+    colors = graph.colors
+    neighbors = flat_neighbors(graph.size)
+    block_of = graph.block_of
+    regions = graph.enclosed_regions(color)
+    border: List[Set[int]] = []
+    vital: List[Set[int]] = []
+    vital_count: Dict[int, int] = dict.fromkeys(graph.chains(color), 0)
+    regions_of: Dict[int, List[int]] = {chain: [] for chain in vital_count}
+    for number, region in enumerate(regions):
+        touching = {adj for block in region for adj in graph.adjacent[block] if colors[adj] == color}
+        small = set(touching)
+        for block in region:
+            if colors[block] != 0:
+                continue
+            for point in graph.points[block]:
+                small &= {block_of[adj] for adj in neighbors[point] if colors[block_of[adj]] == color}
+                if not small:
+                    break
+        border.append(touching)
+        vital.append(small)
+        for chain in touching:
+            regions_of[chain].append(number)
+        for chain in small:
+            vital_count[chain] += 1
+
+    # drop chains with fewer than two vital regions, then every region such a chain borders,
+    # which can leave other chains short of vital regions in turn
+    alive = set(vital_count)
+    healthy = [True] * len(regions)
+    to_drop = [chain for chain, count in vital_count.items() if count < 2]
+    while to_drop:
+        chain = to_drop.pop()
+        if chain not in alive:
+            continue
+        alive.discard(chain)
+        for number in regions_of[chain]:
+            if not healthy[number]:
+                continue
+            healthy[number] = False
+            for other in vital[number]:
+                vital_count[other] -= 1
+                if vital_count[other] < 2 and other in alive:
+                    to_drop.append(other)
+    safe = [region for number, region in enumerate(regions)
+            if healthy[number] and border[number] and vital[number]]
+    return alive, safe
+
+
+def settled(graph: RegionGraph) -> Tuple[Set[int], Set[int]]:
+    # (unconditionally alive chains, certainly dead chains) of both colours; a chain is
+    # certainly dead inside a small region enclosed by unconditionally alive chains
+    alive: Set[int] = set()
+    dead: Set[int] = set()
+    for color in (1, 2):
+        chains, safe = benson(graph, color)
+        alive |= chains
+        for region in safe:
+            dead.update(block for block in region if graph.colors[block] == 3 - color)
+    return alive, dead
+
+
+def benson_dead(graph: RegionGraph) -> Set[int]:
+    return settled(graph)[1]
+
+
+def estimate_dead(graph: RegionGraph, big_eye: int = 7) -> Set[int]:
+    # Benson's certain verdicts plus an eye count for everything else. Empty areas (dead
+    # stones count as empty) touching one colour are its eyes, worth two from `big_eye` points
+    # up; chains sharing an eye form a group, alive with two eyes or a Benson-alive chain.
+    # An area both colours touch then goes to the side with a living group there, or if
+    # neither has one, to the side more of its points touch. A group that is still not alive
+    # is dead when it touches a living enemy group; two weak groups next to each other are
+    # left on the board, since that is usually seki or an unfinished fight.
+    colors = graph.colors
+    adjacent = graph.adjacent
+    neighbors = flat_neighbors(graph.size)
+    block_of = graph.block_of
+    protected, dead = settled(graph)
+
+    areas: List[Tuple[int, Dict[int, Set[int]], List[int]]] = []  # (points, colour -> bordering chains, blocks)
+    seen = [False] * len(colors)
+    for start, value in enumerate(colors):
+        if value != 0 or seen[start]:
+            continue
+        seen[start] = True
+        area = [start]
+        border: Dict[int, Set[int]] = {1: set(), 2: set()}
+        for block in area:
+            for adj in adjacent[block]:
+                if colors[adj] == 0 or adj in dead:
+                    if not seen[adj]:
+                        seen[adj] = True
+                        area.append(adj)
+                else:
+                    border[colors[adj]].add(adj)
+        areas.append((sum(len(graph.points[block]) for block in area), border, area))
+
+    parent = {block: block for block, color in enumerate(colors) if color and block not in dead}
+    eyes: Dict[int, int] = {}
+
+    def find(block: int) -> int:
+        while parent[block] != block:
+            parent[block] = parent[parent[block]]
+            block = parent[block]
+        return block
+
+    def credit(chains: Set[int], size: int) -> None:
+        chains = set(chains)
+        root = find(chains.pop())
+        eye = 2 if size >= big_eye else 1
+        for chain in chains:
+            other = find(chain)
+            if other != root:
+                parent[other] = root
+                eye += eyes.pop(other, 0)
+        eyes[root] = eyes.get(root, 0) + eye
+
+    def living() -> Set[int]:
+        alive = {root for root, count in eyes.items() if count >= 2}
+        alive.update(find(chain) for chain in protected if chain in parent)
+        return alive
+
+    shared = []
+    for size, border, area in areas:
+        owners = [color for color in (1, 2) if border[color]]
+        if len(owners) == 1:
+            credit(border[owners[0]], size)
+        elif owners:
+            shared.append((size, border, area))
+    alive = living()
+    for size, border, area in shared:
+        strong = [color for color in (1, 2) if any(find(chain) in alive for chain in border[color])]
+        if len(strong) == 1:
+            credit(border[strong[0]], size)
+        elif not strong:
+            contact = {1: 0, 2: 0}
+            for block in area:
+                if colors[block] != 0:
+                    continue
+                for point in graph.points[block]:
+                    for color in {colors[block_of[adj]] for adj in neighbors[point] if block_of[adj] not in dead}:
+                        if color:
+                            contact[color] += 1
+            if contact[1] != contact[2]:
+                credit(border[1 if contact[1] > contact[2] else 2], size)
+    alive = living()
+
+    members: Dict[int, List[int]] = {}
+    for chain in parent:
+        members.setdefault(find(chain), []).append(chain)
+    for root, chains in members.items():
+        if root in alive:
+            continue
+        enemy = 3 - colors[root]
+        touching = set()
+        for chain in chains:
+            for adj in adjacent[chain]:
+                if colors[adj] == enemy and adj not in dead:
+                    touching.add(find(adj))
+                elif colors[adj] == 0:
+                    touching.update(find(other) for other in adjacent[adj]
+                                    if colors[other] == enemy and other not in dead)
+        if touching & alive:
+            dead.update(chains)
+    return dead
+
+
+DEAD_STONE_RULES: Dict[str, Callable[[RegionGraph], Set[int]]] = {
+    "none": lambda graph: set(),
+    "benson": benson_dead,
+    "estimate": estimate_dead,
+}
+
+
+def dead_chains(board: Sequence[Sequence[int]], rule: str) -> List[Tuple[int, List[Point]]]:
+    # (colour, stones) of every chain the rule removes at the end of the game
+    graph = RegionGraph(board)
+    return [(graph.colors[block], graph.coords(block)) for block in sorted(DEAD_STONE_RULES[rule](graph))]
@@ -1,90 +1,178 @@
+import time
+STARTED = time.perf_counter()  # taken before the imports below, which are part of startup
+import sys
 import pygame
-from typing import Tuple, Optional
+from typing import Tuple
+import assets
 from config import Config
-from board import Board
 from render import Renderer
-from game_controller import GameController
 from start_menu import StartMenu
-from button import Button
+
+# Only what the menu needs is imported up front; the rules engine, search and opening book
+# load when a game starts (draw_game), so the window and menu appear first.
 
 
 class GoGame:
     def __init__(self):
-        pygame.init()
+        # only the pygame modules in use; pygame.init() would also open the audio device
+        pygame.display.init()
+        pygame.font.init()
         self.screen = pygame.display.set_mode((Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT))
         pygame.display.set_caption("Go Game - Pygame")
         self.clock = pygame.time.Clock()
 
+        self.menu = None  # built on first show and kept, so its surface is drawn once
+        self.startup_time = None  # seconds from start to the first frame on screen
         self.board = None
         self.controller = None
         self.renderer = None
+        self.ai_worker = None
+        self.profile_lines = None  # overlay text while profiling is on
+        self.profile_updated = 0
+        self.dumper = None
 
     def get_cell_from_mouse(self, pos: Tuple[int, int]) -> Tuple[int, int]:
         x, y = pos
-        return (round((y - Config.CELL_SIZE // 2) / Config.CELL_SIZE),
-                round((x - Config.CELL_SIZE // 2) / Config.CELL_SIZE))
-
-    def draw_start_menu(self) -> Optional[int]:
-        # Display Start Menu
-        startMenu = StartMenu(self.screen, pygame.font.Font(None, 24))
-
-        # Display buttons
-        button_lst = []
-        for i in range(10):
-            row = i // Config.BUTTONS_PER_ROW
-            col = i % Config.BUTTONS_PER_ROW
-
-            x = Config.BUTTON_START_X + col * (Config.BUTTON_WIDTH + Config.BUTTON_SPACING_X)
-            y = Config.BUTTON_START_Y + row * (Config.BUTTON_HEIGHT + Config.BUTTON_SPACING_Y)
-
-            button = Button(self.screen, x, y, str(i + 1))
-            button_lst.append(button)
-
-        startMenu.draw_start_menu()
-        for button in button_lst:
-            button.draw_button()
-            clicked = button.get_difficulty()
-            if clicked is not None:
-                return clicked
-
-    def draw_game(self) -> None:
-        self.board = Board()
-        self.controller = GameController(self.board)
-        self.renderer = Renderer(self.screen, pygame.font.Font(None, 24))
+        cell = self.renderer.cell
+        return round((y - cell // 2) / cell), round((x - cell // 2) / cell)
+
+    def show_start_menu(self) -> None:
+        if self.menu is None:
+            self.menu = StartMenu(self.screen)
+        self.menu.draw_start_menu()
+        pygame.display.flip()
+
+    def draw_game(self, difficulty: int) -> None:
+        from board import Board
+        from game_controller import GameController
+        from mcts import MCTSPlayer
+        from ai_worker import AIWorker
+        from transposition import TranspositionTable
+        from patterns import load_table
+        from book import load_book
+        self.board = Board(size=Config.GRID_SIZE, komi=Config.KOMI)
+        patterns = load_table(Config.AI_PATTERNS) if Config.AI_PATTERNS else None
+        ai_player = MCTSPlayer.from_difficulty(difficulty, workers=Config.AI_WORKERS,
+                                               table=TranspositionTable(Config.AI_TABLE_ENTRIES),
+                                               patterns=patterns)
+        book = load_book(Config.AI_BOOK) if Config.AI_BOOK else None
+        self.controller = GameController(self.board, ai_player, book)
+        self.ai_worker = AIWorker(ai_player, ponder=Config.AI_PONDER)
+        self.renderer = Renderer(self.screen, assets.font(24), self.board.size)
+        if self.dumper is not None:
+            self.dumper.board = self.board
+
+    def is_ai_turn(self) -> bool:
+        return not self.controller.is_game_over() and self.board.current_player == Config.AI_PLAYER
+
+    def update_ai(self) -> None:
+        # called every frame: start, poll or ponder the background search, never block
+        if not self.is_ai_turn():
+            if not self.ai_worker.pondering:
+                self.ai_worker.start_ponder(self.board)
+            return
+        if not self.ai_worker.thinking:
+            move = self.controller.book_move()
+            if move is not None:
+                # a book move needs no search; drop the ponder that was running for this position
+                self.ai_worker.cancel()
+                self.controller.apply_ai_move(move)
+                return
+            self.ai_worker.start_move(self.board)
+        ready, move = self.ai_worker.poll(self.board)
+        if ready:
+            self.controller.apply_ai_move(move)
+
+    def toggle_profiling(self) -> None:
+        import instrument
+        if instrument.enabled():
+            instrument.disable()
+            self.profile_lines = None
+        else:
+            instrument.enable()
+            self.profile_updated = 0
+
+    def update_profile_overlay(self) -> None:
+        # refreshed twice a second, not every frame, so the overlay does not measure itself
+        instrument = sys.modules.get("instrument")  # never imported means never enabled
+        now = pygame.time.get_ticks()
+        if instrument is not None and instrument.enabled() and now - self.profile_updated >= 500:
+            self.profile_lines = instrument.summary_lines(instrument.snapshot(self.board))
+            self.profile_updated = now
+
+    def undo_to_human_turn(self) -> None:
+        # take back the AI reply together with the human move before it
+        self.controller.undo()
+        if self.is_ai_turn():
+            self.controller.undo()
 
     def run(self) -> None:
+        if Config.PROFILE or Config.PROFILE_DUMP:
+            import instrument
+            if Config.PROFILE:
+                instrument.enable()
+            if Config.PROFILE_DUMP:
+                self.dumper = instrument.Dumper(Config.PROFILE_DUMP, Config.PROFILE_DUMP_INTERVAL).start()
+        self.show_start_menu()
+        self.startup_time = time.perf_counter() - STARTED
+        print(f"Startup: first frame after {self.startup_time * 1000:.0f} ms")
         is_start_menu = True
         running = True
         while running:
-            events = pygame.event.get()
+            if is_start_menu:
+                # nothing on the menu moves, so sleep until an event instead of polling
+                events = [pygame.event.wait()] + pygame.event.get()
+            else:
+                events = pygame.event.get()
             for event in events:
                 if event.type == pygame.QUIT:
                     running = False
 
             if is_start_menu:  # Start Menu
-                difficulty = self.draw_start_menu()
-                if difficulty is not None:
+                difficulty = None
+                for event in events:
+                    if event.type == pygame.VIDEOEXPOSE:
+                        self.show_start_menu()
+                    difficulty = self.menu.handle_event(event)
+                    if difficulty is not None:
+                        break
+                if difficulty is not None and running:
                     print("Choose difficulty:", difficulty)
-                    self.draw_game()
+                    self.draw_game(difficulty)
                     is_start_menu = False
             else:  # If a difficulty is chosen, start the game
                 for event in events:
-                    if event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.type == pygame.MOUSEBUTTONDOWN and not self.is_ai_turn():
                         row, col = self.get_cell_from_mouse(event.pos)
                         self.controller.make_move(row, col)
                     elif event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_u:
-                            self.controller.undo()
+                            self.ai_worker.cancel()
+                            self.undo_to_human_turn()
                         elif event.key == pygame.K_r:
+                            self.ai_worker.cancel()
                             self.controller.reset()
-                        elif event.key == pygame.K_p:
+                        elif event.key == pygame.K_p and not self.is_ai_turn():
                             self.controller.pass_turn()
-                self.renderer.render(self.board.board, self.controller.get_score(),
-                                     self.controller.is_game_over(), self.controller.get_winner())
-
-            pygame.display.flip()
-            self.clock.tick(60)
-
+                        elif event.key == pygame.K_i:
+                            self.toggle_profiling()
+                    elif event.type == pygame.VIDEOEXPOSE:
+                        self.renderer.invalidate()
+                self.update_ai()
+                self.update_profile_overlay()
+                # only the changed cells and score line are pushed to the display
+                dirty = self.renderer.render(self.board.board, self.controller.get_score(),
+                                             self.controller.is_game_over(), self.controller.get_winner(),
+                                             self.profile_lines)
+                if dirty:
+                    pygame.display.update(dirty)
+                self.clock.tick(60)
+
+        if self.ai_worker is not None:
+            self.ai_worker.close()
+        if self.dumper is not None:
+            self.dumper.stop()
+        assets.clear()
         pygame.quit()
 
 
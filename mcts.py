@@ -0,0 +1,257 @@
+# mcts.py
+import math
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+from board import Board, BoardState
+from fast_board import FastBoard
+from playout import PlayoutBoard, PASS
+from patterns import PatternTable, load_table
+from transposition import TranspositionTable, position_key
+
+Move = Optional[Tuple[int, int]]  # None is a pass
+
+STOP_POLL_SECONDS = 0.05  # how often a parallel search checks its stop event
+
+# difficulty level -> (playouts, seconds); the search stops at whichever comes first.
+# The playouts are sized to what one core reaches on 9x9 (about 1.5k/s), so up to level 10
+# the playout count is what tells the levels apart; on bigger boards the time limit binds.
+DIFFICULTY_BUDGETS: Dict[int, Tuple[int, float]] = {
+    1: (50, 0.5),
+    2: (100, 1.0),
+    3: (200, 1.5),
+    4: (400, 2.0),
+    5: (700, 2.5),
+    6: (1000, 3.0),
+    7: (1500, 3.5),
+    8: (2500, 4.0),
+    9: (4000, 4.5),
+    10: (7000, 5.0),
+}
+
+
+class _Node:
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins", "player",
+                 "prior_visits", "prior_wins")
+
+    def __init__(self, move: int, parent: Optional["_Node"], player: int):
+        self.move = move  # flat PlayoutBoard index, PASS for a pass
+        self.parent = parent
+        self.children: List["_Node"] = []
+        self.untried: Optional[List[int]] = None  # filled the first time the node is reached
+        self.visits = 0
+        self.wins = 0.0  # from the point of view of `player`, who played `move`
+        self.player = player
+        # transposition table statistics the node started from: they shape its value in
+        # uct_child() but are never counted as visits of this tree
+        self.prior_visits = 0
+        self.prior_wins = 0.0
+
+    def uct_child(self, exploration: float) -> "_Node":
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child:
+                   (child.wins + child.prior_wins) / (child.visits + child.prior_visits) +
+                   exploration * math.sqrt(log_visits / child.visits))
+
+
+def root_statistics(root: _Node, playout: PlayoutBoard) -> Dict[Move, Tuple[int, float]]:
+    return {(None if child.move == PASS else playout.coords[child.move]): (child.visits, child.wins)
+            for child in root.children}
+
+
+def _search_worker(state: BoardState, playouts: int, time_limit: float, exploration: float,
+                   seed: int, patterns: Optional[str] = None) -> Tuple[Dict[Move, Tuple[int, float]], int]:
+    # runs in a pool process: rebuild the position from its compact state and search it;
+    # the pattern table travels as its path and is loaded once per process
+    player = MCTSPlayer(playouts, time_limit, exploration, seed,
+                        patterns=None if patterns is None else load_table(patterns))
+    root, playout = player.search(FastBoard.from_state(state))
+    return root_statistics(root, playout), player.last_playouts
+
+
+class MCTSPlayer:
+    def __init__(self, playouts: int = 1000, time_limit: float = 1.0,
+                 exploration: float = 1.4, seed: Optional[int] = None, workers: int = 1,
+                 table: Optional[TranspositionTable] = None, patterns: Optional[PatternTable] = None):
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.workers = workers
+        # shared statistics for positions reached by different move orders, kept across searches
+        self.table = table
+        # pattern weights for the rollout policy; None plays uniformly random rollouts
+        self.patterns = patterns
+        self.last_playouts = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # pondering stops after this many playouts so the kept tree stays bounded
+        self.ponder_playouts = 200_000
+        # search tree kept between searches, with the position key of its root
+        self._tree: Optional[Tuple[_Node, int]] = None
+
+    @classmethod
+    def from_difficulty(cls, level: int, seed: Optional[int] = None, workers: int = 1,
+                        table: Optional[TranspositionTable] = None,
+                        patterns: Optional[PatternTable] = None) -> "MCTSPlayer":
+        playouts, time_limit = DIFFICULTY_BUDGETS[max(1, min(10, level))]
+        return cls(playouts, time_limit, seed=seed, workers=workers, table=table, patterns=patterns)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def select_move(self, board: Board, stop: Optional[threading.Event] = None) -> Move:
+        if board.game_over:
+            return None
+        # answer a pass with a pass when that already wins the game
+        if board.consecutive_passes and PlayoutBoard.from_board(board).winner() == board.current_player:
+            return None
+
+        if self.workers > 1:
+            statistics = self.parallel_statistics(board, stop)
+        else:
+            statistics = root_statistics(*self.search(board, stop))
+        if not statistics:
+            return None
+        return max(statistics, key=lambda move: statistics[move][0])
+
+    def candidate_moves(self, playout: PlayoutBoard) -> List[int]:
+        color = playout.to_move
+        moves = [index for index in playout.empty
+                 if playout.is_legal(index, color) and not playout.is_eye(index, color)]
+        self.rng.shuffle(moves)
+        return moves or [PASS]
+
+    def ponder(self, board: Board, stop: threading.Event) -> None:
+        # think on the opponent's time until stopped; the tree is reused by the next search
+        if self.workers > 1 or board.game_over:
+            return
+        self.search(board, stop, self.ponder_playouts, math.inf)
+
+    def search(self, board: Board, stop: Optional[threading.Event] = None,
+               playouts: Optional[int] = None, time_limit: Optional[float] = None) -> Tuple[_Node, PlayoutBoard]:
+        root_playout = PlayoutBoard.from_board(board)
+        if self.patterns is not None:
+            # built once here; every copy then carries the codes and updates them move by move
+            root_playout.track_patterns(self.patterns.diamond)
+        root = self._reuse_tree(board, root_playout)
+        if root is None:
+            root = _Node(PASS, None, 3 - board.current_player)
+            root.untried = self.candidate_moves(root_playout)
+        # the playout board only knows simple ko, so root moves are checked against the real rules
+        player = board.current_player
+
+        def legal(index: int) -> bool:
+            return index == PASS or not board.is_ko_violation(*root_playout.coords[index], player)
+
+        if root.untried is None:
+            root.untried = self.candidate_moves(root_playout)
+        root.untried = [index for index in root.untried if legal(index)]
+        root.children = [child for child in root.children if legal(child.move)]
+        if not root.untried and not root.children:
+            root.untried = [PASS]
+        self._tree = (root, position_key(board.hash, board.current_player))
+
+        if playouts is None:
+            playouts = self.playouts
+        deadline = time.perf_counter() + (self.time_limit if time_limit is None else time_limit)
+        done = 0
+        while done < playouts and time.perf_counter() < deadline and (stop is None or not stop.is_set()):
+            self._run_playout(root_playout.copy(), root)
+            done += 1
+        self.last_playouts = done
+        return root, root_playout
+
+    def _reuse_tree(self, board: Board, playout: PlayoutBoard) -> Optional[_Node]:
+        # the stored tree is either this position or the one before the last move played
+        if self._tree is None:
+            return None
+        root, root_key = self._tree
+        if root_key == position_key(board.hash, board.current_player):
+            return root
+        if board.history:
+            last = board.history[-1]
+            if root_key == position_key(last.hash, last.player):
+                move = PASS if last.point is None else playout.index(*last.point)
+                for child in root.children:
+                    if child.move == move:
+                        child.parent = None
+                        return child
+        return None
+
+    def parallel_statistics(self, board: Board,
+                            stop: Optional[threading.Event] = None) -> Dict[Move, Tuple[int, float]]:
+        # root parallelism: independent trees per process, merged by summing the root statistics.
+        # When stop is set the searches not started yet are cancelled and whatever has come
+        # back is returned; the ones already running finish within their time limit unwaited.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        state = board.to_state()
+        share = max(1, self.playouts // self.workers)
+        patterns = None if self.patterns is None else self.patterns.path
+        futures = [self._executor.submit(_search_worker, state, share, self.time_limit,
+                                         self.exploration, self.rng.getrandbits(32), patterns)
+                   for _ in range(self.workers)]
+        finished = set()
+        pending = set(futures)
+        while pending:
+            if stop is not None and stop.is_set():
+                for future in pending:
+                    future.cancel()
+                break
+            done, pending = wait(pending, timeout=STOP_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            finished |= done
+        # merged in submission order, so the result does not depend on which process ends first
+        merged: Dict[Move, Tuple[int, float]] = {}
+        self.last_playouts = 0
+        for future in futures:
+            if future not in finished:
+                continue
+            statistics, playouts = future.result()
+            self.last_playouts += playouts
+            for move, (visits, wins) in statistics.items():
+                total_visits, total_wins = merged.get(move, (0, 0.0))
+                merged[move] = (total_visits + visits, total_wins + wins)
+        return merged
+
+    def _run_playout(self, playout: PlayoutBoard, root: _Node) -> None:
+        table = self.table
+        node = root
+        positions = []
+        # selection
+        while node.untried is not None and not node.untried and node.children:
+            node = node.uct_child(self.exploration)
+            playout.play(node.move)
+            if table is not None:
+                positions.append((playout.hash, playout.to_move))
+        # expansion; two passes in a row end the game and leave nothing to expand
+        if playout.passes < 2:
+            if node.untried is None:
+                node.untried = self.candidate_moves(playout)
+            if node.untried:
+                child = _Node(node.untried.pop(), node, playout.to_move)
+                node.children.append(child)
+                playout.play(child.move)
+                node = child
+                if table is not None:
+                    positions.append((playout.hash, playout.to_move))
+                    # a transposition starts the new node from what is already known about it
+                    known = table.get(playout.hash, playout.to_move)
+                    if known is not None:
+                        child.prior_visits = known.visits
+                        child.prior_wins = known.wins
+            # simulation
+            playout.play_random(self.rng, table=self.patterns)
+        winner = playout.winner()
+        # backpropagation
+        if table is not None:
+            for position_hash, to_move in positions:
+                table.update(position_hash, to_move, 1, 1.0 if to_move != winner else 0.0)
+        while node is not None:
+            node.visits += 1
+            if node.player == winner:
+                node.wins += 1
+            node = node.parent
@@ -0,0 +1,90 @@
+# packed.py
+import struct
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Packed position records: a fixed 12-byte header and 2 bits per point, so a 19x19
+# position takes 103 bytes. Points are row-major, four to a byte, the first point in
+# the low bits; the values are the board's own (0 empty, 1 black, 2 white). The ko point
+# is the point simple ko forbids the side to move, NO_KO when there is none. Komi is
+# stored in half points. Superko history is not part of a record.
+
+HEADER = struct.Struct("<BBBBHHHh")  # size, to_move, flags, passes, ko, black/white captures, komi * 2
+NO_KO = 0xFFFF
+GAME_OVER = 1  # flags bit
+
+# bytes 0..255 -> the four point values they hold
+_UNPACKED = tuple(bytes((byte >> shift) & 3 for shift in (0, 2, 4, 6)) for byte in range(256))
+
+
+class PackedPosition(NamedTuple):
+    size: int
+    cells: bytes  # row-major, one byte per point, like BoardState.cells
+    to_move: int
+    ko: Optional[Tuple[int, int]]
+    black_captures: int
+    white_captures: int
+    komi: float
+    consecutive_passes: int
+    game_over: bool
+
+
+def record_size(size: int) -> int:
+    return HEADER.size + (size * size + 3) // 4
+
+
+def pack_cells(cells: bytes) -> bytes:
+    cells = bytes(cells) + bytes(-len(cells) % 4)
+    return bytes(cells[i] | cells[i + 1] << 2 | cells[i + 2] << 4 | cells[i + 3] << 6
+                 for i in range(0, len(cells), 4))
+
+
+def unpack_cells(data: bytes, points: int) -> bytes:
+    return b"".join([_UNPACKED[byte] for byte in data])[:points]
+
+
+def pack_position(position: PackedPosition) -> bytes:
+    size = position.size
+    ko = NO_KO if position.ko is None else position.ko[0] * size + position.ko[1]
+    header = HEADER.pack(size, position.to_move, GAME_OVER if position.game_over else 0,
+                         position.consecutive_passes, ko, position.black_captures,
+                         position.white_captures, round(position.komi * 2))
+    return header + pack_cells(position.cells)
+
+
+def unpack_position(data: bytes) -> PackedPosition:
+    size, to_move, flags, passes, ko, black, white, komi = HEADER.unpack_from(data)
+    end = record_size(size)
+    if len(data) < end:
+        raise ValueError(f"Packed position too short: {len(data)} bytes for a {size}x{size} board")
+    cells = unpack_cells(bytes(data[HEADER.size:end]), size * size)
+    return PackedPosition(size, cells, to_move, None if ko == NO_KO else divmod(ko, size),
+                          black, white, komi / 2, passes, bool(flags & GAME_OVER))
+
+
+def record_dtype(size: int):
+    # NumPy structured dtype of one record, for zero-copy views of many records at once
+    import numpy as np
+    return np.dtype([("size", "u1"), ("to_move", "u1"), ("flags", "u1"), ("passes", "u1"),
+                     ("ko", "<u2"), ("black_captures", "<u2"), ("white_captures", "<u2"),
+                     ("komi2", "<i2"), ("cells", "u1", (record_size(size) - HEADER.size,))])
+
+
+def decode_records(records, size: int) -> Dict[str, object]:
+    # records: structured array of record_dtype(size). The header columns are returned as the
+    # views they are; only the cells have to be unpacked, into a new (K, size, size) int8 array.
+    import numpy as np
+    packed = records["cells"]
+    count = len(records)
+    cells = np.empty((count, packed.shape[1], 4), dtype=np.int8)
+    for slot, shift in enumerate((0, 2, 4, 6)):
+        np.bitwise_and(packed >> shift, 3, out=cells[:, :, slot], casting="unsafe")
+    return {
+        "cells": cells.reshape(count, -1)[:, :size * size].reshape(count, size, size),
+        "to_move": records["to_move"],
+        "game_over": (records["flags"] & GAME_OVER).astype(bool),
+        "passes": records["passes"],
+        "ko": records["ko"],  # row * size + col, NO_KO for none
+        "black_captures": records["black_captures"],
+        "white_captures": records["white_captures"],
+        "komi": records["komi2"] / 2,
+    }
@@ -0,0 +1,320 @@
+# patterns.py
+import argparse
+import array
+import itertools
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Local shape codes. The neighbourhood of a point is read in a fixed order and every
+# neighbour takes 2 bits: 0 empty, 1 black, 2 white, 3 off the board (the same values as
+# Board cells), so a 3x3 code fits in 16 bits and a diamond-12 code in 24.
+# Points are the padded flat indices of fast_board.padded_geometry: (row + 1) * (size + 1) + col + 1.
+
+EMPTY, BLACK, WHITE, OFF_BOARD = 0, 1, 2, 3
+
+# (row, col) offsets from the centre in code order
+RING = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+DIAMOND = RING + ((-2, 0), (0, 2), (2, 0), (0, -2))
+
+# the eight rotations and reflections of the square, as maps of (row, col)
+SYMMETRIES = (
+    lambda r, c: (r, c), lambda r, c: (c, -r), lambda r, c: (-r, -c), lambda r, c: (-c, r),
+    lambda r, c: (r, -c), lambda r, c: (-r, c), lambda r, c: (c, r), lambda r, c: (-c, -r),
+)
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "patterns.txt")
+DEFAULT_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "patterns.bin")
+MAGIC = b"GOPT"
+VERSION = 1
+
+
+def offsets(diamond: bool) -> Tuple[Tuple[int, int], ...]:
+    return DIAMOND if diamond else RING
+
+
+def padded_index(size: int, row: int, col: int) -> int:
+    return (row + 1) * (size + 1) + col + 1
+
+
+@lru_cache(maxsize=None)
+def affected(size: int, diamond: bool) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    # for every point p: the (point q, bit shift) pairs whose neighbourhood holds p
+    total = (size + 2) * (size + 1)
+    table: List[List[Tuple[int, int]]] = [[] for _ in range(total)]
+    for row in range(size):
+        for col in range(size):
+            centre = padded_index(size, row, col)
+            for slot, (dr, dc) in enumerate(offsets(diamond)):
+                if 0 <= row + dr < size and 0 <= col + dc < size:
+                    table[padded_index(size, row + dr, col + dc)].append((centre, 2 * slot))
+    return tuple(tuple(pairs) for pairs in table)
+
+
+@lru_cache(maxsize=None)
+def empty_codes(size: int, diamond: bool) -> Tuple[int, ...]:
+    # codes on an empty board: only the off-board neighbours are set
+    codes = [0] * ((size + 2) * (size + 1))
+    for row in range(size):
+        for col in range(size):
+            code = 0
+            for slot, (dr, dc) in enumerate(offsets(diamond)):
+                if not (0 <= row + dr < size and 0 <= col + dc < size):
+                    code |= OFF_BOARD << (2 * slot)
+            codes[padded_index(size, row, col)] = code
+    return tuple(codes)
+
+
+def code_at(board: Sequence[Sequence[int]], row: int, col: int, diamond: bool = False) -> int:
+    # the code of one point computed from scratch
+    size = len(board)
+    code = 0
+    for slot, (dr, dc) in enumerate(offsets(diamond)):
+        r, c = row + dr, col + dc
+        value = board[r][c] if 0 <= r < size and 0 <= c < size else OFF_BOARD
+        code |= value << (2 * slot)
+    return code
+
+
+class PatternCodes:
+    # the code of every point, kept up to date by the board's stone primitives through
+    # place() and lift(): each changes at most 8 (12 for the diamond) codes
+    __slots__ = ("size", "diamond", "codes", "_affected")
+
+    def __init__(self, size: int, diamond: bool = False):
+        self.size = size
+        self.diamond = diamond
+        self.codes = list(empty_codes(size, diamond))
+        self._affected = affected(size, diamond)
+
+    @classmethod
+    def from_board(cls, board: Sequence[Sequence[int]], diamond: bool = False) -> "PatternCodes":
+        patterns = cls(len(board), diamond)
+        for row, line in enumerate(board):
+            for col, value in enumerate(line):
+                if value:
+                    patterns.place(padded_index(patterns.size, row, col), value)
+        return patterns
+
+    def copy(self) -> "PatternCodes":
+        other = PatternCodes.__new__(PatternCodes)
+        other.size = self.size
+        other.diamond = self.diamond
+        other.codes = self.codes[:]
+        other._affected = self._affected
+        return other
+
+    def place(self, index: int, color: int) -> None:
+        codes = self.codes
+        for point, shift in self._affected[index]:
+            codes[point] += color << shift
+
+    def lift(self, index: int, color: int) -> None:
+        codes = self.codes
+        for point, shift in self._affected[index]:
+            codes[point] -= color << shift
+
+    def code(self, row: int, col: int) -> int:
+        return self.codes[padded_index(self.size, row, col)]
+
+
+# --- symmetry and colour ---
+
+@lru_cache(maxsize=None)
+def permutations(diamond: bool) -> Tuple[Tuple[int, ...], ...]:
+    # for every symmetry: slot k of a code moves to slot permutation[k]
+    order = offsets(diamond)
+    return tuple(tuple(order.index(symmetry(*offset)) for offset in order) for symmetry in SYMMETRIES)
+
+
+def transform(code: int, permutation: Sequence[int]) -> int:
+    result = 0
+    for slot, target in enumerate(permutation):
+        result |= ((code >> (2 * slot)) & 3) << (2 * target)
+    return result
+
+
+def swap_colors(code: int, diamond: bool = False) -> int:
+    result = 0
+    for slot in range(len(offsets(diamond))):
+        value = (code >> (2 * slot)) & 3
+        if value == BLACK or value == WHITE:
+            value = 3 - value
+        result |= value << (2 * slot)
+    return result
+
+
+def symmetric_codes(code: int, diamond: bool = False) -> List[int]:
+    return sorted({transform(code, permutation) for permutation in permutations(diamond)})
+
+
+# --- pattern source ---
+# One pattern per line: the rows of the neighbourhood (3 rows of 3 cells, or 5 rows of 5
+# for the diamond, where only the diamond's cells are read) and a weight, for example
+#     XO? ... ??? 2.0
+# with the centre always ".". X is the side to move, O the opponent, "." empty, "#" off the
+# board, "x" X or empty, "o" O or empty, "?" anything on the board and "*" anything at all.
+# A later line wins where two patterns produce the same code, so general patterns go first.
+# Lines starting with ";" are comments ("#" is a pattern cell).
+
+CELL_VALUES = {
+    ".": (EMPTY,), "X": (BLACK,), "O": (WHITE,), "#": (OFF_BOARD,),
+    "x": (BLACK, EMPTY), "o": (WHITE, EMPTY), "?": (EMPTY, BLACK, WHITE),
+    "*": (EMPTY, BLACK, WHITE, OFF_BOARD),
+}
+
+
+def parse_pattern(rows: Sequence[str]) -> Tuple[bool, List[Tuple[int, ...]]]:
+    # (diamond, allowed values per slot) of one pattern, black to move
+    if len(rows) == 3 and all(len(row) == 3 for row in rows):
+        diamond, centre = False, 1
+    elif len(rows) == 5 and all(len(row) == 5 for row in rows):
+        diamond, centre = True, 2
+    else:
+        raise ValueError(f"A pattern is 3 rows of 3 or 5 rows of 5 cells: {' '.join(rows)}")
+    if rows[centre][centre] != ".":
+        raise ValueError(f"The centre of a pattern must be empty: {' '.join(rows)}")
+    slots = []
+    for dr, dc in offsets(diamond):
+        cell = rows[centre + dr][centre + dc]
+        if cell not in CELL_VALUES:
+            raise ValueError(f"Unknown pattern cell {cell!r}: {' '.join(rows)}")
+        slots.append(CELL_VALUES[cell])
+    return diamond, slots
+
+
+def read_source(path: str) -> Iterator[Tuple[List[str], float]]:
+    with open(path, encoding="utf-8") as source:
+        for number, line in enumerate(source, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith(";"):
+                continue
+            try:
+                yield fields[:-1], float(fields[-1])
+            except ValueError:
+                raise ValueError(f"{path}:{number}: the last field must be the weight") from None
+
+
+def expand(slots: Sequence[Tuple[int, ...]]) -> Iterator[int]:
+    for values in itertools.product(*slots):
+        code = 0
+        for slot, value in enumerate(values):
+            code |= value << (2 * slot)
+        yield code
+
+
+def compile_patterns(entries: Iterator[Tuple[List[str], float]],
+                     diamond: bool = False) -> Dict[int, float]:
+    # code -> weight with black to move, every wildcard and symmetry expanded
+    weights: Dict[int, float] = {}
+    for rows, weight in entries:
+        pattern_diamond, slots = parse_pattern(rows)
+        if pattern_diamond != diamond:
+            raise ValueError(f"Mixed pattern sizes: {' '.join(rows)}")
+        for code in expand(slots):
+            for variant in symmetric_codes(code, diamond):
+                weights[variant] = weight
+    return weights
+
+
+# --- compiled tables ---
+# Layout: MAGIC, then a header of uint32 (version, diamond, entries), the black-to-move codes
+# (uint32), the same codes with colours swapped for white to move (uint32) and the weights
+# (float32). Loading is a few array reads; nothing is expanded at run time.
+
+class PatternTable:
+    # weights[color][code] is a single list index for 3x3 codes (65536 entries per colour)
+    # and a dict lookup for diamond codes; codes without a pattern weigh `default`
+    __slots__ = ("path", "diamond", "default", "weights")
+
+    def __init__(self, codes: Dict[int, float], diamond: bool = False, default: float = 0.0,
+                 path: Optional[str] = None):
+        self.path = path
+        self.diamond = diamond
+        self.default = default
+        self.weights: Dict[int, Union[List[float], Dict[int, float]]] = {}
+        self._fill(codes.keys(), [swap_colors(code, diamond) for code in codes], codes.values())
+
+    def _fill(self, black: Sequence[int], white: Sequence[int], weights: Sequence[float]) -> None:
+        for color, codes in ((BLACK, black), (WHITE, white)):
+            if self.diamond:
+                self.weights[color] = dict(zip(codes, weights))
+            else:
+                table = [self.default] * (1 << 16)
+                for code, weight in zip(codes, weights):
+                    table[code] = weight
+                self.weights[color] = table
+
+    @classmethod
+    def load(cls, path: str, default: float = 0.0) -> "PatternTable":
+        with open(path, "rb") as source:
+            if source.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a compiled pattern table")
+            header = array.array("I")
+            header.fromfile(source, 3)
+            version, diamond, entries = header
+            if version != VERSION:
+                raise ValueError(f"{path} has table version {version}, expected {VERSION}")
+            black = array.array("I")
+            black.fromfile(source, entries)
+            white = array.array("I")
+            white.fromfile(source, entries)
+            weights = array.array("f")
+            weights.fromfile(source, entries)
+        table = cls.__new__(cls)
+        table.path = path
+        table.diamond = bool(diamond)
+        table.default = default
+        table.weights = {}
+        table._fill(black, white, weights)
+        return table
+
+    def weight(self, code: int, color: int) -> float:
+        if self.diamond:
+            return self.weights[color].get(code, self.default)
+        return self.weights[color][code]
+
+
+def save_table(codes: Dict[int, float], path: str, diamond: bool = False) -> None:
+    black = array.array("I", codes)
+    white = array.array("I", (swap_colors(code, diamond) for code in codes))
+    with open(path, "wb") as output:
+        output.write(MAGIC)
+        array.array("I", (VERSION, int(diamond), len(black))).tofile(output)
+        black.tofile(output)
+        white.tofile(output)
+        array.array("f", codes.values()).tofile(output)
+
+
+@lru_cache(maxsize=None)
+def load_table(path: str = DEFAULT_TABLE) -> PatternTable:
+    # cached per path, so every board and search in a process shares one table
+    return PatternTable.load(path)
+
+
+def run_build(args: argparse.Namespace) -> None:
+    try:
+        codes = compile_patterns(read_source(args.source), args.diamond)
+    except (OSError, ValueError) as error:
+        sys.exit(str(error))
+    save_table(codes, args.output, args.diamond)
+    print(f"{len(codes)} codes from {args.source} written to {args.output}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pattern tables for the playout policy")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="compile a pattern source into a weight table")
+    build.add_argument("source", nargs="?", default=DEFAULT_SOURCE)
+    build.add_argument("output", nargs="?", default=DEFAULT_TABLE)
+    build.add_argument("--diamond", action="store_true", help="the source holds 5x5 diamond-12 patterns")
+    build.set_defaults(run=run_build)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+# playout.py
+import random
+from typing import List, Optional
+from config import Config
+from board import Board
+from fast_board import EMPTY, BLACK, WHITE, BORDER, padded_geometry
+from patterns import PatternCodes, PatternTable
+
+PASS = 0  # index 0 is a border cell, so it never names a real point
+
+
+class PlayoutBoard:
+    # one-way board for random rollouts: no history and no undo, simple ko only.
+    # Everything lives in flat lists so copy() is a handful of C-level list copies.
+    # Chains keep pseudo-liberties (one per stone/empty adjacency) with their sum and sum of
+    # squares, which tells "no liberty" and "exactly one liberty" apart in O(1).
+    def __init__(self, size: Optional[int] = None, komi: Optional[float] = None):
+        if size is None:
+            size = Config.GRID_SIZE
+        geometry = padded_geometry(size)
+        self.size = size
+        self.komi = Config.KOMI if komi is None else komi
+        self.width = geometry.width
+        self.neighbors = geometry.neighbors
+        self.coords = geometry.coords
+        self.zobrist = geometry.zobrist
+        # one extra border cell so the lower-right diagonal of the last point exists
+        self.cells = bytearray([BORDER]) * (geometry.total + 1)
+        self.head = [0] * geometry.total
+        self.next_stone = [0] * geometry.total
+        self.stones = [0] * geometry.total
+        self.libs = [0] * geometry.total
+        self.lib_sum = [0] * geometry.total
+        self.lib_square = [0] * geometry.total
+        self.empty: List[int] = list(geometry.points)
+        self.empty_pos = [0] * geometry.total
+        for position, index in enumerate(self.empty):
+            self.cells[index] = EMPTY
+            self.empty_pos[index] = position
+        self.to_move = BLACK
+        self.ko = 0
+        self.passes = 0
+        self.hash = 0
+        self.last = PASS  # the last move, where pattern_move() looks for a reply
+        self.patterns: Optional[PatternCodes] = None
+
+    @classmethod
+    def from_board(cls, board: Board) -> "PlayoutBoard":
+        state = board.to_state()
+        playout = cls(state.size, state.komi)
+        for position, value in enumerate(state.cells):
+            if value:
+                row, col = divmod(position, state.size)
+                playout._add_stone(playout.index(row, col), value)
+        playout.to_move = state.current_player
+        playout.passes = state.consecutive_passes
+        last = state.last_move
+        if last is not None and last.point is not None:
+            playout.last = playout.index(*last.point)
+            # a single stone that just captured a single stone and sits in atari is a ko
+            chain = playout.head[playout.last]
+            if len(last.captured) == 1 and playout.stones[chain] == 1 and playout.libs[chain] == 1:
+                playout.ko = playout.index(*last.captured[0])
+        return playout
+
+    def copy(self) -> "PlayoutBoard":
+        other = PlayoutBoard.__new__(PlayoutBoard)
+        other.size = self.size
+        other.komi = self.komi
+        other.width = self.width
+        other.neighbors = self.neighbors
+        other.coords = self.coords
+        other.zobrist = self.zobrist
+        other.cells = self.cells[:]
+        other.head = self.head[:]
+        other.next_stone = self.next_stone[:]
+        other.stones = self.stones[:]
+        other.libs = self.libs[:]
+        other.lib_sum = self.lib_sum[:]
+        other.lib_square = self.lib_square[:]
+        other.empty = self.empty[:]
+        other.empty_pos = self.empty_pos[:]
+        other.to_move = self.to_move
+        other.ko = self.ko
+        other.passes = self.passes
+        other.hash = self.hash
+        other.last = self.last
+        other.patterns = None if self.patterns is None else self.patterns.copy()
+        return other
+
+    def track_patterns(self, diamond: bool = False) -> PatternCodes:
+        # indices here are the padded ones PatternCodes uses, so stones go in as they are
+        patterns = PatternCodes(self.size, diamond)
+        cells = self.cells
+        for index in range(len(cells) - 1):
+            if cells[index] == BLACK or cells[index] == WHITE:
+                patterns.place(index, cells[index])
+        self.patterns = patterns
+        return patterns
+
+    def index(self, row: int, col: int) -> int:
+        return (row + 1) * self.width + col + 1
+
+    def _add_stone(self, index: int, color: int) -> None:
+        cells = self.cells
+        head = self.head
+        libs = self.libs
+        lib_sum = self.lib_sum
+        lib_square = self.lib_square
+        cells[index] = color
+        self.hash ^= self.zobrist[index][color]
+        # swap-remove from the empty list
+        last = self.empty.pop()
+        if last != index:
+            position = self.empty_pos[index]
+            self.empty[position] = last
+            self.empty_pos[last] = position
+
+        head[index] = index
+        self.next_stone[index] = index
+        self.stones[index] = 1
+        count = total = square = 0
+        for adj in self.neighbors[index]:
+            value = cells[adj]
+            if value == EMPTY:
+                count += 1
+                total += adj
+                square += adj * adj
+            elif value != BORDER:
+                chain = head[adj]
+                libs[chain] -= 1
+                lib_sum[chain] -= index
+                lib_square[chain] -= index * index
+        libs[index] = count
+        lib_sum[index] = total
+        lib_square[index] = square
+        for adj in self.neighbors[index]:
+            if cells[adj] == color and head[adj] != head[index]:
+                self._merge(head[index], head[adj])
+        if self.patterns is not None:
+            self.patterns.place(index, color)
+
+    def _merge(self, first: int, second: int) -> None:
+        stones = self.stones
+        if stones[first] < stones[second]:
+            first, second = second, first
+        head = self.head
+        next_stone = self.next_stone
+        stone = second
+        while True:
+            head[stone] = first
+            stone = next_stone[stone]
+            if stone == second:
+                break
+        next_stone[first], next_stone[second] = next_stone[second], next_stone[first]
+        stones[first] += stones[second]
+        self.libs[first] += self.libs[second]
+        self.lib_sum[first] += self.lib_sum[second]
+        self.lib_square[first] += self.lib_square[second]
+
+    def _remove_chain(self, chain: int) -> int:
+        cells = self.cells
+        head = self.head
+        libs = self.libs
+        lib_sum = self.lib_sum
+        lib_square = self.lib_square
+        empty = self.empty
+        empty_pos = self.empty_pos
+        zobrist = self.zobrist
+        color = cells[chain]
+        stone = chain
+        patterns = self.patterns
+        while True:
+            self.hash ^= zobrist[stone][color]
+            cells[stone] = EMPTY
+            head[stone] = 0
+            empty_pos[stone] = len(empty)
+            empty.append(stone)
+            if patterns is not None:
+                patterns.lift(stone, color)
+            stone = self.next_stone[stone]
+            if stone == chain:
+                break
+        while True:
+            for adj in self.neighbors[stone]:
+                other = head[adj]
+                if other:
+                    libs[other] += 1
+                    lib_sum[other] += stone
+                    lib_square[other] += stone * stone
+            stone = self.next_stone[stone]
+            if stone == chain:
+                break
+        return self.stones[chain]
+
+    def _in_atari(self, chain: int) -> bool:
+        # all pseudo-liberties are the same point exactly when count * sum of squares == sum ** 2
+        return self.libs[chain] * self.lib_square[chain] == self.lib_sum[chain] ** 2
+
+    def is_legal(self, index: int, color: int) -> bool:
+        cells = self.cells
+        if cells[index] != EMPTY or index == self.ko:
+            return False
+        head = self.head
+        libs = self.libs
+        lib_sum = self.lib_sum
+        lib_square = self.lib_square
+        for adj in self.neighbors[index]:
+            value = cells[adj]
+            if value == EMPTY:
+                return True
+            if value == BORDER:
+                continue
+            chain = head[adj]
+            # inlined _in_atari
+            in_atari = libs[chain] * lib_square[chain] == lib_sum[chain] ** 2
+            if value == color:
+                if not in_atari:
+                    return True
+            elif in_atari:
+                return True
+        return False
+
+    def is_eye(self, index: int, color: int) -> bool:
+        cells = self.cells
+        for adj in self.neighbors[index]:
+            value = cells[adj]
+            if value != color and value != BORDER:
+                return False
+        width = self.width
+        enemy = 3 - color
+        enemy_diagonals = 0
+        off_board = 0
+        for diagonal in (index - width - 1, index - width + 1, index + width - 1, index + width + 1):
+            value = cells[diagonal]
+            if value == enemy:
+                enemy_diagonals += 1
+            elif value == BORDER:
+                off_board = 1
+        return enemy_diagonals < 2 - off_board
+
+    def play(self, index: int) -> None:
+        # index must be legal for the side to move; PASS passes
+        color = self.to_move
+        self.to_move = 3 - color
+        self.last = index
+        if index == PASS:
+            self.passes += 1
+            self.ko = 0
+            return
+        self.passes = 0
+        self._add_stone(index, color)
+        enemy = 3 - color
+        captured = 0
+        captured_at = 0
+        for adj in self.neighbors[index]:
+            if self.cells[adj] == enemy:
+                chain = self.head[adj]
+                if self.libs[chain] == 0:
+                    captured += self._remove_chain(chain)
+                    captured_at = adj
+        chain = self.head[index]
+        if captured == 1 and self.stones[chain] == 1 and self.libs[chain] == 1:
+            self.ko = captured_at
+        else:
+            self.ko = 0
+
+    def random_move(self, rng: random.Random) -> int:
+        # scan the empty list from a random start for a legal move that fills no own eye
+        empty = self.empty
+        count = len(empty)
+        if not count:
+            return PASS
+        color = self.to_move
+        start = int(rng.random() * count)
+        for offset in range(count):
+            index = empty[(start + offset) % count]
+            if not self.is_eye(index, color) and self.is_legal(index, color):
+                return index
+        return PASS
+
+    def pattern_move(self, rng: random.Random, table: PatternTable) -> int:
+        # MoGo-style: pick among the 8 points around the last move by the weight of their
+        # shape, one table index per point; fall back to random_move() if none matches
+        last = self.last
+        if last == PASS:
+            return self.random_move(rng)
+        cells = self.cells
+        codes = self.patterns.codes
+        weights = table.weights[self.to_move]
+        default = table.default
+        width = self.width
+        color = self.to_move
+        candidates = []
+        total = 0.0
+        for index in (last - width - 1, last - width, last - width + 1, last - 1,
+                      last + 1, last + width - 1, last + width, last + width + 1):
+            if cells[index] != EMPTY:
+                continue
+            weight = weights.get(codes[index], default) if table.diamond else weights[codes[index]]
+            if weight > 0 and not self.is_eye(index, color) and self.is_legal(index, color):
+                candidates.append((index, weight))
+                total += weight
+        if candidates:
+            pick = rng.random() * total
+            for index, weight in candidates:
+                pick -= weight
+                if pick < 0:
+                    return index
+            return candidates[-1][0]
+        return self.random_move(rng)
+
+    def play_random(self, rng: random.Random, max_moves: Optional[int] = None,
+                    table: Optional[PatternTable] = None) -> None:
+        if max_moves is None:
+            max_moves = self.size * self.size * 3
+        moves = 0
+        if table is not None:
+            if self.patterns is None or self.patterns.diamond != table.diamond:
+                self.track_patterns(table.diamond)
+            while self.passes < 2 and moves < max_moves:
+                self.play(self.pattern_move(rng, table))
+                moves += 1
+            return
+        if self.patterns is None:
+            self._random_rollout(rng, max_moves)
+            return
+        while self.passes < 2 and moves < max_moves:
+            self.play(self.random_move(rng))
+            moves += 1
+
+    def _random_rollout(self, rng: random.Random, max_moves: int) -> None:
+        # random_move() and play() with is_eye(), is_legal(), _add_stone() and _merge() inlined:
+        # the method calls were most of a rollout's time. Same moves for the same rng.
+        cells = self.cells
+        head = self.head
+        next_stone = self.next_stone
+        stones = self.stones
+        libs = self.libs
+        lib_sum = self.lib_sum
+        lib_square = self.lib_square
+        empty = self.empty
+        empty_pos = self.empty_pos
+        neighbors = self.neighbors
+        zobrist = self.zobrist
+        width = self.width
+        random_float = rng.random
+        color = self.to_move
+        ko = self.ko
+        passes = self.passes
+        last = self.last
+        position_hash = self.hash
+        moves = 0
+        while passes < 2 and moves < max_moves:
+            moves += 1
+            enemy = 3 - color
+            count = len(empty)
+            index = PASS
+            # positions start - count .. -1 are the points from start on, 0 .. start - 1 the rest
+            start = int(random_float() * count)
+            for position in range(start - count, start):
+                point = empty[position]
+                around = neighbors[point]
+                up, left, right, down = around
+                up, left, right, down = cells[up], cells[left], cells[right], cells[down]
+                if not (up and left and right and down):
+                    # an empty neighbour: legal, no eye, and never the ko point
+                    index = point
+                    break
+                if point == ko:
+                    continue
+                # own stone or border all round (BORDER is BLACK | WHITE): an eye unless the
+                # diagonals say it is a false one
+                if up & left & right & down & color:
+                    enemy_diagonals = 0
+                    off_board = 0
+                    for value in (cells[point - width - 1], cells[point - width + 1],
+                                  cells[point + width - 1], cells[point + width + 1]):
+                        if value == enemy:
+                            enemy_diagonals += 1
+                        elif value == BORDER:
+                            off_board = 1
+                    if enemy_diagonals < 2 - off_board:
+                        continue
+                for adj in around:
+                    value = cells[adj]
+                    if value == BORDER:
+                        continue
+                    chain = head[adj]
+                    total = lib_sum[chain]
+                    in_atari = libs[chain] * lib_square[chain] == total * total
+                    if in_atari != (value == color):
+                        index = point
+                        break
+                if index:
+                    break
+            last = index
+            if index == PASS:
+                passes += 1
+                ko = 0
+                color = enemy
+                continue
+            passes = 0
+
+            cells[index] = color
+            position_hash ^= zobrist[index][color]
+            tail = empty.pop()
+            if tail != index:
+                position = empty_pos[index]
+                empty[position] = tail
+                empty_pos[tail] = position
+            head[index] = index
+            next_stone[index] = index
+            stones[index] = 1
+            around = neighbors[index]
+            count = total = square = 0
+            for adj in around:
+                value = cells[adj]
+                if value == EMPTY:
+                    count += 1
+                    total += adj
+                    square += adj * adj
+                elif value != BORDER:
+                    chain = head[adj]
+                    libs[chain] -= 1
+                    lib_sum[chain] -= index
+                    lib_square[chain] -= index * index
+            libs[index] = count
+            lib_sum[index] = total
+            lib_square[index] = square
+            captured = 0
+            captured_at = 0
+            for adj in around:
+                value = cells[adj]
+                if value == color:
+                    first = head[index]
+                    second = head[adj]
+                    if first == second:
+                        continue
+                    if stones[first] < stones[second]:
+                        first, second = second, first
+                    stone = second
+                    while True:
+                        head[stone] = first
+                        stone = next_stone[stone]
+                        if stone == second:
+                            break
+                    next_stone[first], next_stone[second] = next_stone[second], next_stone[first]
+                    stones[first] += stones[second]
+                    libs[first] += libs[second]
+                    lib_sum[first] += lib_sum[second]
+                    lib_square[first] += lib_square[second]
+                elif value == enemy:
+                    chain = head[adj]
+                    if libs[chain] == 0:
+                        self.hash = position_hash
+                        captured += self._remove_chain(chain)
+                        position_hash = self.hash
+                        captured_at = adj
+            chain = head[index]
+            if captured == 1 and stones[chain] == 1 and libs[chain] == 1:
+                ko = captured_at
+            else:
+                ko = 0
+            color = enemy
+        self.to_move = color
+        self.ko = ko
+        self.passes = passes
+        self.last = last
+        self.hash = position_hash
+
+    def area_score(self) -> int:
+        # Tromp-Taylor: stones plus empty regions that reach only one colour (black minus white)
+        cells = self.cells
+        neighbors = self.neighbors
+        seen = bytearray(len(cells))
+        score = 0
+        for index in self.empty:
+            if seen[index]:
+                continue
+            seen[index] = 1
+            region = 1
+            reaches = 0
+            to_check = [index]
+            while to_check:
+                point = to_check.pop()
+                for adj in neighbors[point]:
+                    value = cells[adj]
+                    if value == EMPTY:
+                        if not seen[adj]:
+                            seen[adj] = 1
+                            region += 1
+                            to_check.append(adj)
+                    elif value != BORDER:
+                        reaches |= value
+            if reaches == BLACK:
+                score += region
+            elif reaches == WHITE:
+                score -= region
+        black = cells.count(BLACK)
+        white = cells.count(WHITE)
+        return score + black - white
+
+    def winner(self, komi: Optional[float] = None) -> int:
+        if komi is None:
+            komi = self.komi
+        return BLACK if self.area_score() > komi else WHITE
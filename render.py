@@ -1,52 +1,161 @@
 # renderer.py
 import pygame
-from typing import Tuple, List
+from functools import lru_cache
+from typing import Tuple, List, Dict, Optional
 from config import Config
 
 
+@lru_cache(maxsize=None)
+def star_points(size: int) -> Tuple[Tuple[int, int], ...]:
+    # hoshi: 3rd/4th line corners and sides, plus the centre on odd boards
+    if size < 7:
+        return ((size // 2, size // 2),) if size % 2 else ()
+    edge = 3 if size >= 13 else 2
+    lines = [edge, size - 1 - edge]
+    if size % 2 and size >= 9:
+        lines.insert(1, size // 2)
+    return tuple((y, x) for y in lines for x in lines)
+
+
+def cell_size(size: int) -> int:
+    # every board size fills the same window area
+    return Config.BOARD_SIZE // size
+
+
+_board_surfaces: Dict[int, pygame.Surface] = {}
+_stone_surfaces: Dict[Tuple[int, int], pygame.Surface] = {}
+
+
+def board_surface(size: int) -> pygame.Surface:
+    # the static board (wood, grid and star points), drawn once per board size
+    surface = _board_surfaces.get(size)
+    if surface is None:
+        cell = cell_size(size)
+        board_pixels = size * cell
+        surface = pygame.Surface((board_pixels, board_pixels)).convert()
+        surface.fill(Config.BOARD_COLOR)
+        half_cell = cell // 2
+        for i in range(size):
+            pos = i * cell + half_cell
+            pygame.draw.line(surface, Config.BLACK, (half_cell, pos), (board_pixels - half_cell, pos))
+            pygame.draw.line(surface, Config.BLACK, (pos, half_cell), (pos, board_pixels - half_cell))
+        for y, x in star_points(size):
+            center = (x * cell + half_cell, y * cell + half_cell)
+            pygame.draw.circle(surface, Config.BLACK, center, 4)
+        _board_surfaces[size] = surface
+    return surface
+
+
+def stone_surface(color: int, cell: int) -> pygame.Surface:
+    # one per colour and cell size, shared by every Renderer
+    surface = _stone_surfaces.get((color, cell))
+    if surface is None:
+        surface = pygame.Surface((cell, cell), pygame.SRCALPHA)
+        center = (cell // 2, cell // 2)
+        radius = cell // 2 - 2
+        if color == 1:
+            pygame.draw.circle(surface, Config.BLACK, center, radius)
+        else:
+            pygame.draw.circle(surface, Config.WHITE, center, radius)
+            pygame.draw.circle(surface, Config.GRAY, center, radius, 1)
+        _stone_surfaces[(color, cell)] = surface
+    return surface
+
+
 class Renderer:
-    def __init__(self, screen: pygame.Surface, font: pygame.font):
+    # draws only what changed since the last frame; render() returns the dirty rects
+    # for pygame.display.update, an empty list when nothing changed
+    def __init__(self, screen: pygame.Surface, font: pygame.font, size: Optional[int] = None):
+        if size is None:
+            size = Config.GRID_SIZE
         self.screen = screen
         self.font = font
+        self.size = size
+        self.cell = cell_size(size)
+        self._background = board_surface(size)
+        self._stones = {1: stone_surface(1, self.cell), 2: stone_surface(2, self.cell)}
+        self._drawn: Optional[List[List[int]]] = None  # board as it is on screen
+        self._score_key = None
+        self._score_rect = pygame.Rect(0, Config.BOARD_SIZE, Config.WINDOW_WIDTH, Config.SCORE_HEIGHT)
+        self._overlay: Optional[List[str]] = None  # text panel as it is on screen
+        self._overlay_rect: Optional[pygame.Rect] = None
+
+    def invalidate(self) -> None:
+        # force a full redraw, e.g. after the window was covered or the screen was used elsewhere
+        self._drawn = None
+        self._score_key = None
+
+    def render(self, board: List[List[int]], score: Tuple[int, int], game_over: bool, winner: str,
+               overlay: Optional[List[str]] = None) -> List[pygame.Rect]:
+        # overlay: lines of text drawn over the top-left of the board (profiling stats), None for none
+        dirty: List[pygame.Rect] = []
+        if self._drawn is None:
+            self.screen.fill(Config.BACKGROUND_COLOR)
+            self.screen.blit(self._background, (0, 0))
+            self._drawn = [[0] * self.size for _ in range(self.size)]
+            self._score_key = None
+            self._overlay = self._overlay_rect = None
+            dirty.append(self.screen.get_rect())
+        if overlay != self._overlay:
+            self._forget_overlay()
+        stones = self._draw_stones(board)
+        dirty.extend(stones)
+        if overlay and (overlay != self._overlay or
+                        any(rect.colliderect(self._overlay_rect) for rect in stones)):
+            dirty.append(self._draw_overlay(overlay))
+        self._overlay = overlay
+        score_rect = self._draw_score(score, game_over, winner)
+        if score_rect is not None:
+            dirty.append(score_rect)
+        return dirty
+
+    def _draw_stones(self, board: List[List[int]]) -> List[pygame.Rect]:
+        changed = []
+        cell = self.cell
+        for y in range(self.size):
+            row = board[y]
+            drawn = self._drawn[y]
+            if drawn == list(row):
+                continue
+            for x in range(self.size):
+                if row[x] == drawn[x]:
+                    continue
+                rect = pygame.Rect(x * cell, y * cell, cell, cell)
+                self.screen.blit(self._background, rect, rect)
+                if row[x] in self._stones:
+                    self.screen.blit(self._stones[row[x]], rect)
+                drawn[x] = row[x]
+                changed.append(rect)
+        return changed
+
+    def _forget_overlay(self) -> None:
+        # the cells under the old panel are redrawn by the next _draw_stones
+        if self._overlay_rect is None:
+            return
+        rect = self._overlay_rect
+        cell = self.cell
+        for y in range(rect.top // cell, min(self.size, (rect.bottom - 1) // cell + 1)):
+            for x in range(rect.left // cell, min(self.size, (rect.right - 1) // cell + 1)):
+                self._drawn[y][x] = -1
+        self._overlay_rect = None
+
+    def _draw_overlay(self, lines: List[str]) -> pygame.Rect:
+        texts = [self.font.render(line, True, Config.WHITE) for line in lines]
+        line_height = self.font.get_linesize()
+        width = min(Config.BOARD_SIZE, max(text.get_width() for text in texts) + 8)
+        height = min(Config.BOARD_SIZE, line_height * len(texts) + 8)
+        rect = pygame.Rect(0, 0, width, height)
+        self.screen.fill(Config.BLACK, rect)
+        for index, text in enumerate(texts):
+            self.screen.blit(text, (4, 4 + index * line_height))
+        self._overlay_rect = rect
+        return rect
 
-    def render(self, board: List[List[int]], score: Tuple[int, int], game_over: bool, winner: str) -> None:
-        self.screen.fill(Config.BACKGROUND_COLOR)
-        board_rect = pygame.Rect(0, 0, Config.BOARD_SIZE, Config.BOARD_SIZE)
-        pygame.draw.rect(self.screen, Config.BOARD_COLOR, board_rect)
-
-        self._draw_grid()
-        self._draw_star_points()
-        self._draw_stones(board)
-        self._draw_score(score, game_over, winner)
-
-    def _draw_grid(self) -> None:
-        half_cell = Config.CELL_SIZE // 2
-        for i in range(Config.GRID_SIZE):
-            pos = i * Config.CELL_SIZE + half_cell
-            pygame.draw.line(self.screen, Config.BLACK,
-                             (half_cell, pos), (Config.BOARD_SIZE - half_cell, pos))
-            pygame.draw.line(self.screen, Config.BLACK,
-                             (pos, half_cell), (pos, Config.BOARD_SIZE - half_cell))
-
-    def _draw_star_points(self) -> None:
-        star_points = [(3, 3), (3, 9), (3, 15), (9, 3), (9, 9), (9, 15), (15, 3), (15, 9), (15, 15)]
-        for y, x in star_points:
-            center = (x * Config.CELL_SIZE + Config.CELL_SIZE // 2,
-                      y * Config.CELL_SIZE + Config.CELL_SIZE // 2)
-            pygame.draw.circle(self.screen, Config.BLACK, center, 4)
-
-    def _draw_stones(self, board: List[List[int]]) -> None:
-        for y in range(Config.GRID_SIZE):
-            for x in range(Config.GRID_SIZE):
-                center = (x * Config.CELL_SIZE + Config.CELL_SIZE // 2,
-                          y * Config.CELL_SIZE + Config.CELL_SIZE // 2)
-                if board[y][x] == 1:
-                    pygame.draw.circle(self.screen, Config.BLACK, center, Config.STONE_RADIUS)
-                elif board[y][x] == 2:
-                    pygame.draw.circle(self.screen, Config.WHITE, center, Config.STONE_RADIUS)
-                    pygame.draw.circle(self.screen, Config.GRAY, center, Config.STONE_RADIUS, 1)
-
-    def _draw_score(self, score: Tuple[int, int], game_over: bool, winner: str) -> None:
+    def _draw_score(self, score: Tuple[int, int], game_over: bool, winner: str) -> Optional[pygame.Rect]:
+        key = (score, game_over, winner)
+        if key == self._score_key:
+            return None
+        self._score_key = key
         black, white = score
         text_str = f"Black: {black}  White: {white}"
         if game_over:
@@ -55,4 +164,6 @@ class Renderer:
             text_str += " - Game in progress"
         text = self.font.render(text_str, True, Config.BLACK)
         text_rect = text.get_rect(center=(Config.WINDOW_WIDTH // 2, Config.BOARD_SIZE + Config.SCORE_HEIGHT // 2))
-        self.screen.blit(text, text_rect)
\ No newline at end of file
+        self.screen.fill(Config.BACKGROUND_COLOR, self._score_rect)
+        self.screen.blit(text, text_rect)
+        return self._score_rect
@@ -0,0 +1,208 @@
+# selfplay.py
+import argparse
+import importlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+import instrument
+from config import Config
+from board import Board, KO_RULES
+from backends import BACKENDS
+from game_controller import GameController
+from mcts import MCTSPlayer, Move
+from playout import PlayoutBoard, PASS
+from patterns import load_table
+from archive import PositionArchive
+from book import load_book
+from sgf import save_sgf
+
+# Headless self-play: no pygame anywhere on this import path, so pool workers start fast.
+
+Policy = Callable[[Board], Move]
+# a policy factory gets the game's seed and the --playouts budget and returns a fresh policy
+PolicyFactory = Callable[[int, int], Policy]
+
+
+def random_policy(seed: int, playouts: int) -> Policy:
+    # uniformly random legal move that does not fill an own eye; passes when none is left.
+    # One PlayoutBoard follows the game: only the moves played since the last call are
+    # applied to it, and it is rebuilt only if the board went back or no longer matches.
+    rng = random.Random(seed)
+    playout: Optional[PlayoutBoard] = None
+    applied = 0  # entries of board.history already played on the playout board
+
+    def policy(board: Board) -> Move:
+        nonlocal playout, applied
+        history = board.history
+        if playout is not None and applied <= len(history):
+            for record in history[applied:]:
+                playout.play(PASS if record.point is None else playout.index(*record.point))
+        if playout is None or applied > len(history) or playout.hash != board.hash:
+            playout = PlayoutBoard.from_board(board)
+        applied = len(history)
+        index = playout.random_move(rng)
+        return None if index == PASS else playout.coords[index]
+    return policy
+
+
+def mcts_policy(seed: int, playouts: int) -> Policy:
+    # fixed playout budget and no time limit, so results do not depend on machine load
+    return MCTSPlayer(playouts, math.inf, seed=seed).select_move
+
+
+def pattern_mcts_policy(seed: int, playouts: int) -> Policy:
+    # mcts with rollouts guided by the compiled 3x3 pattern table
+    return MCTSPlayer(playouts, math.inf, seed=seed, patterns=load_table()).select_move
+
+
+POLICIES: Dict[str, PolicyFactory] = {
+    "random": random_policy,
+    "mcts": mcts_policy,
+    "mcts-patterns": pattern_mcts_policy,
+}
+
+
+def load_policy(spec: str) -> PolicyFactory:
+    # a name from POLICIES, or "module:factory" for a policy defined elsewhere
+    if spec in POLICIES:
+        return POLICIES[spec]
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Unknown policy {spec!r}; use one of {', '.join(POLICIES)} or module:factory")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def play_game(game: int, size: int, black: str, white: str, seed: int, playouts: int,
+              max_moves: int, ko_rule: str, backend: str, profile: bool = False,
+              positions: bool = False, book: Optional[str] = None,
+              sgf_dir: Optional[str] = None) -> Dict[str, object]:
+    if profile:
+        instrument.enable()
+        instrument.reset()
+    board = BACKENDS[backend](ko_rule, size=size)
+    controller = GameController(board, book=load_book(book) if book else None)
+    book_rng = random.Random(seed)  # book moves are drawn by popularity, so games still differ
+    policies = {1: load_policy(black)(seed, playouts), 2: load_policy(white)(seed + 1, playouts)}
+    moves = 0
+    packed: List[bytes] = []  # every position of the game, for --positions
+    start = time.perf_counter()
+    while not controller.is_game_over() and moves < max_moves:
+        if positions:
+            packed.append(board.to_packed())
+        move = controller.book_move(book_rng)
+        if move is None:
+            move = policies[board.current_player](board)
+        controller.apply_ai_move(move)
+        moves += 1
+    duration = time.perf_counter() - start
+    black_score, white_score = controller.get_score()
+    if black_score > white_score:
+        winner = "black"
+    elif white_score > black_score:
+        winner = "white"
+    else:
+        winner = "draw"
+    result = {
+        "game": game,
+        "seed": seed,
+        "black": black,
+        "white": white,
+        "winner": winner,
+        "black_score": black_score,
+        "white_score": white_score,
+        "finished": controller.is_game_over(),
+        "moves": moves,
+        "duration": round(duration, 6),
+    }
+    if profile:
+        result["profile"] = instrument.snapshot(board)
+    if positions:
+        packed.append(board.to_packed())
+        result["positions"] = packed
+    if sgf_dir is not None:
+        save_sgf(board, os.path.join(sgf_dir, f"game-{seed}.sgf"),
+                 {"PB": black, "PW": white})
+    return result
+
+
+def run_games(args: argparse.Namespace) -> Iterator[Dict[str, object]]:
+    # yields results in the order games finish
+    jobs = [(game, args.size, args.black, args.white, args.seed + 2 * game, args.playouts,
+             args.max_moves, args.ko_rule, args.backend, args.profile, args.positions is not None,
+             args.book, args.sgf)
+            for game in range(args.games)]
+    if args.workers <= 1:
+        for job in jobs:
+            yield play_game(*job)
+        return
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(play_game, *job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def open_output(path: str) -> TextIO:
+    return sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Headless batch self-play, results streamed as JSON lines")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--black", default="random", help="policy name or module:factory")
+    parser.add_argument("--white", default="random", help="policy name or module:factory")
+    parser.add_argument("--playouts", type=int, default=200, help="search budget for the mcts policy")
+    parser.add_argument("--max-moves", type=int, default=None, help="default: 3 * size * size")
+    parser.add_argument("--ko-rule", choices=KO_RULES, default=Config.KO_RULE)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="fast")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="JSONL file, - for stdout")
+    parser.add_argument("--profile", action="store_true", help="add rules engine call counts and timings to each result")
+    parser.add_argument("--positions", metavar="ARCHIVE", help="append every position played to this archive")
+    parser.add_argument("--sgf", metavar="DIR", help="save every game as DIR/game-SEED.sgf (e.g. for book.py build)")
+    parser.add_argument("--book", metavar="BOOK", help="opening book both sides play from before their policy")
+    args = parser.parse_args(argv)
+    if args.max_moves is None:
+        args.max_moves = 3 * args.size * args.size
+    if args.sgf:
+        os.makedirs(args.sgf, exist_ok=True)
+    for spec in (args.black, args.white):
+        try:
+            load_policy(spec)  # fail before starting any workers
+        except (ValueError, ImportError, AttributeError) as error:
+            parser.error(str(error))
+
+    games = 0
+    moves = 0
+    wins: Dict[str, int] = {"black": 0, "white": 0, "draw": 0}
+    start = time.perf_counter()
+    output = open_output(args.output)
+    archive = PositionArchive(args.positions, "a") if args.positions else None
+    try:
+        for result in run_games(args):
+            if archive is not None:
+                archive.extend(result.pop("positions"))
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            games += 1
+            moves += result["moves"]
+            wins[result["winner"]] += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if archive is not None:
+            archive.close()
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {moves} moves in {elapsed:.2f}s: "
+          f"{games / elapsed:.2f} games/s, {moves / elapsed:.0f} moves/s "
+          f"(black {wins['black']}, white {wins['white']}, draw {wins['draw']})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
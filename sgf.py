@@ -0,0 +1,391 @@
+# sgf.py
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Type
+from config import Config
+from board import Board, KO_RULES, Point
+from backends import BACKENDS
+
+Move = Optional[Point]  # None is a pass
+
+CHUNK_SIZE = 1 << 16
+COLORS = {"B": 1, "W": 2}
+
+# one token at a time: a whole [value] (escapes included), a paren or ';', or a property name
+_TOKEN = re.compile(r"\s*(?:(\[(?:[^\]\\]|\\.)*\])|([();])|([A-Za-z]+))", re.S)
+_VALUE, _PUNCTUATION, _IDENT = 1, 2, 3
+# backslash escapes inside a value; an escaped line break is a soft break and disappears
+_ESCAPE = re.compile(r"\\(?:\r\n|\n\r|\n|\r|(.))", re.S)
+
+
+class SGFGame(NamedTuple):
+    source: str  # file name and index of the game inside it
+    size: int
+    komi: float
+    black: Tuple[Point, ...]  # setup stones (AB), e.g. handicap
+    white: Tuple[Point, ...]  # setup stones (AW)
+    first_player: int
+    moves: Tuple[Tuple[int, Move], ...]  # (colour, point) along the main line
+    properties: Dict[str, str]  # root node properties, first value only
+
+
+class IllegalMove(NamedTuple):
+    move_number: int  # 1-based index into SGFGame.moves, 0 for a setup stone
+    color: int
+    point: Move
+    reason: str
+
+
+class ReplayResult(NamedTuple):
+    source: str
+    moves: int  # moves replayed before the end of the record or the first illegal move
+    illegal: Optional[IllegalMove]
+
+
+# --- export ---
+
+def encode_point(point: Move) -> str:
+    if point is None:
+        return ""
+    row, col = point
+    return chr(ord("a") + col) + chr(ord("a") + row)
+
+
+def escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("]", "\\]")
+
+
+def unescape(text: str) -> str:
+    return _ESCAPE.sub(lambda match: match.group(1) or "", text)
+
+
+def result_string(board: Board) -> Optional[str]:
+    if not board.game_over:
+        return None
+    black_score, white_score = board.calculate_score()
+    if black_score == white_score:
+        return "0"
+    winner = "B" if black_score > white_score else "W"
+    return f"{winner}+{abs(black_score - white_score):g}"
+
+
+def board_to_sgf(board: Board, properties: Optional[Dict[str, str]] = None) -> str:
+    # the setup stones (Board.setup) and the moves of board.history as a single SGF game
+    size = board.size
+    root = {"GM": "1", "FF": "4", "CA": "UTF-8", "AP": "go-game", "SZ": str(size), "KM": f"{board.komi:g}"}
+    result = result_string(board)
+    if result is not None:
+        root["RE"] = result
+    if properties:
+        root.update(properties)
+    parts = ["(;", "".join(f"{name}[{escape(value)}]" for name, value in root.items())]
+    black, white, first_player = board.setup
+    for name, points in (("AB", black), ("AW", white)):
+        if points:
+            parts.append(name + "".join(f"[{encode_point(point)}]" for point in points))
+    if black or white or first_player != 1:
+        parts.append(f"PL[{'B' if first_player == 1 else 'W'}]")
+    for record in board.history:
+        color = "B" if record.player == 1 else "W"
+        parts.append(f"\n;{color}[{encode_point(record.point)}]")
+    parts.append(")\n")
+    return "".join(parts)
+
+
+def save_sgf(board: Board, path: str, properties: Optional[Dict[str, str]] = None) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(board_to_sgf(board, properties))
+
+
+# --- streaming reader ---
+
+def _tokens(stream: TextIO) -> Iterator[Tuple[int, str]]:
+    # tokens of an SGF stream, read in chunks; a token cut by a chunk boundary waits for the next one
+    buffer = ""
+    end_of_file = False
+    while not end_of_file:
+        chunk = stream.read(CHUNK_SIZE)
+        end_of_file = not chunk
+        buffer += chunk
+        position = 0
+        while True:
+            match = _TOKEN.match(buffer, position)
+            if match is None:
+                rest = buffer[position:].lstrip()
+                if not rest or (rest[0] == "[" and not end_of_file):
+                    break  # nothing left, or a value that continues in the next chunk
+                position = len(buffer) - len(rest) + 1  # skip text outside the grammar
+                continue
+            if match.end() == len(buffer) and match.lastindex == _IDENT and not end_of_file:
+                break  # the property name may continue in the next chunk
+            yield match.lastindex, match.group(match.lastindex)
+            position = match.end()
+        buffer = buffer[position:]
+
+
+def decode_point(value: str, size: int) -> Move:
+    if value == "" or (value == "tt" and size <= 19):
+        return None
+    if len(value) != 2:
+        raise ValueError(f"Bad SGF point {value!r}")
+    return ord(value[1]) - ord("a"), ord(value[0]) - ord("a")
+
+
+def decode_points(value: str, size: int) -> List[Point]:
+    # a point or a compressed rectangle "aa:cc"
+    first, _, last = value.partition(":")
+    top_left = decode_point(first, size)
+    if top_left is None:
+        return []
+    if not last:
+        return [top_left]
+    bottom_right = decode_point(last, size) or top_left
+    return [(row, col)
+            for row in range(min(top_left[0], bottom_right[0]), max(top_left[0], bottom_right[0]) + 1)
+            for col in range(min(top_left[1], bottom_right[1]), max(top_left[1], bottom_right[1]) + 1)]
+
+
+class _GameBuilder:
+    # collects the properties of one game tree's main line as tokens arrive
+    def __init__(self, source: str):
+        self.source = source
+        self.properties: Dict[str, str] = {}
+        self.nodes = 0
+        self.values: List[Tuple[str, str]] = []  # (property, value) along the main line, in order
+
+    def add(self, name: str, value: str) -> None:
+        if self.nodes == 1:
+            self.properties.setdefault(name, value)
+        if name in ("B", "W", "AB", "AW", "PL"):
+            self.values.append((name, value))
+
+    def build(self) -> SGFGame:
+        size_value = self.properties.get("SZ", "19").split(":")[0]
+        size = int(size_value) if size_value.strip().isdigit() else 19
+        try:
+            komi = float(self.properties.get("KM", Config.KOMI))
+        except ValueError:
+            komi = Config.KOMI
+        black: List[Point] = []
+        white: List[Point] = []
+        first_player = 0
+        moves: List[Tuple[int, Move]] = []
+        for name, value in self.values:
+            if name in COLORS:
+                moves.append((COLORS[name], decode_point(value, size)))
+            elif moves:
+                continue  # setup in the middle of a game is not supported; only the opening setup counts
+            elif name == "AB":
+                black.extend(decode_points(value, size))
+            elif name == "AW":
+                white.extend(decode_points(value, size))
+            elif name == "PL" and value[:1].upper() in COLORS:
+                first_player = COLORS[value[:1].upper()]
+        if not first_player:
+            first_player = moves[0][0] if moves else 1
+        return SGFGame(self.source, size, komi, tuple(black), tuple(white), first_player,
+                       tuple(moves), self.properties)
+
+
+def read_games(stream: TextIO, name: str = "<stream>") -> Iterator[SGFGame]:
+    # lazily yields every game tree of a collection, following the first variation at each branch
+    depth = 0
+    skip_depth = 0  # > 0 while inside a variation that is not on the main line
+    branched: List[bool] = []  # per depth: has the main line already taken a child there
+    builder: Optional[_GameBuilder] = None
+    name_of_property = ""
+    count = 0
+    for kind, token in _tokens(stream):
+        if kind == _PUNCTUATION:
+            if token == "(":
+                depth += 1
+                if skip_depth:
+                    continue
+                if depth == 1:
+                    builder = _GameBuilder(f"{name}#{count}")
+                    branched = [False, False]
+                elif branched[depth - 1]:
+                    skip_depth = depth
+                else:
+                    branched[depth - 1] = True
+                    branched.append(False)
+            elif token == ")":
+                if depth == 0:
+                    continue
+                if skip_depth == depth:
+                    skip_depth = 0
+                elif not skip_depth and depth > 1:
+                    branched.pop()
+                depth -= 1
+                if depth == 0 and builder is not None:
+                    try:
+                        yield builder.build()
+                    except ValueError as error:
+                        print(f"{builder.source}: skipped, {error}", file=sys.stderr)
+                    builder = None
+                    count += 1
+            elif not skip_depth and builder is not None:
+                builder.nodes += 1
+        elif kind == _IDENT:
+            # FF[3] allows lower case letters inside property names, e.g. "AddBlack"
+            name_of_property = "".join(letter for letter in token if letter.isupper())
+        elif not skip_depth and builder is not None and builder.nodes:
+            builder.add(name_of_property, unescape(token[1:-1]).strip())
+
+
+def sgf_files(path: str) -> Iterator[str]:
+    if not os.path.isdir(path):
+        yield path
+        return
+    for directory, subdirectories, files in os.walk(path):
+        subdirectories.sort()
+        for file_name in sorted(files):
+            if file_name.lower().endswith(".sgf"):
+                yield os.path.join(directory, file_name)
+
+
+def iter_games(paths: Iterable[str]) -> Iterator[SGFGame]:
+    # files or directories (searched recursively for *.sgf), one game in memory at a time
+    for path in paths:
+        for file_name in sgf_files(path):
+            with open(file_name, encoding="utf-8", errors="replace") as stream:
+                yield from read_games(stream, file_name)
+
+
+# --- replay ---
+
+def illegal_reason(board: Board, point: Point) -> str:
+    row, col = point
+    if board.game_over:
+        return "game over"
+    if not board.is_valid_position(row, col):
+        return "off board"
+    if not board.is_empty(row, col):
+        return "occupied"
+    if board.is_ko_violation(row, col, board.current_player):
+        return "ko"
+    return "suicide"
+
+
+def replay(board: Board, game: SGFGame) -> Optional[IllegalMove]:
+    # plays the record on a fresh board of the game's size, with the game's komi;
+    # stops at the first illegal move
+    board.komi = game.komi
+    for color, points in ((1, game.black), (2, game.white)):
+        for point in points:
+            if not board.is_valid_position(*point):
+                return IllegalMove(0, color, point, "setup stone off board")
+    if game.black or game.white or game.first_player != 1:
+        board.setup_stones(game.black, game.white, game.first_player)
+    for number, (color, point) in enumerate(game.moves, 1):
+        if color != board.current_player:
+            # two moves of the same colour in a row: the other side passed without it being recorded
+            if board.consecutive_passes or board.game_over:
+                return IllegalMove(number, color, point, "out of turn")
+            board.pass_turn()
+        if point is None:
+            if board.game_over:
+                return IllegalMove(number, color, point, "game over")
+            board.pass_turn()
+        elif not board.place_stone(*point):
+            return IllegalMove(number, color, point, illegal_reason(board, point))
+    return None
+
+
+def load_game(game: SGFGame, ko_rule: Optional[str] = None, backend: Type[Board] = Board) -> Board:
+    board = backend(ko_rule, size=game.size, komi=game.komi)
+    illegal = replay(board, game)
+    if illegal is not None:
+        raise ValueError(f"{game.source}: move {illegal.move_number} is illegal ({illegal.reason})")
+    return board
+
+
+def replay_games(games: List[SGFGame], ko_rule: str, backend: str) -> List[ReplayResult]:
+    # one batch per pool task, so the per-task overhead is paid once for many records
+    boards: Dict[int, Board] = {}
+    results = []
+    for game in games:
+        board = boards.get(game.size)
+        if board is None:
+            board = boards[game.size] = BACKENDS[backend](ko_rule, size=game.size)
+        else:
+            board.reset()
+        illegal = replay(board, game)
+        moves = len(game.moves) if illegal is None else max(illegal.move_number - 1, 0)
+        results.append(ReplayResult(game.source, moves, illegal))
+    return results
+
+
+def batches(games: Iterable[SGFGame], size: int) -> Iterator[List[SGFGame]]:
+    batch: List[SGFGame] = []
+    for game in games:
+        batch.append(game)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def replay_all(games: Iterable[SGFGame], ko_rule: str, backend: str, workers: int,
+               batch_size: int = 64) -> Iterator[ReplayResult]:
+    # at most two batches per worker are in flight, so memory stays bounded for any collection size
+    if workers <= 1:
+        for batch in batches(games, batch_size):
+            yield from replay_games(batch, ko_rule, backend)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch in batches(games, batch_size):
+            pending.add(executor.submit(replay_games, batch, ko_rule, backend))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+
+def format_move(color: int, point: Move) -> str:
+    return f"{'B' if color == 1 else 'W'}[{encode_point(point)}]"
+
+
+def run_replay(args: argparse.Namespace) -> None:
+    games = 0
+    moves = 0
+    illegal = 0
+    start = time.perf_counter()
+    for result in replay_all(iter_games(args.paths), args.ko_rule, args.backend, args.workers):
+        games += 1
+        moves += result.moves
+        if result.illegal is not None:
+            illegal += 1
+            move = result.illegal
+            print(f"{result.source}: move {move.move_number} "
+                  f"{format_move(move.color, move.point)} illegal ({move.reason})")
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {moves} moves, {illegal} with illegal moves in {elapsed:.2f}s: "
+          f"{games / elapsed:.1f} games/s, {moves / elapsed:.0f} moves/s", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SGF tools for the Go engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="replay SGF records through the rules engine")
+    replay_parser.add_argument("paths", nargs="+", help="SGF files or directories")
+    replay_parser.add_argument("--ko-rule", choices=KO_RULES, default=Config.KO_RULE)
+    replay_parser.add_argument("--backend", choices=sorted(BACKENDS), default="fast")
+    replay_parser.add_argument("--workers", type=int, default=1)
+    replay_parser.set_defaults(run=run_replay)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,52 @@
 import pygame
-from board import Board
+import assets
 from config import Config
 from button import Button
+from typing import List, Optional
+
 
 class StartMenu:
-    def __init__(self, screen: pygame.Surface, font: pygame.font):
+    # the whole menu is one surface, drawn once; showing it is a single blit, and between
+    # events there is nothing to redraw
+    def __init__(self, screen: pygame.Surface):
         self.screen = screen
-        self.font = font
+        self.buttons: List[Button] = []
+        for i in range(10):
+            row = i // Config.BUTTONS_PER_ROW
+            col = i % Config.BUTTONS_PER_ROW
 
-    def draw_start_menu(self) -> None:
-        self.screen.fill(Config.BOARD_COLOR)
+            x = Config.BUTTON_START_X + col * (Config.BUTTON_WIDTH + Config.BUTTON_SPACING_X)
+            y = Config.BUTTON_START_Y + row * (Config.BUTTON_HEIGHT + Config.BUTTON_SPACING_Y)
+            self.buttons.append(Button(screen, x, y, str(i + 1)))
+        self.surface = self._build()
+
+    def _build(self) -> pygame.Surface:
+        surface = pygame.Surface(self.screen.get_size()).convert()
+        surface.fill(Config.BOARD_COLOR)
 
         # Display name
-        display_name_font = pygame.font.Font(None, 80)
-        display_name_surface = display_name_font.render("Go game!!!", True, Config.BLACK)
+        display_name_surface = assets.text("Go game!!!", 80, Config.BLACK)
         display_name_rect = display_name_surface.get_rect(center=(Config.WINDOW_WIDTH // 2,
                                                                   Config.WINDOW_HEIGHT // 6))
-        self.screen.blit(display_name_surface, display_name_rect)
+        surface.blit(display_name_surface, display_name_rect)
 
         # Display select difficulties
-        font = pygame.font.Font(None, 40)
-        instruction = font.render("Select difficulty:", True, Config.BLACK)
+        instruction = assets.text("Select difficulty:", 40, Config.BLACK)
         instruction_surface = instruction.get_rect(center=(Config.WINDOW_WIDTH // 2,
                                                            Config.WINDOW_HEIGHT // 6 + 50))
-        self.screen.blit(instruction, instruction_surface)
+        surface.blit(instruction, instruction_surface)
+
+        for button in self.buttons:
+            button.draw_button(surface)
+        return surface
+
+    def draw_start_menu(self) -> None:
+        self.screen.blit(self.surface, (0, 0))
+
+    def handle_event(self, event: pygame.event.Event) -> Optional[int]:
+        # the chosen difficulty, None if the event picked nothing
+        for button in self.buttons:
+            difficulty = button.get_difficulty(event)
+            if difficulty is not None:
+                return difficulty
+        return None
@@ -0,0 +1,100 @@
+# test_archive.py
+import random
+from typing import List
+import pytest
+from archive import PositionArchive
+from board import Board
+
+
+def random_positions(size: int, count: int, seed: int) -> List[Board]:
+    # the position after every move of a random game
+    rng = random.Random(seed)
+    board = Board("simple", "none", size, 6.5)
+    positions = []
+    points = [(row, col) for row in range(size) for col in range(size)]
+    while len(positions) < count:
+        rng.shuffle(points)
+        if not any(board.place_stone(*point) for point in points):
+            board.pass_turn()
+        positions.append(Board.from_packed(board.to_packed()))
+    return positions
+
+
+def test_append_and_read_back(tmp_path) -> None:
+    path = str(tmp_path / "positions.bin")
+    positions = random_positions(9, 30, 1)
+    with PositionArchive(path, "a") as archive:
+        assert archive.append(positions[0]) == 0
+        archive.extend(positions[1:20])
+        assert archive.append(positions[20].to_packed()) == 20
+        archive.extend(board.to_packed() for board in positions[21:])
+        assert len(archive) == 30
+    with PositionArchive(path) as archive:
+        assert len(archive) == 30
+        for number, board in enumerate(positions):
+            assert bytes(archive[number]) == board.to_packed()
+            assert archive.board(number).board == board.board
+        assert bytes(archive[-1]) == positions[-1].to_packed()
+        with pytest.raises(IndexError):
+            archive[30]
+        with pytest.raises(ValueError):
+            archive.append(positions[0])
+
+
+def test_reader_sees_later_appends(tmp_path) -> None:
+    path = str(tmp_path / "positions.bin")
+    positions = random_positions(5, 6, 2)
+    with PositionArchive(path, "a") as writer:
+        writer.extend(positions[:3])
+        with PositionArchive(path) as reader:
+            assert len(reader) == 3
+            writer.extend(positions[3:])
+            reader.refresh()
+            assert len(reader) == 6
+            assert bytes(reader[5]) == positions[5].to_packed()
+
+
+def test_interrupted_append_is_cut_off(tmp_path) -> None:
+    path = str(tmp_path / "positions.bin")
+    positions = random_positions(5, 4, 3)
+    with PositionArchive(path, "a") as archive:
+        archive.extend(positions[:3])
+    # a record written without its index entry, and half an index entry
+    with open(path, "ab") as data:
+        data.write(positions[3].to_packed())
+    with open(path + ".idx", "ab") as index:
+        index.write(b"\x01\x02\x03")
+    with PositionArchive(path, "a") as archive:
+        assert len(archive) == 3
+        archive.append(positions[3])
+    with PositionArchive(path) as archive:
+        assert [bytes(archive[number]) for number in range(4)] == [board.to_packed() for board in positions]
+
+
+def test_bad_records_are_rejected(tmp_path) -> None:
+    with PositionArchive(str(tmp_path / "positions.bin"), "a") as archive:
+        with pytest.raises(ValueError):
+            archive.extend([Board(size=5).to_packed()[:-1]])
+        assert len(archive) == 0
+
+
+def test_records_over_the_mapped_file(tmp_path) -> None:
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "positions.bin")
+    small = random_positions(5, 10, 4)
+    large = random_positions(9, 10, 5)
+    with PositionArchive(path, "a") as archive:
+        archive.extend(small)
+        archive.extend(large)
+    with PositionArchive(path) as archive:
+        records = archive.records(0, 10)
+        assert len(records) == 10
+        arrays = archive.arrays(10, 20)
+        assert arrays["cells"].shape == (10, 9, 9)
+        for slot, board in enumerate(large):
+            assert arrays["cells"][slot].tolist() == board.board
+        assert np.all(arrays["komi"] == 6.5)
+        with pytest.raises(ValueError):
+            archive.records(5, 15)
+        with pytest.raises(ValueError):
+            archive.records(9, 11)
@@ -0,0 +1,83 @@
+# test_batch_board.py
+import random
+from typing import List
+import pytest
+from board import Board
+
+np = pytest.importorskip("numpy")
+from batch_board import BatchBoard  # noqa: E402  (needs NumPy)
+
+
+def reference_legal(board: Board) -> List[bool]:
+    # legality per action as Board.place_stone sees it, tried on copies; the pass is last
+    if board.game_over:
+        return [False] * (board.size * board.size + 1)
+    return [Board.from_state(board.to_state()).place_stone(*divmod(action, board.size))
+            for action in range(board.size * board.size)] + [True]
+
+
+def check_same(batch: BatchBoard, boards: List[Board]) -> None:
+    for slot, board in enumerate(boards):
+        assert batch.board(slot) == board.board
+        assert batch.to_move[slot] == board.current_player
+        assert bool(batch.game_over[slot]) == board.game_over
+        assert list(batch.captures[slot, 1:]) == [board.black_captures, board.white_captures]
+    assert batch.legal_mask().tolist() == [reference_legal(board) for board in boards]
+
+
+@pytest.mark.parametrize("size, seed", [(5, 1), (7, 2)])
+def test_random_batches_match_board(size: int, seed: int) -> None:
+    boards = [Board("simple", "none", size, 0.5) for _ in range(12)]
+    batch = BatchBoard(len(boards), size, 0.5)
+    rng = np.random.default_rng(seed)
+    chooser = random.Random(seed)
+    for step in range(size * size * 3):
+        if step % 4 == 3:
+            # any point at all, illegal ones included: those must leave the board untouched
+            actions = rng.integers(0, batch.pass_action + 1, len(boards))
+        else:
+            actions = batch.random_actions(rng)
+        played = batch.step(actions)
+        for slot, board in enumerate(boards):
+            action = int(actions[slot])
+            if board.game_over:
+                expected = False
+            elif action == batch.pass_action:
+                board.pass_turn()
+                expected = True
+            else:
+                expected = board.place_stone(*divmod(action, size))
+            assert bool(played[slot]) == expected, (step, slot, action)
+        check_same(batch, boards)
+        if chooser.random() < 0.1:
+            # restart the finished games so the batch keeps playing
+            done = np.flatnonzero(batch.game_over)
+            batch.reset(done)
+            for slot in done:
+                boards[slot] = Board("simple", "none", size, 0.5)
+    assert any(board.black_captures or board.white_captures for board in boards)
+
+
+def test_simple_ko() -> None:
+    board = Board("simple", "none", 5, 0.5)
+    # Black takes the white stone on (1, 1) from (1, 2), White may not take straight back
+    board.setup_stones([(0, 1), (1, 0), (2, 1)], [(0, 2), (2, 2), (1, 3), (1, 1)])
+    assert board.place_stone(1, 2)
+    batch = BatchBoard.from_boards([board, Board.from_state(board.to_state())])
+    retake = 1 * 5 + 1
+    assert batch.ko[0] == retake
+    assert not batch.legal_mask()[0, retake]
+    assert not batch.step(np.array([retake, retake]))[0]
+    check_same(batch, [board, Board.from_state(board.to_state())])
+    # after a move elsewhere on each side the retake is legal again
+    batch.step(np.array([4 * 5 + 4, 4 * 5 + 4]))
+    batch.step(np.array([4 * 5 + 0, 4 * 5 + 0]))
+    assert batch.legal_mask()[0, retake]
+    assert batch.step(np.array([retake, retake])).all()
+    assert batch.board(0)[1][2] == 0
+    assert batch.captures[0, 2] == 1
+
+
+def test_from_boards_keeps_komi() -> None:
+    boards = [Board("simple", "none", 5, komi) for komi in (0.5, 6.5, 7.5)]
+    assert BatchBoard.from_boards(boards).komi.tolist() == [0.5, 6.5, 7.5]
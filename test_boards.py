@@ -0,0 +1,153 @@
+# test_boards.py
+import random
+from typing import List, Type
+import pytest
+from backends import BACKENDS
+from board import Board
+
+BOARD_CLASSES = list(BACKENDS.values())
+
+
+def cells(board: Board) -> List[List[int]]:
+    # FastBoard rows are memoryviews, so copy them out before comparing
+    return [list(row) for row in board.board]
+
+
+# Two kos side by side on 7x7. In each, Black holds the ko with a stone on (r, 2) or White
+# with a stone on (r, 1), r = 1 for the upper ko and 5 for the lower one.
+DOUBLE_KO_BLACK = [(0, 1), (1, 0), (2, 1), (4, 1), (5, 0), (6, 1)]
+DOUBLE_KO_WHITE = [(0, 2), (2, 2), (1, 3), (4, 2), (6, 2), (5, 3)]
+
+
+def double_ko(cls: Type[Board], ko_rule: str) -> Board:
+    # upper ko held by Black, lower by White, White to move
+    board = cls(ko_rule, "none", 7, 0.5)
+    board.setup_stones(DOUBLE_KO_BLACK + [(1, 2)], DOUBLE_KO_WHITE + [(5, 1)], 2)
+    return board
+
+
+@pytest.mark.parametrize("cls", BOARD_CLASSES)
+def test_capture(cls: Type[Board]) -> None:
+    board = cls("simple", "none", 5, 0.5)
+    for point in [(0, 1), (1, 1), (1, 0), (4, 4), (2, 1), (4, 3), (1, 2)]:
+        assert board.place_stone(*point)
+    assert board.board[1][1] == 0
+    assert board.black_captures == 1
+    assert board.white_captures == 0
+    assert board.history[-1].captured == ((1, 1),)
+
+
+@pytest.mark.parametrize("cls", BOARD_CLASSES)
+def test_suicide(cls: Type[Board]) -> None:
+    board = cls("simple", "none", 5, 0.5)
+    board.setup_stones([], [(0, 1), (1, 0)], 1)
+    assert not board.place_stone(0, 0)
+    assert board.board[0][0] == 0
+    assert board.current_player == 1
+    # the same point is legal once it captures
+    board.setup_stones([(0, 2), (1, 1), (2, 0)], [])
+    assert board.place_stone(0, 0)
+    assert board.black_captures == 2
+
+
+@pytest.mark.parametrize("cls", BOARD_CLASSES)
+@pytest.mark.parametrize("ko_rule", ["simple", "positional", "situational"])
+def test_immediate_ko_retake(cls: Type[Board], ko_rule: str) -> None:
+    board = double_ko(cls, ko_rule)
+    assert board.place_stone(1, 1)
+    assert board.ko_point() == (1, 2)
+    assert not board.place_stone(1, 2)
+    board.pass_turn()
+    board.place_stone(3, 5)
+    # the retake is fine once a move has been played elsewhere
+    assert board.place_stone(1, 2)
+
+
+@pytest.mark.parametrize("cls", BOARD_CLASSES)
+@pytest.mark.parametrize("ko_rule, allowed", [("simple", True), ("positional", False),
+                                              ("situational", True)])
+def test_superko(cls: Type[Board], ko_rule: str, allowed: bool) -> None:
+    # the last move brings back the starting stones, but with Black to move instead of White
+    board = double_ko(cls, ko_rule)
+    assert board.place_stone(1, 1)
+    assert board.place_stone(5, 2)
+    board.pass_turn()
+    assert board.place_stone(1, 2)
+    assert board.place_stone(5, 1) == allowed
+
+
+@pytest.mark.parametrize("cls", BOARD_CLASSES)
+def test_scoring(cls: Type[Board]) -> None:
+    board = cls("simple", "none", 5, 0.5)
+    board.setup_stones([(row, 1) for row in range(5)], [(row, 3) for row in range(5)])
+    board.pass_turn()
+    board.pass_turn()
+    assert board.game_over
+    assert board.territory_sizes() == (5, 5)
+    assert board.calculate_score() == (5, 5.5)
+    assert board.get_winner() == "White wins by 0.5 points"
+
+
+def random_game(seed: int, size: int, ko_rule: str) -> List[Board]:
+    # plays the same random game on every backend, checking they agree after each move
+    rng = random.Random(seed)
+    boards = [cls(ko_rule, "estimate", size, 6.5) for cls in BOARD_CLASSES]
+    points = [(row, col) for row in range(size) for col in range(size)]
+    for _ in range(size * size * 3):
+        legal = [point for point in points
+                 if Board.from_state(boards[0].to_state()).place_stone(*point)]
+        for board in boards[1:]:
+            assert [point for point in points
+                    if type(board).from_state(board.to_state()).place_stone(*point)] == legal
+        if not legal or rng.random() < 0.02:
+            for board in boards:
+                board.pass_turn()
+        else:
+            point = rng.choice(legal)
+            for board in boards:
+                assert board.place_stone(*point)
+        if rng.random() < 0.05:
+            for board in boards:
+                board.undo()
+        reference = boards[0]
+        for board in boards[1:]:
+            assert cells(board) == cells(reference)
+            assert board.hash == reference.hash
+            assert board.current_player == reference.current_player
+            assert (board.black_captures, board.white_captures) == \
+                   (reference.black_captures, reference.white_captures)
+        if reference.game_over:
+            break
+    return boards
+
+
+@pytest.mark.parametrize("seed, size, ko_rule", [(1, 5, "simple"), (2, 7, "positional"),
+                                                 (3, 9, "situational")])
+def test_random_games_agree(seed: int, size: int, ko_rule: str) -> None:
+    boards = random_game(seed, size, ko_rule)
+    for board in boards:
+        if not board.game_over:
+            board.pass_turn()
+            board.pass_turn()
+    reference = boards[0]
+    for board in boards[1:]:
+        assert cells(board) == cells(reference)
+        assert board.calculate_score() == reference.calculate_score()
+        assert board.get_territory() == reference.get_territory()
+
+
+@pytest.mark.parametrize("cls", BOARD_CLASSES)
+def test_packed_roundtrip(cls: Type[Board]) -> None:
+    board = double_ko(cls, "simple")
+    board.place_stone(1, 1)
+    data = board.to_packed()
+    for other_cls in BOARD_CLASSES:
+        other = other_cls.from_packed(data, "simple", "none")
+        assert cells(other) == cells(board)
+        assert other.current_player == board.current_player
+        assert (other.black_captures, other.white_captures) == \
+               (board.black_captures, board.white_captures)
+        assert other.komi == board.komi
+        assert other.ko_point() == (1, 2)
+        assert not other.place_stone(1, 2)
+        assert other.to_packed() == data
@@ -0,0 +1,51 @@
+# test_book.py
+import io
+from board import Board, Point
+from book import OpeningBook, add_game, canonical, save_book, symmetries
+from sgf import read_games
+
+GAME = "(;SZ[9]KM[6.5]RE[B+R];B[cd];W[gd];B[ef];W[dg])"
+
+
+def image(number: int, point: Point, size: int) -> Point:
+    return divmod(symmetries(size).points[number][point[0] * size + point[1]], size)
+
+
+def test_rotated_positions_map_moves_back(tmp_path) -> None:
+    game, = read_games(io.StringIO(GAME), "test")
+    stats = {}
+    assert add_game(stats, game) == 4
+    path = str(tmp_path / "book.bin")
+    save_book(stats, path)
+    book = OpeningBook(path)
+    try:
+        assert len(book) == 4
+        moves = [point for _, point in game.moves]
+        for number in range(8):
+            # the game seen through one of the 8 rotations and reflections
+            board = Board("simple", "none", 9, 6.5)
+            for played, point in enumerate(moves):
+                expected = image(number, point, 9)
+                suggested = book.best_move(board)
+                if played == 0:
+                    # every image of the first move is the same move on the empty board
+                    assert suggested in {image(other, point, 9) for other in range(8)}
+                else:
+                    assert suggested == expected, (number, played)
+                (_, games, rate), = book.moves(board)
+                assert games == 1 and rate == (1.0 if played % 2 == 0 else 0.0)
+                assert board.place_stone(*expected)
+            assert book.best_move(board) is None
+    finally:
+        book.close()
+
+
+def test_symmetric_positions_share_a_key() -> None:
+    board = Board("simple", "none", 9, 6.5)
+    board.place_stone(2, 2)
+    mirrored = Board("simple", "none", 9, 6.5)
+    mirrored.place_stone(2, 6)
+    assert canonical(board)[0] == canonical(mirrored)[0]
+    # same stones, other side to move
+    mirrored.pass_turn()
+    assert canonical(board)[0] != canonical(mirrored)[0]
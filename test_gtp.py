@@ -0,0 +1,83 @@
+# test_gtp.py
+import asyncio
+from typing import List, Tuple
+from gtp import Engine, parse_vertex, serve_tcp
+
+
+class Client:
+    # one loopback connection; send() returns the response without its trailing blank line
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, command: str) -> str:
+        self.writer.write((command + "\n").encode("utf-8"))
+        await self.writer.drain()
+        return (await self.reader.readuntil(b"\n\n")).decode("utf-8")[:-2]
+
+
+def stones(showboard: str) -> Tuple[int, int, int]:
+    # rows of the board and the black and white stones on them
+    rows = showboard.splitlines()[2:-1]
+    return len(rows), sum(row.count("X") for row in rows), sum(row.count("O") for row in rows)
+
+
+async def play_session(port: int, size: int) -> List[str]:
+    client = Client(*await asyncio.open_connection("127.0.0.1", port))
+    log = []
+    try:
+        assert await client.send("boardsize 99") == "? unacceptable size"
+        assert await client.send("boardsize nine") == "? boardsize not an integer"
+        assert await client.send(f"boardsize {size}") == "="
+        assert await client.send("komi 0.5") == "="
+        assert await client.send("1 name") == "=1 go-game"
+        assert await client.send("2 frobnicate") == "?2 unknown command"
+        assert await client.send("play b C3") == "="
+        assert await client.send("play w C3") == "? illegal move"
+        assert await client.send(f"play w {'ABCDEFGHJ'[size - 1]}{size + 1}") == "? invalid coordinate"
+
+        response = await client.send("genmove w")
+        assert response.startswith("= ")
+        log.append(response[2:])
+        move = parse_vertex(response[2:], size)
+        board = await client.send("showboard")
+        assert stones(board) == (size, 1, 0 if move is None else 1)
+
+        assert await client.send("undo") == "="
+        assert await client.send("undo") == "="
+        assert await client.send("undo") == "? cannot undo"
+        assert stones(await client.send("showboard")) == (size, 0, 0)
+        assert await client.send("final_score") == "= W+0.5"
+
+        # a black wall down the B column: every empty point is Black's territory
+        for row in range(1, size + 1):
+            assert await client.send(f"play b B{row}") == "="
+            assert await client.send("play w pass") == "="
+        response = await client.send("final_score")
+        assert response == f"= B+{size * (size - 1) - 0.5:g}"
+        assert await client.send("quit") == "="
+    finally:
+        client.writer.close()
+    return log
+
+
+async def loopback(sizes: List[int]) -> List[List[str]]:
+    engine = Engine(playouts=30, time_limit=1.0, workers=2, backend="fast", seed=1)
+    stop = asyncio.Event()
+    ready: "asyncio.Future[int]" = asyncio.get_running_loop().create_future()
+    server = asyncio.create_task(serve_tcp(engine, "127.0.0.1", 0, 19, 7.5, stop, ready))
+    try:
+        port = await asyncio.wait_for(ready, 30)
+        return await asyncio.wait_for(
+            asyncio.gather(*(play_session(port, size) for size in sizes)), 120)
+    finally:
+        stop.set()
+        await server
+        engine.close()
+
+
+def test_concurrent_sessions() -> None:
+    # three boards of different sizes searched at once in the shared pool
+    logs = asyncio.run(loopback([5, 7, 9]))
+    assert len(logs) == 3
+    assert all(move != "pass" for log in logs for move in log)
@@ -0,0 +1,54 @@
+# test_mcts.py
+import threading
+import time
+from board import Board
+from mcts import MCTSPlayer, _Node
+from playout import PlayoutBoard
+from transposition import TranspositionTable
+
+
+def check_visits(node: _Node) -> None:
+    # every visit of a child is also a visit of its parent
+    assert sum(child.visits for child in node.children) <= node.visits
+    for child in node.children:
+        check_visits(child)
+
+
+def test_transposition_counts_stay_out_of_the_tree() -> None:
+    board = Board("simple", "none", 5, 0.5)
+    table = TranspositionTable()
+    # pretend an earlier search visited every reply a million times, always losing
+    root = PlayoutBoard.from_board(board)
+    for index in root.empty:
+        after = root.copy()
+        after.play(index)
+        table.update(after.hash, after.to_move, 1_000_000, 0.0)
+    player = MCTSPlayer(playouts=300, time_limit=30.0, seed=1, table=table)
+    tree, _ = player.search(board)
+    assert player.last_playouts == 300
+    assert tree.visits == 300
+    check_visits(tree)
+    assert all(child.prior_visits == 1_000_000 for child in tree.children)
+    assert sum(child.visits for child in tree.children) == 300
+
+
+def test_stop_cancels_parallel_search() -> None:
+    player = MCTSPlayer(playouts=10 ** 9, time_limit=3.0, seed=1, workers=2)
+    stop = threading.Event()
+    try:
+        threading.Timer(0.2, stop.set).start()
+        start = time.perf_counter()
+        player.select_move(Board("simple", "none", 9, 6.5), stop)
+        assert time.perf_counter() - start < 1.5
+    finally:
+        player.close()
+
+
+def test_parallel_search_merges_workers() -> None:
+    player = MCTSPlayer(playouts=200, time_limit=30.0, seed=1, workers=2)
+    try:
+        statistics = player.parallel_statistics(Board("simple", "none", 5, 0.5))
+    finally:
+        player.close()
+    assert player.last_playouts == 200
+    assert sum(visits for visits, _ in statistics.values()) == 200
@@ -0,0 +1,72 @@
+# test_sgf.py
+import io
+from typing import List
+from board import Board
+from game_controller import GameController
+from sgf import SGFGame, board_to_sgf, load_game, read_games, replay, replay_games
+
+
+def parse(text: str) -> List[SGFGame]:
+    return list(read_games(io.StringIO(text), "test"))
+
+
+def test_main_line_follows_first_variation() -> None:
+    game, = parse("(;GM[1]SZ[9]KM[5.5];B[ee](;W[cc];B[gg](;W[cg])(;W[gc]))(;W[dd];B[ff]))")
+    assert game.size == 9
+    assert game.komi == 5.5
+    assert game.moves == ((1, (4, 4)), (2, (2, 2)), (1, (6, 6)), (2, (6, 2)))
+
+
+def test_collection_and_passes() -> None:
+    first, second = parse("(;SZ[19];B[pd];W[tt];B[])\n(;SZ[13]KM[0];B[gg])")
+    assert first.moves == ((1, (3, 15)), (2, None), (1, None))
+    assert (second.size, second.komi, second.moves) == (13, 0.0, ((1, (6, 6)),))
+
+
+def test_setup_stones() -> None:
+    # handicap stones, a compressed rectangle of white stones and White to play first
+    game, = parse("(;SZ[9]KM[0.5]AB[cc][gg]AW[aa:ab]PL[W];W[ee];B[dd])")
+    assert game.black == ((2, 2), (6, 6))
+    assert game.white == ((0, 0), (1, 0))
+    assert game.first_player == 2
+    board = load_game(game)
+    assert board.board[2][2] == 1 and board.board[1][0] == 2
+    assert board.board[4][4] == 2 and board.board[3][3] == 1
+    assert board.setup == (((2, 2), (6, 6)), ((0, 0), (1, 0)), 2)
+
+
+def test_export_round_trip() -> None:
+    board = Board("simple", "none", 9, 3.5)
+    board.setup_stones([(2, 2), (6, 6)], [(2, 6)], 2)
+    for point in [(4, 4), (3, 3), (4, 3), None, (5, 5)]:
+        if point is None:
+            board.pass_turn()
+        else:
+            assert board.place_stone(*point)
+    game, = parse(board_to_sgf(board))
+    copy = load_game(game)
+    assert copy.komi == 3.5
+    assert copy.board == board.board
+    assert copy.setup == board.setup
+    assert [record.point for record in copy.history] == [record.point for record in board.history]
+    assert board_to_sgf(copy) == board_to_sgf(board)
+
+
+def test_replay_applies_komi() -> None:
+    # one board reused for records of different komi, as replay_games does per board size
+    games = parse("(;SZ[9]KM[0.5];B[ee])(;SZ[9]KM[9];B[ee])")
+    board = Board("simple", "none", 9, 6.5)
+    for game in games:
+        board.reset()
+        assert replay(board, game) is None
+        assert board.komi == game.komi
+    assert [result.moves for result in replay_games(games, "simple", "board")] == [1, 1]
+
+
+def test_load_sgf_applies_komi(tmp_path) -> None:
+    path = tmp_path / "game.sgf"
+    path.write_text("(;SZ[9]KM[2.5];B[ee];W[cc])", encoding="utf-8")
+    controller = GameController(Board("simple", "none", 9, 6.5))
+    assert controller.load_sgf(str(path))
+    assert controller.board.komi == 2.5
+    assert controller.board.board[2][2] == 2
@@ -0,0 +1,86 @@
+# transposition.py
+from collections import OrderedDict
+from typing import Dict, Optional
+from board import ZOBRIST_WHITE_TO_MOVE
+
+# rough per-entry cost (dict slot, int key, entry object) used to turn a byte budget into entries
+ENTRY_BYTES = 220
+
+
+def position_key(position_hash: int, to_move: int) -> int:
+    return position_hash ^ ZOBRIST_WHITE_TO_MOVE if to_move == 2 else position_hash
+
+
+class TTEntry:
+    __slots__ = ("visits", "wins")
+
+    def __init__(self, visits: int = 0, wins: float = 0.0):
+        self.visits = visits
+        self.wins = wins  # from the point of view of the player who moved into the position
+
+
+class TranspositionTable:
+    # visit/value statistics keyed by Zobrist hash and side to move, bounded with LRU eviction
+    def __init__(self, max_entries: int = 200_000, max_bytes: Optional[int] = None):
+        if max_bytes is not None:
+            max_entries = min(max_entries, max_bytes // ENTRY_BYTES)
+        if max_entries < 1:
+            raise ValueError("Transposition table needs room for at least one entry")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, TTEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._entries
+
+    def get(self, position_hash: int, to_move: int) -> Optional[TTEntry]:
+        key = position_key(position_hash, to_move)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def entry(self, position_hash: int, to_move: int) -> TTEntry:
+        # the entry for a position, created (and possibly evicting the oldest) if missing;
+        # unlike get() this is bookkeeping, not a probe, so it does not touch the hit counters
+        key = position_key(position_hash, to_move)
+        found = self._entries.get(key)
+        if found is not None:
+            self._entries.move_to_end(key)
+            return found
+        entry = self._entries[key] = TTEntry()
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def update(self, position_hash: int, to_move: int, visits: int, wins: float) -> None:
+        entry = self.entry(position_hash, to_move)
+        entry.visits += visits
+        entry.wins += wins
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "approx_bytes": len(self._entries) * ENTRY_BYTES,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }